@@ -0,0 +1,328 @@
+"""
+Corpus module: Reproducible synthetic document corpora for benchmarking.
+
+Generates invoices, resumes, utility bills and cover letters as TXT, DOCX
+and PDF files. The same seed always gives byte-identical files. PDF and
+DOCX files are written directly (stdlib only), so generating a corpus needs
+no extra packages. A corpus.json manifest next to the files records each
+document's kind and expected class (cover letters are expected as Other).
+
+Usage:
+    python -m src.benchmarks.corpus data/benchmarks/corpus --count 300 --pages 3 --formats txt,docx,pdf
+"""
+
+import argparse
+import json
+import random
+import textwrap
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Sequence
+from xml.sax.saxutils import escape
+
+# Generated document kind -> class the classifier should assign
+KINDS = {
+    "Invoice": "Invoice",
+    "Resume": "Resume",
+    "Utility Bill": "Utility Bill",
+    "Cover Letter": "Other"
+}
+FORMATS = ("txt", "docx", "pdf")
+MANIFEST_NAME = "corpus.json"
+
+_FIRST_NAMES = ["Jane", "John", "Priya", "Carlos", "Mei", "Ahmed", "Olga", "Samuel", "Fatima", "Lucas"]
+_LAST_NAMES = ["Doe", "Smith", "Sharma", "Garcia", "Chen", "Hassan", "Ivanova", "Okafor", "Khan", "Martin"]
+COMPANIES = ["Acme Corp", "Pioneer Ltd", "Northwind Traders", "Globex Inc", "Initech", "Umbrella Supplies", "Blue Harbor LLC"]
+UTILITIES = ["City Power & Light", "Metro Electric", "GreenGrid Energy", "Valley Gas and Electric"]
+ITEMS = ["Consulting services", "Software license", "Hardware maintenance", "Cloud hosting", "Training session",
+         "Support contract", "Office supplies", "Network equipment", "Data migration", "Design work"]
+TITLES = ["Software Engineer", "Data Analyst", "Project Manager", "Accountant", "Marketing Specialist", "DevOps Engineer"]
+SKILLS = ["Python", "SQL", "Excel", "project management", "machine learning", "AWS", "communication", "Java", "Tableau"]
+SCHOOLS = ["State University", "Institute of Technology", "City College", "National University"]
+
+_INVOICE_TERMS = [
+    "Payment is due within 30 days of the invoice date.",
+    "Late payments are subject to a 1.5% monthly finance charge.",
+    "Please include the invoice number with your payment.",
+    "Make checks payable to the company named above or pay by bank transfer.",
+    "Taxes are calculated at the applicable rate for the billing address."
+]
+_RESUME_BULLETS = [
+    "Led a team of {n} engineers delivering features on schedule",
+    "Reduced processing time by {n}% through automation",
+    "Built dashboards and reports used by {n} stakeholders",
+    "Managed budgets of up to ${n},000 across multiple projects",
+    "Mentored {n} junior colleagues and ran onboarding sessions",
+    "Designed and maintained data pipelines processing {n} million records daily"
+]
+_UTILITY_NOTES = [
+    "Your meter was read on the date shown above.",
+    "Compare your electricity usage with the same period last year.",
+    "Energy saving tip: lower your thermostat by one degree to cut heating costs.",
+    "Payments received after the due date may incur a late fee.",
+    "Call customer service to set up automatic payments for your account."
+]
+_LETTER_SENTENCES = [
+    "I believe my background makes me a strong fit for this role.",
+    "In my current position I have worked closely with cross-functional teams.",
+    "I am excited about the opportunity to contribute to your organization.",
+    "I would welcome the chance to discuss how I can support your goals.",
+    "Thank you for considering my application."
+]
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+
+
+def _date(rng: random.Random) -> str:
+    return f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def _invoice(rng: random.Random, pages: int) -> List[List[str]]:
+    company = rng.choice(COMPANIES)
+    first = [
+        company, f"{rng.randint(10, 999)} Market Street, Springfield", "", "INVOICE",
+        f"Invoice Number: INV-{rng.randint(10000, 99999)}", f"Date: {_date(rng)}",
+        f"Bill To: {rng.choice([c for c in COMPANIES if c != company])}", "",
+        "Description | Qty | Unit Price | Amount"
+    ]
+    subtotal = 0
+    pages_lines = [first] + [["Invoice (continued)", "Description | Qty | Unit Price | Amount"] for _ in range(pages - 1)]
+    for lines in pages_lines:
+        for _ in range(rng.randint(8, 20)):
+            qty, price = rng.randint(1, 20), rng.randint(5, 500)
+            subtotal += qty * price
+            lines.append(f"{rng.choice(ITEMS)} | {qty} | ${price}.00 | ${qty * price:,}.00")
+    tax = subtotal // 10
+    pages_lines[-1] += ["", f"Subtotal: ${subtotal:,}.00", f"Tax: ${tax:,}.00", f"Total Amount: ${subtotal + tax:,}.00", ""]
+    pages_lines[-1] += rng.sample(_INVOICE_TERMS, 3)
+    return pages_lines
+
+
+def _resume(rng: random.Random, pages: int) -> List[List[str]]:
+    name = _name(rng)
+    years = rng.randint(1, 25)
+    first = [
+        name, f"{name.lower().replace(' ', '.')}@example.com | +1 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}", "",
+        "Professional Summary",
+        f"{rng.choice(TITLES)} with {years} years of experience in {', '.join(rng.sample(SKILLS, 3))}.", "",
+        "Work Experience"
+    ]
+    pages_lines = [first] + [[f"{name} - Experience (continued)"] for _ in range(pages - 1)]
+    for lines in pages_lines:
+        for _ in range(rng.randint(2, 4)):
+            start = rng.randint(2000, 2020)
+            lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 5)})")
+            lines += [f"- {bullet.format(n=rng.randint(2, 40))}" for bullet in rng.sample(_RESUME_BULLETS, 3)]
+    pages_lines[-1] += [
+        "", "Education", f"B.Sc. Computer Science, {rng.choice(SCHOOLS)}, {rng.randint(1995, 2020)}", "",
+        "Skills", ", ".join(rng.sample(SKILLS, 5))
+    ]
+    return pages_lines
+
+
+def _utility_bill(rng: random.Random, pages: int) -> List[List[str]]:
+    usage = rng.randint(100, 1500)
+    previous = rng.randint(10000, 90000)
+    first = [
+        rng.choice(UTILITIES), "Electricity Utility Bill", "",
+        f"Account Number: ACC-{rng.randint(100000, 999999)}", f"Billing Date: {_date(rng)}",
+        f"Service Address: {rng.randint(1, 999)} Oak Avenue, Springfield", "",
+        f"Previous Meter Reading: {previous}", f"Current Meter Reading: {previous + usage}",
+        f"Usage: {usage} kWh", f"Energy Charge: ${usage * 0.12:.2f}", f"Delivery Charge: ${rng.randint(10, 40)}.00",
+        f"Amount Due: ${usage * 0.12 + 25:.2f}", f"Due Date: {_date(rng)}"
+    ]
+    pages_lines = [first]
+    for page in range(1, pages):
+        lines = ["Usage History (kWh)"]
+        lines += [f"2024-{month:02d}: {rng.randint(100, 1500)} kWh" for month in range(1, 13)]
+        lines += rng.sample(_UTILITY_NOTES, 3)
+        pages_lines.append(lines)
+    pages_lines[-1] += rng.sample(_UTILITY_NOTES, 2)
+    return pages_lines
+
+
+def _cover_letter(rng: random.Random, pages: int) -> List[List[str]]:
+    name = _name(rng)
+    first = [
+        name, f"{name.lower().replace(' ', '.')}@example.com", _date(rng), "",
+        "Dear Hiring Manager,", "",
+        f"I am writing to apply for the position of {rng.choice(TITLES)} at {rng.choice(COMPANIES)}."
+    ]
+    pages_lines = [first] + [[] for _ in range(pages - 1)]
+    for lines in pages_lines:
+        lines += [" ".join(rng.sample(_LETTER_SENTENCES, 3)) for _ in range(rng.randint(3, 6))]
+    pages_lines[-1] += ["", "Sincerely,", name]
+    return pages_lines
+
+
+_GENERATORS = {
+    "Invoice": _invoice,
+    "Resume": _resume,
+    "Utility Bill": _utility_bill,
+    "Cover Letter": _cover_letter
+}
+
+
+def generate_document(kind: str, rng: random.Random, pages: int = 1) -> List[List[str]]:
+    """
+    Lines of each page of one synthetic document of the given kind.
+    """
+    return _GENERATORS[kind](rng, max(1, pages))
+
+
+def write_txt(path: Path, pages: List[List[str]]) -> None:
+    """
+    Pages separated by form feeds.
+    """
+    path.write_text("\n\f\n".join("\n".join(lines) for lines in pages), encoding="utf-8")
+
+
+def write_pdf(path: Path, pages: List[List[str]]) -> None:
+    """
+    Minimal PDF: one Helvetica text stream per page (ASCII text).
+    """
+    def line_ops(lines: List[str]) -> str:
+        wrapped = [part for line in lines for part in (textwrap.wrap(line, 95) or [""])]
+        return " ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T*"
+            for line in wrapped
+        )
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for i, lines in enumerate(pages):
+        content = f"BT /F1 9 Tf 11 TL 40 760 Td {line_ops(lines)} ET".encode("ascii", errors="replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(out))
+
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+
+
+def write_docx(path: Path, pages: List[List[str]]) -> None:
+    """
+    Minimal DOCX: one paragraph per line, page breaks between pages.
+    """
+    paragraphs = []
+    for i, lines in enumerate(pages):
+        if i:
+            paragraphs.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        paragraphs += [f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' for line in lines]
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        + "".join(paragraphs)
+        + '</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        # Fixed timestamps, so the same document always gives the same bytes
+        for name, data in (("[Content_Types].xml", _DOCX_CONTENT_TYPES), ("_rels/.rels", _DOCX_RELS), ("word/document.xml", document)):
+            archive.writestr(zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0)), data, compress_type=zipfile.ZIP_DEFLATED)
+
+
+_WRITERS = {"txt": write_txt, "pdf": write_pdf, "docx": write_docx}
+
+
+def generate_corpus(
+    directory: Path,
+    count: int,
+    formats: Sequence[str] = FORMATS,
+    max_pages: int = 3,
+    seed: int = 0,
+    kinds: Sequence[str] = tuple(KINDS)
+) -> List[Dict]:
+    """
+    Write count synthetic documents to directory, plus a corpus.json manifest.
+
+    Kinds cycle in order; format and page count (1..max_pages) are drawn
+    from a seeded generator.
+
+    Args:
+        directory: Output directory (created if missing)
+        count: Number of documents
+        formats: File formats to draw from ("txt", "docx", "pdf")
+        max_pages: Maximum pages per document
+        seed: Random seed (same seed, same corpus)
+        kinds: Document kinds to generate (keys of KINDS)
+
+    Returns:
+        Manifest records with file_name, kind, expected_class, format and pages
+    """
+    unknown = [fmt for fmt in formats if fmt not in _WRITERS]
+    if unknown:
+        raise ValueError(f"Unknown formats: {unknown} (expected some of {FORMATS})")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        fmt = rng.choice(list(formats))
+        pages = rng.randint(1, max(1, max_pages))
+        file_name = f"{kind.lower().replace(' ', '_')}_{i:05d}.{fmt}"
+        _WRITERS[fmt](directory / file_name, generate_document(kind, rng, pages))
+        records.append({"file_name": file_name, "kind": kind, "expected_class": KINDS[kind], "format": fmt, "pages": pages})
+
+    manifest = {"count": count, "formats": list(formats), "max_pages": max_pages, "seed": seed, "documents": records}
+    with open(directory / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return records
+
+
+def load_corpus(directory: Path) -> Dict:
+    """
+    The corpus.json manifest of a generated corpus.
+    """
+    with open(Path(directory) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic document corpus")
+    parser.add_argument("directory", type=str)
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--formats", type=str, default=",".join(FORMATS), help="comma-separated: txt,docx,pdf")
+    parser.add_argument("--pages", type=int, default=3, help="maximum pages per document")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    records = generate_corpus(Path(args.directory), args.count, args.formats.split(","), args.pages, args.seed)
+    print(f"Wrote {len(records)} documents to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Benchmark suite: Per-stage throughput of the whole pipeline on a synthetic corpus.
+
+Times each stage separately, in pipeline order: ingest, clean, classify,
+extract, chunk, embed, index, query. It reports docs/sec, chunks/sec, query
+latency percentiles and peak RSS as JSON, and compares the run with a stored
+baseline. Caches start empty: the text and embedding caches are pointed at
+a temporary directory, and the index is built in one. Repeated runs
+therefore time the same work.
+
+Usage:
+    python -m src.benchmarks.suite --count 300 --pages 3             # generate (or reuse) a corpus and run
+    python -m src.benchmarks.suite --corpus data/benchmarks/corpus_300_3_0_txt-docx-pdf --save-baseline
+    python -m src.benchmarks.suite --count 300 --fail-on-regression  # exit 1 if worse than the baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from src.config import (
+    BENCHMARK_DIR,
+    BENCHMARK_BASELINE,
+    BENCHMARK_TOLERANCE,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_CACHE_ENABLED,
+    INGESTION_WORKERS,
+    TOP_K_RESULTS
+)
+from src.benchmarks.corpus import (
+    FORMATS, COMPANIES, ITEMS, TITLES, SKILLS, SCHOOLS, UTILITIES, generate_corpus, load_corpus
+)
+
+# (stage, metric) -> True if higher is better; compared against the baseline
+METRICS = {
+    ("ingest", "docs_per_sec"): True,
+    ("clean", "docs_per_sec"): True,
+    ("classify", "docs_per_sec"): True,
+    ("classify", "accuracy"): True,
+    ("extract", "docs_per_sec"): True,
+    ("chunk", "chunks_per_sec"): True,
+    ("embed", "chunks_per_sec"): True,
+    ("index", "chunks_per_sec"): True,
+    ("query", "latency_ms.p50"): False,
+    ("query", "latency_ms.p99"): False,
+    ("memory", "peak_rss_mb"): False
+}
+
+_QUERY_TEMPLATES = {
+    "Invoice": ["invoice from {company} with total amount due", "{item} charges billed to {company}", "invoice payment terms and tax"],
+    "Resume": ["{title} with experience in {skill}", "candidate who studied at {school}", "resume mentioning {skill} and leadership"],
+    "Utility Bill": ["electricity usage in kWh and amount due", "utility bill meter reading for account", "{utility} energy charges"],
+    "Other": ["cover letter applying for {title} position", "letter to hiring manager about {company}"]
+}
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """
+    Peak resident set size so far of this process and of its finished child processes.
+    """
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    }
+
+
+def latency_percentiles(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    if not len(latencies_ms):
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(values.max()), "mean": float(values.mean())}
+
+
+def make_queries(count: int, seed: int = 0) -> List[Dict]:
+    """
+    Distinct search queries about the corpus; every other one is filtered by class.
+    """
+    rng = random.Random(seed)
+    words = {
+        "company": COMPANIES, "item": ITEMS, "title": TITLES,
+        "skill": SKILLS, "school": SCHOOLS, "utility": UTILITIES
+    }
+    queries = []
+    seen = set()
+    while len(queries) < count:
+        doc_class = rng.choice(list(_QUERY_TEMPLATES))
+        text = rng.choice(_QUERY_TEMPLATES[doc_class]).format(**{name: rng.choice(options) for name, options in words.items()})
+        # Distinct strings, so the query embedding cache never hits
+        text = f"{text} {len(queries)}" if text in seen else text
+        seen.add(text)
+        queries.append({"query": text, "doc_class": doc_class if len(queries) % 2 else None})
+    return queries
+
+
+def _rate(count: int, seconds: float) -> float:
+    return count / seconds if seconds > 0 else float("inf")
+
+
+def _best_of(fn, repeat: int):
+    """
+    Run fn repeat times; returns its last result and the fastest run's seconds.
+    """
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def run_suite(
+    corpus_dir: Path,
+    workers: Optional[int] = INGESTION_WORKERS,
+    queries: int = 200,
+    k: int = TOP_K_RESULTS,
+    seed: int = 0,
+    repeat: int = 3
+) -> Dict:
+    """
+    Run every stage over a generated corpus and report per-stage timings.
+
+    Args:
+        corpus_dir: Directory written by corpus.generate_corpus
+        workers: Ingestion worker processes
+        queries: Number of search queries for the query stage
+        k: Results per query
+        seed: Seed for the queries
+        repeat: Runs of the cheap in-memory stages (clean, extract, chunk);
+            the fastest is reported. Other stages run once, on cold caches
+
+    Returns:
+        Report dict with "meta", one entry per stage under "stages" and peak
+        RSS (MB) under "memory"
+    """
+    from src.ingestion.parallel import read_documents
+    from src.ingestion.text_cache import TextCache, set_text_cache
+    from src.preprocessing.cleaner import clean_text
+    from src.extraction.dispatcher import extract_fields, has_extractor
+    from src.embeddings.cache import EmbeddingCache
+    from src.embeddings.model_registry import warmup
+    from src.classification.classifier import DocumentClassifier
+    from src.embeddings.embedder import DocumentEmbedder
+    from src.embeddings.vector_store import VectorStore
+    from src.retrieval.search import SemanticSearchEngine
+
+    manifest = load_corpus(corpus_dir)
+    expected = {doc["file_name"]: doc["expected_class"] for doc in manifest["documents"]}
+    paths = [Path(corpus_dir) / name for name in expected]
+    stages = {}
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as tmp:
+        tmp = Path(tmp)
+        previous_cache = set_text_cache(TextCache(tmp / "text"))
+        try:
+            start = time.perf_counter()
+            records = read_documents(paths, workers=workers)
+            seconds = time.perf_counter() - start
+        finally:
+            set_text_cache(previous_cache)
+        megabytes = sum(len(record["text"]) for record in records) / 1e6
+        stages["ingest"] = {
+            "documents": len(records),
+            "seconds": seconds,
+            "docs_per_sec": _rate(len(records), seconds),
+            "mb_per_sec": _rate(megabytes, seconds),
+            "unreadable": sum(not record["readable"] for record in records)
+        }
+        records = [record for record in records if record["readable"]]
+
+        cleaned, seconds = _best_of(lambda: [clean_text(record["text"]) for record in records], repeat)
+        stages["clean"] = {"documents": len(records), "seconds": seconds, "docs_per_sec": _rate(len(records), seconds)}
+
+        start = time.perf_counter()
+        warmup([EMBEDDING_MODEL_NAME])
+        stages["model_load"] = {"seconds": time.perf_counter() - start}
+
+        embedding_cache = EmbeddingCache(tmp / "embedding_cache.sqlite") if EMBEDDING_CACHE_ENABLED else None
+        classifier = DocumentClassifier(embedding_cache=embedding_cache)
+        start = time.perf_counter()
+        classes = [result["label"] for result in classifier.classify_batch([record["text"] for record in records])]
+        seconds = time.perf_counter() - start
+        correct = sum(cls == expected[record["file_name"]] for record, cls in zip(records, classes))
+        stages["classify"] = {
+            "documents": len(records),
+            "seconds": seconds,
+            "docs_per_sec": _rate(len(records), seconds),
+            "accuracy": correct / len(records) if records else 0.0
+        }
+
+        extracted = [(cls, text) for cls, text in zip(classes, cleaned) if has_extractor(cls)]
+        _, seconds = _best_of(lambda: [extract_fields(cls, text) for cls, text in extracted], repeat)
+        stages["extract"] = {"documents": len(extracted), "seconds": seconds, "docs_per_sec": _rate(len(extracted), seconds)}
+
+        embedder = DocumentEmbedder(embedding_cache=embedding_cache)
+        engine = SemanticSearchEngine(rebuild_index=True, embedder=embedder, result_cache_size=0)
+        engine.vector_store = VectorStore(embedding_dim=embedder.model.get_sentence_embedding_dimension(), index_path=tmp / "index" / "faiss_index")
+
+        chunks, seconds = _best_of(lambda: [
+            engine.chunker.chunk(record["text"], metadata={"file_name": record["file_name"], "class": cls})
+            for record, cls in zip(records, classes)
+        ], repeat)
+        n_chunks = sum(len(doc_chunks) for doc_chunks in chunks)
+        stages["chunk"] = {"chunks": n_chunks, "seconds": seconds, "chunks_per_sec": _rate(n_chunks, seconds)}
+
+        start = time.perf_counter()
+        embeddings = embedder.embed_array([text for doc_chunks in chunks for text in doc_chunks.texts()])
+        seconds = time.perf_counter() - start
+        stages["embed"] = {"chunks": n_chunks, "seconds": seconds, "chunks_per_sec": _rate(n_chunks, seconds)}
+
+        start = time.perf_counter()
+        engine.vector_store.add_chunks(chunks, embeddings=embeddings)
+        engine.vector_store.save()
+        seconds = time.perf_counter() - start
+        stages["index"] = {
+            "chunks": n_chunks,
+            "seconds": seconds,
+            "chunks_per_sec": _rate(n_chunks, seconds),
+            "index_type": engine.vector_store.get_stats().get("index_type")
+        }
+
+        latencies = []
+        for query in make_queries(queries, seed):
+            start = time.perf_counter()
+            if query["doc_class"]:
+                engine.search_by_class(query["query"], query["doc_class"], k=k)
+            else:
+                engine.search(query["query"], k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        stages["query"] = {
+            "queries": len(latencies),
+            "k": k,
+            "seconds": sum(latencies) / 1000,
+            "qps": _rate(len(latencies), sum(latencies) / 1000),
+            "latency_ms": latency_percentiles(latencies)
+        }
+        if embedding_cache is not None:
+            embedding_cache.close()
+
+    rss = peak_rss_mb()
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "model": EMBEDDING_MODEL_NAME,
+            "workers": workers,
+            "repeat": repeat,
+            "corpus": {name: manifest[name] for name in ("count", "formats", "max_pages", "seed")},
+            "corpus_megabytes": megabytes
+        },
+        "stages": stages,
+        "memory": {"peak_rss_mb": rss["self"], "peak_rss_children_mb": rss["children"]}
+    }
+
+
+def _metric(report: Dict, stage: str, metric: str) -> Optional[float]:
+    value = report.get("memory") if stage == "memory" else report.get("stages", {}).get(stage)
+    for part in metric.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare_reports(current: Dict, baseline: Dict, tolerance: float = BENCHMARK_TOLERANCE) -> List[Dict]:
+    """
+    Compare the METRICS of a report with a baseline report.
+
+    Args:
+        current: Report of this run
+        baseline: Stored report
+        tolerance: Relative change in the bad direction tolerated before a
+            metric counts as a regression
+
+    Returns:
+        One dict per metric present in both reports: metric, baseline,
+        current, change (relative, positive = better) and regression
+    """
+    rows = []
+    for (stage, metric), higher_is_better in METRICS.items():
+        old, new = _metric(baseline, stage, metric), _metric(current, stage, metric)
+        if old is None or new is None:
+            continue
+        if old == 0:
+            change = 0.0 if new == 0 else (1.0 if (new > 0) == higher_is_better else -1.0)
+        else:
+            change = (new - old) / abs(old) * (1 if higher_is_better else -1)
+        rows.append({
+            "metric": f"{stage}.{metric}",
+            "baseline": old,
+            "current": new,
+            "change": change,
+            "regression": change < -tolerance
+        })
+    return rows
+
+
+def prepare_corpus(count: int, max_pages: int, formats: Sequence[str], seed: int) -> Path:
+    """
+    Corpus directory for these parameters under BENCHMARK_DIR, generated on first use.
+    """
+    directory = BENCHMARK_DIR / f"corpus_{count}_{max_pages}_{seed}_{'-'.join(formats)}"
+    try:
+        if load_corpus(directory)["count"] == count:
+            return directory
+    except (OSError, ValueError, KeyError):
+        pass
+    print(f"Generating {count} documents in {directory}...")
+    generate_corpus(directory, count, formats=formats, max_pages=max_pages, seed=seed)
+    return directory
+
+
+def print_report(report: Dict) -> None:
+    stages = report["stages"]
+    print(f"{report['meta']['corpus']['count']} documents, {report['meta']['corpus_megabytes']:.1f} MB of text")
+    print(f"{'stage':<11} {'seconds':>8} {'rate':>16}")
+    for name, stage in stages.items():
+        if "docs_per_sec" in stage:
+            rate = f"{stage['docs_per_sec']:.1f} docs/s"
+        elif "chunks_per_sec" in stage:
+            rate = f"{stage['chunks_per_sec']:.1f} chunks/s"
+        elif "qps" in stage:
+            rate = f"{stage['qps']:.1f} queries/s"
+        else:
+            rate = ""
+        print(f"{name:<11} {stage['seconds']:>8.2f} {rate:>16}")
+    latency = stages["query"]["latency_ms"]
+    print(f"Classification accuracy: {stages['classify']['accuracy']:.1%}")
+    print(f"Query latency ms: p50 {latency['p50']:.1f}  p90 {latency['p90']:.1f}  p99 {latency['p99']:.1f}")
+    print(f"Peak RSS: {report['memory']['peak_rss_mb']:.0f} MB (ingestion workers {report['memory']['peak_rss_children_mb']:.0f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on a synthetic corpus")
+    parser.add_argument("--corpus", type=str, default=None, help="existing corpus directory (default: generate one under BENCHMARK_DIR)")
+    parser.add_argument("--count", type=int, default=200, help="documents to generate")
+    parser.add_argument("--pages", type=int, default=3, help="maximum pages per generated document")
+    parser.add_argument("--formats", type=str, default=",".join(FORMATS), help="comma-separated: txt,docx,pdf")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=INGESTION_WORKERS, help="ingestion worker processes")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="runs of the clean/extract/chunk stages (best is reported)")
+    parser.add_argument("--output", type=str, default=str(BENCHMARK_DIR / "report.json"), help="where to write the JSON report")
+    parser.add_argument("--baseline", type=str, default=str(BENCHMARK_BASELINE), help="baseline report to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=BENCHMARK_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on a regression")
+    args = parser.parse_args()
+
+    formats = args.formats.split(",")
+    corpus_dir = Path(args.corpus) if args.corpus else prepare_corpus(args.count, args.pages, formats, args.seed)
+    report = run_suite(corpus_dir, workers=args.workers, queries=args.queries, seed=args.seed, repeat=args.repeat)
+    print_report(report)
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+    if baseline_path.exists() and not args.save_baseline:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("corpus") != report["meta"]["corpus"]:
+            print("Warning: the baseline was measured on a different corpus")
+        report["comparison"] = compare_reports(report, baseline, args.tolerance)
+        print(f"\nAgainst baseline {baseline_path} ({baseline.get('meta', {}).get('timestamp', '?')}):")
+        for row in report["comparison"]:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{row['metric']:<28} {row['baseline']:>12.2f} -> {row['current']:>12.2f} ({row['change']:+.1%}){flag}")
+        regressions = [row for row in report["comparison"] if row["regression"]]
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
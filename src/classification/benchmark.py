@@ -0,0 +1,110 @@
+"""
+Classification benchmark: latency and agreement of the budgeted semantic
+classification step against classifying from every line of the document.
+
+Usage:
+    python -m src.classification.benchmark                # documents in INPUT_DOCS_DIR
+    python -m src.classification.benchmark --synthetic 60 --pages 50
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+from src.classification.classifier import DocumentClassifier
+from src.embeddings.cache import EmbeddingCache
+
+
+def _run(classifier: DocumentClassifier, texts: List[str]):
+    results, latencies = [], []
+    for text in texts:
+        start = time.perf_counter()
+        results.append(classifier._classify_semantic([text])[0])
+        latencies.append(time.perf_counter() - start)
+    return results, np.array(latencies) * 1000
+
+
+def benchmark_budget(texts: List[str], **budget) -> Dict:
+    """
+    Classify texts with the semantic step under the configured budget (or
+    the one given) and with no budget, each with its own empty embedding cache.
+
+    Args:
+        texts: Document texts
+        **budget: Optional max_lines / max_tokens / decisive_margin overrides
+
+    Returns:
+        Dict with agreement with the full-document labels and per-document
+        latency stats for both runs
+    """
+    report = {"documents": len(texts)}
+    labels = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = (
+            ("budgeted", budget),
+            ("full", {"max_lines": None, "max_tokens": None, "decisive_margin": None})
+        )
+        for name, options in runs:
+            cache = EmbeddingCache(Path(tmp) / f"{name}.sqlite")
+            classifier = DocumentClassifier(embedding_cache=cache, **options)
+            results, latencies = _run(classifier, texts)
+            cache.close()
+            labels[name] = [r["label"] for r in results]
+            report[name] = {
+                "lines_per_doc": float(np.mean([len(classifier._select_lines(text)) for text in texts])),
+                "latency_ms_p50": float(np.percentile(latencies, 50)),
+                "latency_ms_p99": float(np.percentile(latencies, 99)),
+                "latency_ms_max": float(latencies.max())
+            }
+    agree = sum(a == b for a, b in zip(labels["budgeted"], labels["full"]))
+    report["agreement"] = agree / len(texts) if texts else 1.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare budgeted and full-document semantic classification")
+    parser.add_argument("--synthetic", type=int, default=None, help="benchmark N generated documents instead of INPUT_DOCS_DIR")
+    parser.add_argument("--pages", type=int, default=20, help="pages per generated document")
+    parser.add_argument("--max-lines", type=int, default=None)
+    parser.add_argument("--max-tokens", type=int, default=None)
+    parser.add_argument("--margin", type=float, default=None)
+    parser.add_argument("--output", type=str, default=None, help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from src.extraction.benchmark import synthetic_documents
+        # Number the lines so repeated filler doesn't collapse into a few distinct lines
+        texts = [
+            "\n".join(f"{line} {n}" if line.strip() else line for n, line in enumerate(text.split("\n")))
+            for _, text in synthetic_documents(args.synthetic, args.pages)
+        ]
+    else:
+        from src.ingestion.loader import list_documents
+        from src.ingestion.parallel import read_documents
+        texts = [doc["text"] for doc in read_documents(list_documents()) if doc["readable"]]
+
+    budget = {}
+    if args.max_lines is not None:
+        budget["max_lines"] = args.max_lines
+    if args.max_tokens is not None:
+        budget["max_tokens"] = args.max_tokens
+    if args.margin is not None:
+        budget["decisive_margin"] = args.margin
+
+    report = benchmark_budget(texts, **budget)
+    print(f"{report['documents']} documents, agreement with full-document labels: {report['agreement']:.1%}")
+    for name in ("budgeted", "full"):
+        r = report[name]
+        print(f"{name:<9} lines/doc {r['lines_per_doc']:>8.1f}  p50 {r['latency_ms_p50']:>8.1f} ms  "
+              f"p99 {r['latency_ms_p99']:>8.1f} ms  max {r['latency_ms_max']:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
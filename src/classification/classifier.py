@@ -1,4 +1,11 @@
-from sentence_transformers import SentenceTransformer, util
+from src.embeddings.cache import get_embedding_cache
+from src.embeddings.model_registry import get_model, model_key
+from src.classification.keyword_matcher import KeywordMatcher
+from src.instrumentation import count, timed
+from src.config import (
+    EMBEDDING_BACKEND, CLASSIFY_MAX_LINES, CLASSIFY_MAX_TOKENS, CLASSIFY_HEAD_LINES,
+    CLASSIFY_ROUND_LINES, CLASSIFY_DECISIVE_MARGIN
+)
 
 # Document label descriptions (for semantic similarity)
 DOC_LABELS = {
@@ -8,49 +15,69 @@ DOC_LABELS = {
     "Other": ["Document", "General", "Information", "Content"],
 }
 
+# Words of the label descriptions; lines containing them are sampled first
+LABEL_VOCABULARY = {word for descs in DOC_LABELS.values() for desc in descs for word in desc.lower().split()}
+
+# Result for documents the heuristics can't place when no model is used
+UNDECIDED_RESULT = {"label": "Other", "confidence": 0.0}
+
 # Lowered threshold for semantic similarity
 CLASSIFICATION_THRESHOLD = 0.15
 
 # Keywords heuristic for resumes
 RESUME_KEYWORDS = ["email", "phone", "experience", "skills", "curriculum vitae", "cv"]
 
+# Titles that give extra confidence a document is a resume
+RESUME_TITLE_KEYWORDS = ["resume", "curriculum vitae", "cv"]
+
+# Words that indicate a document is NOT a resume (assessment, task, requirements, etc.)
+NOT_RESUME_KEYWORDS = ["assessment", "task", "requirement", "objective:", "build", "implement", "deliverable", "technical"]
+
 # Keywords heuristic for utility bills
 UTILITY_BILL_KEYWORDS = ["account number", "usage", "kwh", "amount due", "billing date", "utility", "meter", "provider"]
 
 # Cover letter indicators
 COVER_LETTER_KEYWORDS = ["cover letter", "dear ", "hiring manager", "hiring team", "sincerely", "regards", "position", "apply for"]
 
-def is_likely_cover_letter(text: str) -> bool:
+# Built once: finds the keywords of every list in a single pass over a document
+KEYWORD_MATCHER = KeywordMatcher({
+    "resume": RESUME_KEYWORDS,
+    "resume_title": RESUME_TITLE_KEYWORDS,
+    "not_resume": NOT_RESUME_KEYWORDS,
+    "utility_bill": UTILITY_BILL_KEYWORDS,
+    "cover_letter": COVER_LETTER_KEYWORDS,
+})
+
+def is_likely_cover_letter(text: str, hits: dict = None) -> bool:
     """
     Detect if document is a cover letter, not a resume.
     Cover letters should be classified as 'Other'.
+    hits: optional KEYWORD_MATCHER.hits(text), to avoid scanning the text again
     """
-    text_lower = text.lower()
+    hits = hits if hits is not None else KEYWORD_MATCHER.hits(text)
     # Check for cover letter indicators
-    cover_letter_count = sum(1 for k in COVER_LETTER_KEYWORDS if k in text_lower)
-    return cover_letter_count >= 2  # Need at least 2 indicators
+    return len(hits["cover_letter"]) >= 2  # Need at least 2 indicators
 
-def is_likely_resume(text: str) -> bool:
+def is_likely_resume(text: str, hits: dict = None) -> bool:
     """
     Heuristic to detect resumes based on presence of keywords.
     Avoids false positives with assessment/evaluation documents and cover letters.
+    hits: optional KEYWORD_MATCHER.hits(text), to avoid scanning the text again
     """
-    text_lower = text.lower()
+    hits = hits if hits is not None else KEYWORD_MATCHER.hits(text)
     
     # First check if it's a cover letter - if so, it's NOT a resume
-    if is_likely_cover_letter(text):
+    if is_likely_cover_letter(text, hits):
         return False
     
-    # Words that indicate this is NOT a resume (assessment, task, requirements, etc.)
-    not_resume_words = ["assessment", "task", "requirement", "objective:", "build", "implement", "deliverable", "technical"]
-    if any(word in text_lower for word in not_resume_words):
+    if hits["not_resume"]:
         # Even if it has resume keywords, if it's clearly an assessment/task doc, it's not a resume
         return False
     
     # Need at least 3 resume keywords (email, phone, experience, skills, cv, etc.)
-    keyword_count = sum(1 for k in RESUME_KEYWORDS if k in text_lower)
+    keyword_count = len(hits["resume"])
     # Specifically look for "resume" or "cv" or "curriculum vitae" for extra confidence
-    has_resume_title = any(term in text_lower for term in ["resume", "curriculum vitae", "cv"])
+    has_resume_title = bool(hits["resume_title"])
     
     # If has resume title + 2 other keywords = resume
     # Or if has 3+ keywords without title = resume
@@ -61,84 +88,253 @@ def is_likely_resume(text: str) -> bool:
     
     return False
 
-def is_likely_utility_bill(text: str) -> bool:
+def is_likely_utility_bill(text: str, hits: dict = None) -> bool:
     """
     Simple heuristic to detect utility bills based on presence of key words
+    hits: optional KEYWORD_MATCHER.hits(text), to avoid scanning the text again
     """
-    text_lower = text.lower()
+    hits = hits if hits is not None else KEYWORD_MATCHER.hits(text)
     # Need at least 2 utility bill keywords
-    keyword_count = sum(1 for k in UTILITY_BILL_KEYWORDS if k in text_lower)
-    return keyword_count >= 2
+    return len(hits["utility_bill"]) >= 2
 
 class DocumentClassifier:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_cache=None,
+        max_lines: int = CLASSIFY_MAX_LINES,
+        max_tokens: int = CLASSIFY_MAX_TOKENS,
+        decisive_margin: float = CLASSIFY_DECISIVE_MARGIN,
+        use_model: bool = True,
+        backend: str = EMBEDDING_BACKEND
+    ):
         """
         Initializes the classifier:
-        - Loads embedding model
+        - Gets the embedding model from the shared model registry
         - Precomputes label embeddings for efficiency
+        - Uses the shared on-disk embedding cache unless one is passed in
+        - Bounds the semantic step to max_lines lines / max_tokens tokens per
+          document, stopping early at decisive_margin (None = no limit)
+        - Runs the model on the given inference backend (torch, onnx, onnx-int8)
+        - With use_model=False, loads nothing (not even torch) and only runs
+          the heuristics; documents they can't place are labelled Other
+          with confidence 0.0
         """
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.backend = backend
+        self.cache_name = model_key(model_name, backend)
+        self.max_lines = max_lines
+        self.max_tokens = max_tokens
+        self.decisive_margin = decisive_margin
 
         # Flatten labels for embeddings
         self.labels = list(DOC_LABELS.keys())
         self.label_texts = [desc for desc_list in DOC_LABELS.values() for desc in desc_list]
-        self.label_embeddings = self.model.encode(self.label_texts, convert_to_tensor=True)
 
         # Map each embedding index back to the original label
         self.label_map = []
         for label, descs in DOC_LABELS.items():
             self.label_map.extend([label] * len(descs))
 
-    def classify(self, text: str) -> dict:
+        if not use_model:
+            self.model = None
+            self.embedding_cache = None
+            return
+
+        import torch
+        self.model = get_model(model_name, backend)
+        self.embedding_cache = embedding_cache if embedding_cache is not None else get_embedding_cache()
+        self.label_embeddings = self.model.encode(self.label_texts, convert_to_tensor=True)
+        self._label_index = torch.tensor([self.labels.index(label) for label in self.label_map])
+
+    def _classify_heuristic(self, text: str):
         """
-        Classify a document into one of the labels.
-        Returns: {"label": str, "confidence": float}
-        Always returns one of: Invoice, Resume, Utility Bill, or Other
+        Empty-text and keyword heuristics.
+        Returns a result dict, or None if the document needs semantic classification.
         """
-
         if not text or len(text.strip()) == 0:
             return {"label": "Other", "confidence": 0.0}
 
+        # One pass over the text finds the keywords for all heuristics below
+        hits = KEYWORD_MATCHER.hits(text)
+
         # Step 0: Check for cover letters FIRST - they should be classified as "Other"
-        if is_likely_cover_letter(text):
+        if is_likely_cover_letter(text, hits):
             return {"label": "Other", "confidence": 0.75}  # cover letter is a type of "Other"
 
         # Step 1: Heuristic check for resume
-        if is_likely_resume(text):
+        if is_likely_resume(text, hits):
             return {"label": "Resume", "confidence": 0.95}  # high confidence for heuristic match
 
         # Step 1b: Heuristic check for utility bill
-        if is_likely_utility_bill(text):
+        if is_likely_utility_bill(text, hits):
             return {"label": "Utility Bill", "confidence": 0.85}  # high confidence for heuristic match
 
-        # Step 2: Semantic similarity for other document types
+        return None
+
+    def _semantic_chunks(self, text: str) -> list:
+        """
+        Split a document into the lowercased, non-empty lines that get embedded.
+        """
         text_lower = text.lower()
         chunks = [line.strip() for line in text_lower.split("\n") if line.strip()]
         if not chunks:
             chunks = [text_lower]
+        return chunks
+
+    def _select_lines(self, text: str) -> list:
+        """
+        Lines to embed, in encoding order, within the classification budget:
+        distinct lines only, the first page (CLASSIFY_HEAD_LINES) first, then
+        the most informative lines (most label words, then longest).
+        """
+        lines = list(dict.fromkeys(self._semantic_chunks(text)))  # repeated headers/footers add nothing
+        if self.max_lines is None and self.max_tokens is None:
+            return lines
+
+        head = lines[:CLASSIFY_HEAD_LINES]
+        tail = sorted(
+            lines[CLASSIFY_HEAD_LINES:],
+            key=lambda line: (len(LABEL_VOCABULARY.intersection(line.split())), min(len(line.split()), 16)),
+            reverse=True
+        )
+
+        selected = []
+        tokens = 0
+        for line in head + tail:
+            if self.max_lines is not None and len(selected) >= self.max_lines:
+                break
+            line_tokens = len(line.split())
+            if self.max_tokens is not None and selected and tokens + line_tokens > self.max_tokens:
+                break
+            selected.append(line)
+            tokens += line_tokens
+        return selected
+
+    def _encode(self, chunks: list, batch_size: int = 32):
+        """
+        Encode lines, going through the embedding cache when one is configured.
+        """
+        import torch
+        if self.embedding_cache is None:
+            return self.model.encode(chunks, batch_size=batch_size, convert_to_tensor=True)
+        embeddings = self.embedding_cache.encode(self.model, self.cache_name, chunks, batch_size=batch_size)
+        return torch.as_tensor(embeddings, device=self.label_embeddings.device)
+
+    def _label_from_similarities(self, best_similarities) -> dict:
+        """
+        Pick the label from the best similarity of each label text over the lines seen.
+        """
+        max_sim_value = best_similarities.max()
+        predicted_label = self.label_map[int(best_similarities.argmax())]
 
+        # Always return the best match (no threshold rejection)
+        # If similarity is very low, default to "Other"
+        if max_sim_value < 0.05:
+            return {"label": "Other", "confidence": float(max_sim_value)}
+
+        return {"label": predicted_label, "confidence": float(max_sim_value)}
+
+    def _is_decisive(self, best_similarities) -> bool:
+        """
+        Whether the best label leads the runner-up by at least decisive_margin.
+        """
+        if self.decisive_margin is None:
+            return False
+        import torch
+        per_label = torch.full((len(self.labels),), -1.0, device=best_similarities.device)
+        per_label = per_label.scatter_reduce(0, self._label_index.to(best_similarities.device), best_similarities, reduce="amax")
+        top = torch.topk(per_label, 2).values
+        return float(top[0] - top[1]) >= self.decisive_margin
+
+    def _classify_semantic(self, texts: list, batch_size: int = 32) -> list:
+        """
+        Semantic similarity step for several documents: their selected lines are
+        encoded round by round (CLASSIFY_ROUND_LINES per document, all documents
+        in one encode call), and a document leaves once its label is decisive.
+        """
+        import torch
+        from sentence_transformers import util
+        lines = [self._select_lines(text) for text in texts]
+        best = [None] * len(texts)
+        positions = [0] * len(texts)
+        active = list(range(len(texts)))
+
+        while active:
+            # Next round of lines for every document still being classified
+            round_lines = []
+            spans = []
+            for i in active:
+                chunk = lines[i][positions[i]:positions[i] + CLASSIFY_ROUND_LINES]
+                spans.append((i, len(round_lines), len(round_lines) + len(chunk)))
+                round_lines.extend(chunk)
+                positions[i] += len(chunk)
+
+            # Cosine similarity between lines and all label embeddings
+            similarities = util.cos_sim(self._encode(round_lines, batch_size=batch_size), self.label_embeddings)
+
+            still_active = []
+            for i, start, end in spans:
+                round_best = similarities[start:end].max(dim=0).values
+                best[i] = round_best if best[i] is None else torch.maximum(best[i], round_best)
+                if positions[i] < len(lines[i]) and not self._is_decisive(best[i]):
+                    still_active.append(i)
+            active = still_active
+
+        return [self._label_from_similarities(b) for b in best]
+
+    def classify(self, text: str) -> dict:
+        """
+        Classify a document into one of the labels.
+        Returns: {"label": str, "confidence": float}
+        Always returns one of: Invoice, Resume, Utility Bill, or Other
+        """
+        with timed("classify", path="heuristic"):
+            heuristic = self._classify_heuristic(text)
+        if heuristic is not None:
+            count("classified_documents", path="heuristic")
+            return heuristic
+        if self.model is None:
+            count("classified_documents", path="undecided")
+            return dict(UNDECIDED_RESULT)
+
+        # Step 2: Semantic similarity for other document types
+        count("classified_documents", path="embedding")
         try:
-            # Encode chunks
-            chunk_embeddings = self.model.encode(chunks, convert_to_tensor=True)
-
-            # Cosine similarity between chunks and all label embeddings
-            similarities = util.cos_sim(chunk_embeddings, self.label_embeddings)
-
-            # Max similarity across all chunks and labels
-            max_sim_value = similarities.max()
-            max_idx_flat = similarities.argmax().item() if hasattr(similarities.argmax(), 'item') else int(similarities.argmax())
-            
-            # Ensure the index is valid
-            if max_idx_flat < 0 or max_idx_flat >= len(self.label_map):
-                return {"label": "Other", "confidence": 0.0}
-            
-            predicted_label = self.label_map[max_idx_flat]
-
-            # Always return the best match (no threshold rejection)
-            # If similarity is very low, default to "Other"
-            if max_sim_value < 0.05:
-                return {"label": "Other", "confidence": float(max_sim_value)}
-
-            return {"label": predicted_label, "confidence": float(max_sim_value)}
+            with timed("classify", path="embedding"):
+                return self._classify_semantic([text])[0]
         except Exception:
             return {"label": "Other", "confidence": 0.0}
+
+    def classify_batch(self, texts: list, batch_size: int = 64) -> list:
+        """
+        Classify many documents at once. Results are identical to calling
+        classify() on each text, but all documents that reach the semantic
+        step share their encode calls.
+        Returns: list of {"label": str, "confidence": float}, in input order
+        """
+        with timed("classify", items=len(texts), path="heuristic"):
+            results = [self._classify_heuristic(text) for text in texts]
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        count("classified_documents", len(texts) - len(pending), path="heuristic")
+        if not pending:
+            return results
+        if self.model is None:
+            count("classified_documents", len(pending), path="undecided")
+            for i in pending:
+                results[i] = dict(UNDECIDED_RESULT)
+            return results
+
+        try:
+            with timed("classify", items=len(pending), path="embedding"):
+                semantic = self._classify_semantic([texts[i] for i in pending], batch_size=batch_size)
+            count("classified_documents", len(pending), path="embedding")
+        except Exception:
+            # Fall back to per-document classification so one bad input doesn't fail the batch
+            semantic = [self.classify(texts[i]) for i in pending]
+
+        for i, result in zip(pending, semantic):
+            results[i] = result
+
+        return results
@@ -0,0 +1,81 @@
+"""
+Keyword matcher: finds which of many keywords occur in a text in one pass.
+
+The classifier heuristics check several keyword lists against the same
+document. The matcher is built once from all of them, lowercases the text
+once and reports the keywords present per list. With pyahocorasick
+installed, the search is a single Aho-Corasick scan. Without it, each
+distinct keyword is checked once with a substring test.
+"""
+
+from typing import Dict, Iterable, Set
+
+try:
+    import ahocorasick
+except ImportError:  # optional dependency
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """
+    Multi-keyword matcher over named keyword lists (case-insensitive, substring semantics).
+    """
+
+    def __init__(self, keyword_lists: Dict[str, Iterable[str]], use_automaton: bool = True, max_repeats: int = 256):
+        """
+        Args:
+            keyword_lists: Name -> keywords, e.g. {"resume": RESUME_KEYWORDS, ...}
+            use_automaton: Use an Aho-Corasick automaton when pyahocorasick is installed
+            max_repeats: Repeated hits tolerated during the automaton scan before
+                switching to substring tests for the keywords not yet seen
+        """
+        self.max_repeats = max_repeats
+        self.keyword_lists = {name: tuple(dict.fromkeys(k.lower() for k in keywords)) for name, keywords in keyword_lists.items()}
+        self.keywords = tuple(dict.fromkeys(k for keywords in self.keyword_lists.values() for k in keywords))
+
+        self._automaton = None
+        if use_automaton and ahocorasick is not None and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def find(self, text_lower: str) -> Set[str]:
+        """
+        Keywords occurring in an already lowercased text.
+        """
+        if self._automaton is None:
+            return {keyword for keyword in self.keywords if keyword in text_lower}
+
+        found = set()
+        repeats = 0
+        for _, keyword in self._automaton.iter(text_lower):
+            if keyword in found:
+                repeats += 1
+                if repeats > self.max_repeats:
+                    # Keyword-dense text: testing the keywords not seen yet is cheaper
+                    # than iterating over every further occurrence
+                    found.update(k for k in self.keywords if k not in found and k in text_lower)
+                    break
+                continue
+            found.add(keyword)
+            if len(found) == len(self.keywords):
+                break  # every keyword seen, no need to scan further
+        return found
+
+    def hits(self, text: str) -> Dict[str, Set[str]]:
+        """
+        Keywords of each list that occur in text.
+
+        Returns:
+            Dict mapping each list name to the set of its keywords found
+        """
+        found = self.find(text.lower())
+        return {name: found.intersection(keywords) for name, keywords in self.keyword_lists.items()}
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """
+        Number of distinct keywords of each list that occur in text.
+        """
+        return {name: len(hits) for name, hits in self.hits(text).items()}
@@ -11,6 +11,49 @@ PROCESSED_TEXT_DIR = DATA_DIR / "processed"
 
 # Output
 OUTPUT_FILE = BASE_DIR / "output.json"
+OUTPUT_JSONL_FILE = BASE_DIR / "output.jsonl"  # streaming mode, one result per line
+
+# Streaming pipeline: documents per classification/indexing batch and
+# maximum items buffered between two stages
+STREAM_BATCH_SIZE = 32
+STREAM_QUEUE_SIZE = 64
+
+# Incremental runs: manifest of processed files and their results.
+# Bump PIPELINE_VERSION when classification/extraction logic changes so
+# previously processed files are picked up again.
+INCREMENTAL = False
+MANIFEST_PATH = DATA_DIR / "manifest.json"
+PIPELINE_VERSION = "1"
+
+# Ingestion: worker processes for parsing (None = one per CPU core) and
+# number of files handed to a worker per submission
+INGESTION_WORKERS = None
+INGESTION_CHUNKSIZE = 8
+
+# PDFs are first read only up to this many pages, which is enough to classify
+# them; the remaining pages are read only for documents whose fields are
+# extracted or that get indexed (None = always read whole documents up front)
+CLASSIFY_MAX_PAGES = 3
+
+# PDF text extraction: backends tried in order until one yields text, and time
+# budgets in seconds per page and per file (None = unlimited). A worker still
+# busy with a batch PDF_KILL_GRACE seconds past its files' budgets is assumed
+# stuck in native code and killed.
+PDF_BACKENDS = ("pypdf2", "pdfplumber")
+PDF_PAGE_TIMEOUT = 10
+PDF_FILE_TIMEOUT = 60
+PDF_KILL_GRACE = 30
+
+# Try the backend with the lowest measured seconds per page first, once each
+# has parsed PDF_BACKEND_MIN_PAGES pages (off: the text then depends on timings)
+PDF_BACKEND_AUTO_ORDER = False
+PDF_BACKEND_MIN_PAGES = 50
+
+# Extracted-text cache: PDF/DOCX text stored gzip-compressed in
+# PROCESSED_TEXT_DIR, keyed by file content hash. Bump TEXT_EXTRACTOR_VERSION
+# when text extraction changes so cached text is extracted again.
+TEXT_CACHE_ENABLED = True
+TEXT_EXTRACTOR_VERSION = "1"
 
 # Classification labels and descriptions
 DOC_LABELS = {
@@ -23,18 +66,122 @@ DOC_LABELS = {
 # Classification: Always returns one of Invoice, Resume, Utility Bill, or Other
 # Files that cannot be read are marked as Unclassifiable in main pipeline
 
+# Semantic classification budget: a document is classified from at most
+# CLASSIFY_MAX_LINES distinct lines and CLASSIFY_MAX_TOKENS (whitespace-separated)
+# tokens, taking its first CLASSIFY_HEAD_LINES lines and then the most
+# informative ones. Lines are encoded CLASSIFY_ROUND_LINES at a time and
+# encoding stops once the best label leads the runner-up by
+# CLASSIFY_DECISIVE_MARGIN. None disables a limit (full-document classification).
+CLASSIFY_MAX_LINES = 256
+CLASSIFY_MAX_TOKENS = 4096
+CLASSIFY_HEAD_LINES = 40
+CLASSIFY_ROUND_LINES = 64
+CLASSIFY_DECISIVE_MARGIN = 0.15
+
 # Embedding model (used for classification + retrieval)
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Inference backend of the embedding model: "torch" (SentenceTransformer,
+# fp32), "onnx" (exported to ONNX once, into ONNX_MODEL_DIR, and run with
+# onnxruntime) or "onnx-int8" (ONNX with int8-quantized weights, fastest on
+# CPU). Compare backends with python -m src.embeddings.backend_benchmark.
+# Embeddings are cached per backend; rebuild the search index after switching.
+EMBEDDING_BACKEND = "torch"
+ONNX_MODEL_DIR = DATA_DIR / "onnx_models"
+ONNX_INTRA_OP_THREADS = None  # threads within an operator (None = one per physical core)
+ONNX_INTER_OP_THREADS = 1     # operators run concurrently (1 = sequential execution)
+
+# Persistent embedding cache shared by classification and retrieval,
+# keyed by (model name, text hash) with LRU eviction past the entry cap
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_PATH = DATA_DIR / "embedding_cache.sqlite"
+EMBEDDING_CACHE_MAX_ENTRIES = 1_000_000
+
+# Embedding scheduler: chunks are sorted by length and grouped into batches of
+# at most EMBED_TOKEN_BUDGET padded tokens (batch size x longest chunk) and
+# EMBED_MAX_BATCH_SIZE chunks. Lengths are estimated from characters unless
+# EMBED_EXACT_LENGTHS (tokenizes every chunk an extra time).
+EMBED_TOKEN_BUDGET = 16384
+EMBED_MAX_BATCH_SIZE = 256
+EMBED_CHARS_PER_TOKEN = 4.0
+EMBED_EXACT_LENGTHS = False
+# Streaming indexing embeds once this many characters of text are pending
+EMBED_FLUSH_CHARS = 2_000_000
+
 # Chunking config for retrieval
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 100
+# "chars": chunks of CHUNK_SIZE characters; "tokens": chunks sized to the
+# embedding model's max sequence length, overlapping by CHUNK_TOKEN_OVERLAP tokens
+CHUNK_MODE = "chars"
+CHUNK_TOKEN_OVERLAP = 32
 
 # FAISS
 FAISS_INDEX_PATH = BASE_DIR / "data" / "faiss_index"
 
+# FAISS index type: "flat" (exact), "ivf_flat", "ivf_pq", "hnsw", or "auto"
+# to pick one from the number of stored chunks. IVF indexes are trained on
+# the stored vectors once at least FAISS_MIN_TRAIN_SIZE chunks exist; until
+# then (and below the auto thresholds) an exact flat index is used.
+FAISS_INDEX_TYPE = "auto"
+FAISS_AUTO_IVF_THRESHOLD = 50_000
+FAISS_AUTO_PQ_THRESHOLD = 2_000_000
+FAISS_MIN_TRAIN_SIZE = 1_000
+FAISS_NLIST = None           # IVF cells (None = ~4 * sqrt(ntotal))
+FAISS_RETRAIN_GROWTH = 2.0   # retrain ivf_flat once the chosen nlist exceeds this multiple of the trained one
+FAISS_NPROBE = 16            # IVF cells visited per query
+FAISS_PQ_M = 48              # PQ sub-quantizers (must divide the embedding dim)
+FAISS_HNSW_M = 32            # HNSW graph degree
+FAISS_HNSW_EF_CONSTRUCTION = 200
+FAISS_EF_SEARCH = 128        # HNSW candidate list size per query
+FAISS_FILTER_EXACT_MAX = 20_000  # filtered searches over fewer matching chunks scan them exactly
+
+# Storage precision of stored vectors: "float32", "float16" (half the memory,
+# near-identical recall) or "int8" (scalar quantization, a quarter of the
+# memory; trained once FAISS_MIN_TRAIN_SIZE chunks exist). Not used by ivf_pq.
+VECTOR_STORE_PRECISION = "float32"
+
+# Removed chunks are tombstoned; the store is compacted on save once this
+# fraction of its rows has been removed
+VECTOR_STORE_COMPACT_RATIO = 0.2
+
 TOP_K_RESULTS = 5
 
+# In-memory LRU caches in front of the search engine: query -> embedding and
+# query -> results (results are dropped whenever the index changes); 0 disables
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+SEARCH_RESULT_CACHE_SIZE = 1024
+
+# Search server (python -m src.retrieval.server): requests arriving within
+# SEARCH_BATCH_WINDOW_MS of each other are answered as one batch of at most
+# SEARCH_MAX_BATCH requests (one query encode, one FAISS search per filter).
+# Latency percentiles cover the last SEARCH_LATENCY_WINDOW requests.
+SEARCH_SERVER_HOST = "127.0.0.1"
+SEARCH_SERVER_PORT = 8765
+SEARCH_BATCH_WINDOW_MS = 5
+SEARCH_MAX_BATCH = 64
+SEARCH_LATENCY_WINDOW = 10000
+
+# Instrumentation: timers and counters per pipeline stage (read, complete,
+# classify, extract, embed, index, search), summarized after a run and
+# written with `python -m src.main --metrics PATH` (.json or Prometheus text),
+# listing the SLOW_DOCUMENTS slowest documents per stage. Stages named in
+# PROFILE_STAGES are profiled with PROFILER ("cprofile" or "sampling", one
+# stack sample every PROFILE_SAMPLE_INTERVAL seconds) into PROFILE_DIR.
+INSTRUMENTATION_ENABLED = True
+SLOW_DOCUMENTS = 10
+PROFILE_STAGES = ()
+PROFILER = "cprofile"
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_DIR = DATA_DIR / "profiles"
+
+# Benchmark suite (python -m src.benchmarks.suite): generated corpora and
+# reports go under BENCHMARK_DIR. Runs are compared with BENCHMARK_BASELINE;
+# a metric more than BENCHMARK_TOLERANCE worse than it counts as a regression.
+BENCHMARK_DIR = DATA_DIR / "benchmarks"
+BENCHMARK_BASELINE = BENCHMARK_DIR / "baseline.json"
+BENCHMARK_TOLERANCE = 0.10
+
 # Regex assumptions (can be refined later)
 CURRENCY_REGEX = r"(?:USD|Rs\.?|₹|\$)?\s?\d+(?:,\d{3})*(?:\.\d{2})?"
 EMAIL_REGEX = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
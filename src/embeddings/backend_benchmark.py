@@ -0,0 +1,178 @@
+"""
+Backend benchmark module: Speed and embedding agreement of the inference backends.
+
+Embeds the chunks of a corpus with each backend (torch, onnx, onnx-int8; no
+embedding cache, scheduled batches as in indexing) and compares every backend
+with torch:
+- cosine: similarity of each chunk's embedding to its torch embedding
+- topk_overlap: for sample query chunks, the share of torch's k nearest
+  chunks that the backend's own embeddings also rank in the top k
+- label_agreement: documents given the same label by the semantic
+  classification step
+
+Usage:
+    python -m src.embeddings.backend_benchmark                      # documents in INPUT_DOCS_DIR
+    python -m src.embeddings.backend_benchmark --synthetic 60 --intra-op 4 --output report.json
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from src.config import EMBEDDING_MODEL_NAME, ONNX_INTRA_OP_THREADS, ONNX_INTER_OP_THREADS
+from src.embeddings.cache import EmbeddingCache
+from src.embeddings.chunker import TextChunker
+from src.embeddings.model_registry import BACKENDS, get_model
+from src.embeddings.scheduler import EmbeddingScheduler
+
+
+def _load(model_name: str, backend: str, intra_op_threads: Optional[int], inter_op_threads: Optional[int]):
+    if backend == "torch":
+        return get_model(model_name, "torch")
+    from src.embeddings.onnx_backend import load_onnx_model
+    return load_onnx_model(model_name, quantized=backend == "onnx-int8",
+                           intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads)
+
+
+def _normalized(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+
+def _neighbours(embeddings: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k nearest chunks (cosine) of each query chunk, excluding itself.
+    """
+    similarities = embeddings[queries] @ embeddings.T
+    similarities[np.arange(len(queries)), queries] = -np.inf
+    return np.argsort(-similarities, axis=1, kind="stable")[:, :k]
+
+
+def compare_backends(
+    documents: List[str],
+    model_name: str = EMBEDDING_MODEL_NAME,
+    backends: Sequence[str] = BACKENDS,
+    k: int = 10,
+    queries: int = 200,
+    repeat: int = 1,
+    intra_op_threads: Optional[int] = ONNX_INTRA_OP_THREADS,
+    inter_op_threads: Optional[int] = ONNX_INTER_OP_THREADS,
+    seed: int = 0
+) -> Dict:
+    """
+    Embed the chunks of documents with each backend and compare them with torch.
+
+    Args:
+        documents: Document texts
+        model_name: Embedding model
+        backends: Backends to run (torch is always included, as the reference)
+        k: Neighbours compared per query chunk
+        queries: Number of sampled query chunks
+        repeat: Encoding runs per backend (best run is reported)
+        intra_op_threads: onnxruntime threads within an operator
+        inter_op_threads: onnxruntime threads across operators
+        seed: Seed for sampling query chunks
+
+    Returns:
+        Dict with per-backend load time, chunks/sec, speedup over torch and
+        agreement with torch
+    """
+    from src.classification.classifier import DocumentClassifier
+
+    backends = ["torch"] + [backend for backend in backends if backend != "torch"]
+    texts = [text for document in documents for text in TextChunker().chunk(document).texts()]
+    sample = np.array(sorted(random.Random(seed).sample(range(len(texts)), min(queries, len(texts)))), dtype=np.int64)
+    k = min(k, max(len(texts) - 1, 1))
+
+    report = {"documents": len(documents), "chunks": len(texts), "queries": len(sample), "k": k}
+    reference = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            start = time.perf_counter()
+            model = _load(model_name, backend, intra_op_threads, inter_op_threads)
+            load_seconds = time.perf_counter() - start
+
+            scheduler = EmbeddingScheduler()
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                embeddings = _normalized(np.asarray(scheduler.encode(model, texts), dtype=np.float32))
+                best = min(best, time.perf_counter() - start)
+
+            cache = EmbeddingCache(Path(tmp) / f"{backend}.sqlite")
+            classifier = DocumentClassifier(model_name=model_name, embedding_cache=cache, backend=backend)
+            labels = [result["label"] for result in classifier._classify_semantic(documents)]
+            cache.close()
+
+            result = {
+                "load_seconds": load_seconds,
+                "seconds": best,
+                "chunks_per_sec": len(texts) / best if best else float("inf")
+            }
+            if reference is None:
+                reference = {"embeddings": embeddings, "labels": labels, "seconds": best,
+                             "neighbours": _neighbours(embeddings, sample, k)}
+            else:
+                cosine = np.sum(embeddings * reference["embeddings"], axis=1)
+                neighbours = _neighbours(embeddings, sample, k)
+                overlap = [len(set(a) & set(b)) / k for a, b in zip(neighbours, reference["neighbours"])]
+                result.update({
+                    "speedup": reference["seconds"] / best if best else float("inf"),
+                    "cosine_mean": float(cosine.mean()),
+                    "cosine_min": float(cosine.min()),
+                    "cosine_p01": float(np.percentile(cosine, 1)),
+                    "topk_overlap": float(np.mean(overlap)),
+                    "label_agreement": float(np.mean([a == b for a, b in zip(labels, reference["labels"])]))
+                })
+            report[backend] = result
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding inference backends with torch")
+    parser.add_argument("--synthetic", type=int, default=None, help="benchmark N generated documents instead of INPUT_DOCS_DIR")
+    parser.add_argument("--pages", type=int, default=2, help="pages per generated document")
+    parser.add_argument("--backends", type=str, default=",".join(BACKENDS), help="comma-separated backends to compare")
+    parser.add_argument("--k", type=int, default=10, help="neighbours compared per query chunk")
+    parser.add_argument("--queries", type=int, default=200, help="sampled query chunks")
+    parser.add_argument("--intra-op", type=int, default=ONNX_INTRA_OP_THREADS, help="onnxruntime intra-op threads")
+    parser.add_argument("--inter-op", type=int, default=ONNX_INTER_OP_THREADS, help="onnxruntime inter-op threads")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", type=str, default=None, help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from src.benchmarks.corpus import KINDS, generate_document
+        rng = random.Random(0)
+        kinds = list(KINDS)
+        texts = ["\f".join("\n".join(page) for page in generate_document(kinds[i % len(kinds)], rng, args.pages))
+                 for i in range(args.synthetic)]
+    else:
+        from src.ingestion.loader import list_documents
+        from src.ingestion.parallel import read_documents
+        texts = [doc["text"] for doc in read_documents(list_documents()) if doc["readable"]]
+
+    backends = [backend for backend in args.backends.split(",") if backend]
+    report = compare_backends(texts, backends=backends, k=args.k, queries=args.queries, repeat=args.repeat,
+                              intra_op_threads=args.intra_op, inter_op_threads=args.inter_op)
+
+    print(f"{report['documents']} documents, {report['chunks']} chunks, top-{report['k']} of {report['queries']} queries")
+    print(f"{'backend':<10} {'load s':>7} {'chunks/s':>9} {'speedup':>8} {'cos mean':>9} {'cos min':>8} {'top-k':>6} {'labels':>7}")
+    for backend in ["torch"] + [b for b in backends if b != "torch"]:
+        r = report[backend]
+        line = f"{backend:<10} {r['load_seconds']:>7.2f} {r['chunks_per_sec']:>9.1f}"
+        if "speedup" in r:
+            line += (f" {r['speedup']:>7.2f}x {r['cosine_mean']:>9.4f} {r['cosine_min']:>8.4f}"
+                     f" {r['topk_overlap']:>6.1%} {r['label_agreement']:>7.1%}")
+        print(line)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Embedding cache module: Persistent on-disk cache of text embeddings.
+
+Embeddings are stored in SQLite keyed by (model name, SHA-256 of the text), so
+unchanged documents are not re-encoded across runs. The cache is shared by the
+classifier and the retrieval embedder, and evicts least recently used entries
+once it grows past its size cap. LRUCache is a small in-memory cache for hot
+lookups such as repeated search queries.
+"""
+
+import atexit
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from src.config import EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    """
+    Content hash used as the cache key for a text.
+    """
+    return hashlib.sha256(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+class LRUCache:
+    """
+    Thread-safe, bounded in-memory mapping that evicts the least recently used key.
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        Args:
+            max_entries: Maximum number of entries kept (0 disables the cache)
+        """
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict:
+        """
+        Get hit/miss counts and size of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._data),
+                "max_entries": self.max_entries
+            }
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed embedding cache with an LRU size cap and hit/miss counters.
+
+    The row count is kept in memory, and the recency of entries served by
+    get_many() is written in one go by the next put_many() (or close()), so
+    lookups don't write to the database.
+    """
+
+    def __init__(self, path: Path = EMBEDDING_CACHE_PATH, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite database file
+            max_entries: Maximum number of cached embeddings before LRU eviction
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched: Dict[Tuple[str, str], float] = {}  # (model, key) -> last use not yet written
+        self._closed = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, key)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def get_many(self, model_name: str, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up embeddings by text hash.
+
+        Args:
+            model_name: Name of the model that produced the embeddings
+            keys: Text hashes (see text_hash)
+
+        Returns:
+            Dict of key -> float32 vector for the keys that were found
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique_keys), _SQL_BATCH):
+                batch = unique_keys[i:i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                    [model_name, *batch]
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+            # Recency of the entries we just used is written with the next put_many()
+            now = time.time()
+            for key in found:
+                self._touched[(model_name, key)] = now
+        return found
+
+    def put_many(self, model_name: str, items: Dict[str, np.ndarray]) -> None:
+        """
+        Store embeddings, evicting least recently used entries if over the cap.
+
+        Args:
+            model_name: Name of the model that produced the embeddings
+            items: Dict of text hash -> embedding vector
+        """
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            vector = np.ascontiguousarray(vector, dtype=np.float32)
+            rows.append((model_name, key, vector.shape[-1], vector.tobytes(), now))
+
+        with self._lock:
+            # Keys are content hashes, so an existing row already holds the same vector
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, key, dim, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows
+            ).rowcount
+            self._count += inserted
+            if inserted < len(rows):
+                for key in items:
+                    self._touched[(model_name, key)] = now
+            self._flush_touched()
+            self._evict()
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        """
+        Write the pending recency updates from get_many(). Caller holds the lock.
+        """
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND key = ?",
+                [(last_used, model, key) for (model, key), last_used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        """
+        Drop the least recently used entries beyond max_entries. Caller holds the lock.
+        """
+        if not self.max_entries or self.max_entries <= 0:
+            return
+        excess = self._count - self.max_entries
+        if excess > 0:
+            self._count -= self._conn.execute(
+                "DELETE FROM embeddings WHERE (model, key) IN "
+                "(SELECT model, key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,)
+            ).rowcount
+
+    def encode(
+        self,
+        model,
+        model_name: str,
+        texts: List[str],
+        batch_size: int = 32,
+        encode_fn: Optional[Callable[[List[str]], np.ndarray]] = None
+    ) -> np.ndarray:
+        """
+        Encode texts, reusing cached embeddings and encoding only the misses.
+
+        Args:
+            model: SentenceTransformer (or compatible) model
+            model_name: Name used to key the cache
+            texts: Texts to embed
+            batch_size: Batch size for encoding cache misses
+            encode_fn: Optional function encoding the misses instead of
+                model.encode (e.g. an EmbeddingScheduler)
+
+        Returns:
+            float32 array of shape (len(texts), dim), in input order
+        """
+        keys = [text_hash(text) for text in texts]
+        cached = self.get_many(model_name, keys)
+
+        # Encode each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        hits = sum(1 for key in keys if key in cached)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        if missing:
+            if encode_fn is not None:
+                encoded = encode_fn(list(missing.values()))
+            else:
+                encoded = model.encode(
+                    list(missing.values()),
+                    batch_size=batch_size,
+                    convert_to_tensor=False,
+                    show_progress_bar=False
+                )
+            encoded = np.asarray(encoded, dtype=np.float32)
+            new_items = dict(zip(missing.keys(), encoded))
+            self.put_many(model_name, new_items)
+            cached.update(new_items)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([cached[key] for key in keys]).astype(np.float32, copy=False)
+
+    def get_stats(self) -> Dict:
+        """
+        Get statistics about the cache.
+
+        Returns:
+            Dict with hit/miss counts, hit rate and number of stored entries
+        """
+        with self._lock:
+            entries = self._count
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "cache_path": str(self.path)
+            }
+
+    def clear(self) -> None:
+        """
+        Remove all cached embeddings and reset the counters.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._count = 0
+            self._touched.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        """
+        Write pending recency updates and close the underlying database connection.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+            self._closed = True
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Process-wide cache shared by the classifier and the embedder.
+    Returns None when caching is disabled in config.
+    """
+    global _default_cache
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+            # Writes the recency of entries looked up since the last put_many()
+            atexit.register(_default_cache.close)
+        return _default_cache
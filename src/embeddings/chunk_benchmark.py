@@ -0,0 +1,161 @@
+"""
+Chunk benchmark module: Throughput and memory of chunking large documents.
+
+Compares the previous dict-per-chunk chunker with the compact offset-array
+chunker (character mode) and, when the embedding model's tokenizer can be
+loaded, token mode. With a tokenizer it also reports how many character
+chunks exceed the model's max sequence length (and so get truncated when
+embedded).
+
+Usage:
+    python -m src.embeddings.chunk_benchmark                       # documents in INPUT_DOCS_DIR
+    python -m src.embeddings.chunk_benchmark --synthetic 20 --pages 200
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+import numpy as np
+from typing import Callable, Dict, List, Optional
+from src.config import CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL_NAME
+from src.embeddings.chunker import TextChunker
+
+
+def reference_chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP, metadata: Dict = None) -> List[Dict]:
+    """
+    Previous chunker: one dict per chunk, with the metadata copied into each.
+    """
+    if not text or len(text.strip()) == 0:
+        return []
+    chunks = []
+    step = chunk_size - overlap
+    for i in range(0, len(text), step):
+        chunk_text = text[i:i + chunk_size]
+        if len(chunk_text.strip()) > 0:
+            chunk_dict = {
+                "text": chunk_text,
+                "chunk_id": len(chunks),
+                "start_pos": i,
+                "end_pos": min(i + chunk_size, len(text))
+            }
+            if metadata:
+                chunk_dict.update(metadata)
+            chunks.append(chunk_dict)
+    return chunks
+
+
+def _measure(chunk_fn: Callable[[str, Dict], object], texts: List[str], repeat: int) -> Dict:
+    """
+    Best-of-repeat wall time over texts, and peak memory held while all the
+    chunk records of the corpus are alive.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i, text in enumerate(texts):
+            chunk_fn(text, {"file_name": f"doc_{i}.pdf", "class": "Invoice"})
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    results = [chunk_fn(text, {"file_name": f"doc_{i}.pdf", "class": "Invoice"}) for i, text in enumerate(texts)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    megabytes = sum(len(text) for text in texts) / 1e6
+    chunks = sum(len(result) for result in results)
+    return {
+        "chunks": chunks,
+        "seconds": best,
+        "chunks_per_sec": chunks / best if best else float("inf"),
+        "mb_per_sec": megabytes / best if best else float("inf"),
+        "peak_memory_mb": peak / 1e6
+    }
+
+
+def load_tokenizer(model_name: str = EMBEDDING_MODEL_NAME):
+    """
+    The embedding model's fast tokenizer, or None if it can't be loaded
+    (e.g. not downloaded and no network).
+    """
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        return tokenizer if tokenizer.is_fast else None
+    except Exception:
+        return None
+
+
+def benchmark_chunkers(texts: List[str], tokenizer=None, max_tokens: Optional[int] = None, repeat: int = 3) -> Dict:
+    """
+    Chunk texts with each chunker and report throughput and memory.
+
+    Args:
+        texts: Document texts
+        tokenizer: Optional fast tokenizer for token mode and truncation stats
+        max_tokens: Tokens per chunk in token mode (default: tokenizer limit)
+        repeat: Passes over texts per chunker (best pass is reported)
+
+    Returns:
+        Dict with one entry per chunker ("reference", "compact", "tokens"),
+        plus "truncated_char_chunks" (fraction of character chunks over the
+        token limit) when a tokenizer is given
+    """
+    compact = TextChunker()
+    report = {
+        "documents": len(texts),
+        "megabytes": sum(len(text) for text in texts) / 1e6,
+        "reference": _measure(lambda text, metadata: reference_chunk_text(text, metadata=metadata), texts, repeat),
+        "compact": _measure(compact.chunk, texts, repeat)
+    }
+    if tokenizer is not None:
+        tokens = TextChunker(mode="tokens", tokenizer=tokenizer, max_tokens=max_tokens)
+        report["tokens"] = _measure(tokens.chunk, texts, repeat)
+        report["tokens"]["max_tokens"] = tokens.max_tokens
+
+        chunk_texts = [chunk for text in texts for chunk in compact.chunk(text).texts()]
+        lengths = np.array([
+            len(ids) for ids in tokenizer(chunk_texts, add_special_tokens=False, verbose=False)["input_ids"]
+        ]) if chunk_texts else np.zeros(0)
+        report["truncated_char_chunks"] = float(np.mean(lengths > tokens.max_tokens)) if len(lengths) else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text chunking throughput and memory")
+    parser.add_argument("--synthetic", type=int, default=None, help="benchmark N generated documents instead of INPUT_DOCS_DIR")
+    parser.add_argument("--pages", type=int, default=100, help="pages per generated document")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-tokenizer", action="store_true", help="skip token mode")
+    parser.add_argument("--output", type=str, default=None, help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from src.extraction.benchmark import synthetic_documents
+        texts = [text for _, text in synthetic_documents(args.synthetic, args.pages)]
+    else:
+        from src.ingestion.loader import list_documents
+        from src.ingestion.parallel import read_documents
+        texts = [doc["text"] for doc in read_documents(list_documents()) if doc["readable"]]
+
+    tokenizer = None if args.no_tokenizer else load_tokenizer()
+    if tokenizer is None and not args.no_tokenizer:
+        print(f"Tokenizer for {EMBEDDING_MODEL_NAME} unavailable, skipping token mode")
+
+    report = benchmark_chunkers(texts, tokenizer=tokenizer, repeat=args.repeat)
+    print(f"{report['documents']} documents, {report['megabytes']:.1f} MB of text")
+    print(f"{'chunker':<10} {'chunks':>8} {'chunks/s':>11} {'MB/s':>8} {'peak MB':>8}")
+    for name in ("reference", "compact", "tokens"):
+        if name in report:
+            r = report[name]
+            print(f"{name:<10} {r['chunks']:>8} {r['chunks_per_sec']:>11.0f} {r['mb_per_sec']:>8.1f} {r['peak_memory_mb']:>8.1f}")
+    if "truncated_char_chunks" in report:
+        print(f"Character chunks over {report['tokens']['max_tokens']} tokens: {report['truncated_char_chunks']:.1%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Chunker module: Splits document text into overlapping chunks for embedding.
+
+Chunks are produced as compact records: one DocumentChunks per document
+holding the document text, its metadata (shared, not copied per chunk) and
+NumPy arrays of chunk start/end offsets computed in one vectorized pass.
+Chunk strings are only sliced out when they are needed (embedding, storage).
+
+Chunks are sized either in characters (CHUNK_SIZE / CHUNK_OVERLAP) or, in
+token mode, in model tokens, so each chunk fits the embedding model's
+maximum sequence length instead of being silently truncated by it.
+"""
+
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+from src.config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_MODE, CHUNK_TOKEN_OVERLAP
+
+# str.isspace() of each ASCII character
+_ASCII_SPACE = np.array([chr(i).isspace() for i in range(128)], dtype=bool)
+
+
+def _has_content(text: str, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    For each [start, end) span, whether it contains a non-whitespace character.
+    Only spans that start and end with whitespace are sliced and checked in full.
+    """
+    if len(starts) == 0:
+        return np.zeros(0, dtype=bool)
+    if text.isascii():
+        codes = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+        suspect = _ASCII_SPACE[codes[starts]] & _ASCII_SPACE[codes[ends - 1]]
+    else:
+        suspect = np.array([
+            text[start].isspace() and text[end - 1].isspace()
+            for start, end in zip(starts.tolist(), ends.tolist())
+        ], dtype=bool)
+    keep = ~suspect
+    for i in np.flatnonzero(suspect).tolist():
+        keep[i] = not text[int(starts[i]):int(ends[i])].isspace()
+    return keep
+
+
+class DocumentChunks:
+    """
+    Chunks of one document: offsets into the shared text plus the document's metadata.
+    """
+
+    __slots__ = ("text", "starts", "ends", "metadata")
+
+    def __init__(self, text: str, starts: np.ndarray, ends: np.ndarray, metadata: Optional[Dict] = None):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.metadata = metadata or {}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def chunk(self, i: int) -> str:
+        """
+        Text of chunk i.
+        """
+        return self.text[int(self.starts[i]):int(self.ends[i])]
+
+    def texts(self) -> List[str]:
+        """
+        Text of every chunk, e.g. for embedding.
+        """
+        text = self.text
+        return [text[start:end] for start, end in zip(self.starts.tolist(), self.ends.tolist())]
+
+    def to_dicts(self) -> List[Dict]:
+        """
+        Chunks in the dict form of TextChunker.chunk_text.
+        """
+        return list(self)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for chunk_id, (start, end) in enumerate(zip(self.starts.tolist(), self.ends.tolist())):
+            yield {
+                "text": self.text[start:end],
+                "chunk_id": chunk_id,
+                "start_pos": start,
+                "end_pos": end,
+                **self.metadata
+            }
+
+
+class TextChunker:
+    """
+    Chunks text into overlapping segments for embedding.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = CHUNK_SIZE,
+        overlap: int = CHUNK_OVERLAP,
+        mode: str = CHUNK_MODE,
+        tokenizer=None,
+        max_tokens: Optional[int] = None,
+        token_overlap: int = CHUNK_TOKEN_OVERLAP
+    ):
+        """
+        Args:
+            chunk_size: Number of characters per chunk (character mode)
+            overlap: Number of overlapping characters between chunks (character mode)
+            mode: "chars" or "tokens" (chunks of up to max_tokens tokenizer tokens)
+            tokenizer: Fast Hugging Face tokenizer (token mode), e.g. the
+                embedding model's tokenizer
+            max_tokens: Tokens per chunk (token mode; default: what the
+                tokenizer fits in one sequence besides special tokens)
+            token_overlap: Number of overlapping tokens between chunks (token mode)
+        """
+        if mode not in ("chars", "tokens"):
+            raise ValueError(f"Unknown chunk mode: {mode}")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.mode = mode
+        self.tokenizer = tokenizer
+        self.token_overlap = token_overlap
+        self.max_tokens = max_tokens
+        if mode == "tokens":
+            if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+                raise ValueError("Token mode needs a fast tokenizer (for character offsets)")
+            if max_tokens is None:
+                self.max_tokens = tokenizer.model_max_length - tokenizer.num_special_tokens_to_add(pair=False)
+            if self.max_tokens <= self.token_overlap:
+                raise ValueError("max_tokens must be larger than token_overlap")
+
+    @classmethod
+    def for_model(cls, model, token_overlap: int = CHUNK_TOKEN_OVERLAP) -> "TextChunker":
+        """
+        Token-mode chunker sized to a SentenceTransformer's max_seq_length.
+        """
+        tokenizer = model.tokenizer
+        max_tokens = model.max_seq_length - tokenizer.num_special_tokens_to_add(pair=False)
+        return cls(mode="tokens", tokenizer=tokenizer, max_tokens=max_tokens, token_overlap=token_overlap)
+
+    def _char_spans(self, text: str):
+        step = self.chunk_size - self.overlap
+        starts = np.arange(0, len(text), step, dtype=np.int64)
+        ends = np.minimum(starts + self.chunk_size, len(text))
+        return starts, ends
+
+    def _token_spans(self, text: str):
+        encoding = self.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False
+        )
+        offsets = np.asarray(encoding["offset_mapping"], dtype=np.int64).reshape(-1, 2)
+        n_tokens = len(offsets)
+        if n_tokens == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Windows of max_tokens tokens, the last one ending at the final token
+        step = self.max_tokens - self.token_overlap
+        n_windows = 1 + max(0, -(-(n_tokens - self.max_tokens) // step))
+        first = np.arange(n_windows, dtype=np.int64) * step
+        last = np.minimum(first + self.max_tokens, n_tokens) - 1
+        return offsets[first, 0], offsets[last, 1]
+
+    def chunk(self, text: str, metadata: Dict = None) -> DocumentChunks:
+        """
+        Split text into overlapping chunks, as offset arrays.
+
+        Args:
+            text: The text to chunk
+            metadata: Optional metadata dict (e.g., file_name, class), shared by all chunks
+
+        Returns:
+            DocumentChunks (empty for blank text); whitespace-only chunks are dropped
+        """
+        if not text or text.isspace():
+            empty = np.zeros(0, dtype=np.int64)
+            return DocumentChunks(text or "", empty, empty, metadata)
+
+        starts, ends = self._token_spans(text) if self.mode == "tokens" else self._char_spans(text)
+        keep = _has_content(text, starts, ends)
+        if not keep.all():
+            starts, ends = starts[keep], ends[keep]
+        return DocumentChunks(text, starts, ends, metadata)
+
+    def chunk_text(self, text: str, metadata: Dict = None) -> List[Dict]:
+        """
+        Split text into overlapping chunks with metadata.
+        Prefer chunk(), which doesn't build a dict per chunk.
+
+        Args:
+            text: The text to chunk
+            metadata: Optional metadata dict (e.g., file_name, document_class)
+
+        Returns:
+            List of chunk dicts with text, chunk_id, and metadata
+        """
+        return self.chunk(text, metadata).to_dicts()
@@ -0,0 +1,129 @@
+"""
+Embedding benchmark module: Chunks/sec of scheduled vs fixed-size batching.
+
+Chunks a corpus and embeds it three ways (no embedding cache):
+- per_document: one encode call per document with batch_size=32 (the old indexing path)
+- fixed: one encode call for the whole corpus with batch_size=32
+- scheduled: EmbeddingScheduler (length-sorted, token-budgeted batches)
+
+Usage:
+    python -m src.embeddings.embed_benchmark                       # documents in INPUT_DOCS_DIR
+    python -m src.embeddings.embed_benchmark --synthetic 50 --pages 4 --budget 16384
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+from typing import Dict, List
+from src.config import EMBEDDING_MODEL_NAME, EMBED_TOKEN_BUDGET, EMBED_MAX_BATCH_SIZE
+from src.embeddings.chunker import TextChunker
+from src.embeddings.model_registry import get_model
+from src.embeddings.scheduler import EmbeddingScheduler
+
+
+def _fixed_padding(lengths: np.ndarray, batch_size: int) -> float:
+    """
+    Real / padded tokens when lengths are encoded in batches of batch_size, sorted
+    by length within each call (as SentenceTransformer.encode does).
+    """
+    ordered = np.sort(lengths)[::-1]
+    padded = sum(len(batch) * int(batch[0]) for batch in np.array_split(ordered, max(1, -(-len(ordered) // batch_size))))
+    return float(lengths.sum() / padded) if padded else 1.0
+
+
+def benchmark_batching(
+    documents: List[List[str]],
+    model_name: str = EMBEDDING_MODEL_NAME,
+    token_budget: int = EMBED_TOKEN_BUDGET,
+    max_batch_size: int = EMBED_MAX_BATCH_SIZE,
+    batch_size: int = 32,
+    repeat: int = 1
+) -> Dict:
+    """
+    Embed the chunks of documents with each batching strategy.
+
+    Args:
+        documents: Chunk texts per document
+        model_name: Embedding model
+        token_budget: Scheduler token budget
+        max_batch_size: Scheduler batch size cap
+        batch_size: Fixed batch size of the other strategies
+        repeat: Runs per strategy (best run is reported)
+
+    Returns:
+        Dict with chunks_per_sec, seconds and padding efficiency (estimated)
+        per strategy, and the maximum embedding difference between strategies
+    """
+    model = get_model(model_name)
+    scheduler = EmbeddingScheduler(token_budget=token_budget, max_batch_size=max_batch_size)
+    texts = [text for chunks in documents for text in chunks]
+    lengths = scheduler.token_lengths(model, texts)
+
+    def per_document():
+        return np.concatenate([
+            model.encode(chunks, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+            for chunks in documents if chunks
+        ])
+
+    def fixed():
+        return model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+    def scheduled():
+        return scheduler.encode(model, texts)
+
+    report = {"documents": len(documents), "chunks": len(texts), "device": str(getattr(model, "device", "cpu"))}
+    outputs = {}
+    for name, run in (("per_document", per_document), ("fixed", fixed), ("scheduled", scheduled)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs[name] = np.asarray(run(), dtype=np.float32)
+            best = min(best, time.perf_counter() - start)
+        report[name] = {"seconds": best, "chunks_per_sec": len(texts) / best if best else float("inf")}
+
+    report["per_document"]["padding_efficiency"] = float(np.mean([
+        _fixed_padding(scheduler.token_lengths(model, chunks), batch_size) for chunks in documents if chunks
+    ])) if texts else 1.0
+    report["fixed"]["padding_efficiency"] = _fixed_padding(lengths, batch_size)
+    report["scheduled"]["padding_efficiency"] = scheduler.get_stats()["padding_efficiency"]
+    report["scheduled"]["batches"] = scheduler.get_stats()["batches"] // repeat
+    report["max_abs_diff"] = float(np.abs(outputs["scheduled"] - outputs["fixed"]).max()) if texts else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding batching strategies")
+    parser.add_argument("--synthetic", type=int, default=None, help="benchmark N generated documents instead of INPUT_DOCS_DIR")
+    parser.add_argument("--pages", type=int, default=2, help="pages per generated document")
+    parser.add_argument("--budget", type=int, default=EMBED_TOKEN_BUDGET, help="scheduler token budget")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", type=str, default=None, help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from src.extraction.benchmark import synthetic_documents
+        texts = [text for _, text in synthetic_documents(args.synthetic, args.pages)]
+    else:
+        from src.ingestion.loader import list_documents
+        from src.ingestion.parallel import read_documents
+        texts = [doc["text"] for doc in read_documents(list_documents()) if doc["readable"]]
+
+    chunker = TextChunker()
+    documents = [chunker.chunk(text).texts() for text in texts]
+    report = benchmark_batching(documents, token_budget=args.budget, repeat=args.repeat)
+
+    print(f"{report['documents']} documents, {report['chunks']} chunks on {report['device']}")
+    print(f"{'strategy':<13} {'chunks/s':>9} {'seconds':>8} {'padding eff.':>13}")
+    for name in ("per_document", "fixed", "scheduled"):
+        r = report[name]
+        print(f"{name:<13} {r['chunks_per_sec']:>9.1f} {r['seconds']:>8.2f} {r['padding_efficiency']:>13.1%}")
+    print(f"Max embedding difference vs fixed batching: {report['max_abs_diff']:.2e}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
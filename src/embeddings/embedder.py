@@ -1,113 +1,139 @@
 """
-Embedder module: Handles text chunking and embedding generation.
+Embedder module: Handles embedding generation (chunking lives in chunker.py).
 """
 
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer
-from src.config import CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL_NAME
+import numpy as np
+from typing import List, Dict, Optional
+from src.config import EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME, QUERY_EMBEDDING_CACHE_SIZE
+from src.embeddings.cache import EmbeddingCache, LRUCache, get_embedding_cache
+from src.embeddings.chunker import DocumentChunks, TextChunker  # re-exported
+from src.embeddings.model_registry import get_model, model_key
+from src.embeddings.scheduler import EmbeddingScheduler
+from src.instrumentation import timed
 
 
-class TextChunker:
+class DocumentEmbedder:
     """
-    Chunks text into overlapping segments for embedding.
+    Generates embeddings for text using SentenceTransformers.
     """
     
-    def __init__(self, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP):
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        query_cache_size: int = QUERY_EMBEDDING_CACHE_SIZE,
+        scheduler: Optional[EmbeddingScheduler] = None,
+        backend: str = EMBEDDING_BACKEND
+    ):
         """
+        Initialize embedder with the shared sentence transformer model.
+        
         Args:
-            chunk_size: Number of characters per chunk
-            overlap: Number of overlapping characters between chunks
+            model_name: Name of the SentenceTransformer model
+            embedding_cache: Embedding cache to consult before encoding
+                (defaults to the shared on-disk cache, if enabled in config)
+            query_cache_size: Entries in the in-memory query -> embedding LRU cache
+            scheduler: Batches texts by length under a token budget (default
+                from config); used whenever no fixed batch_size is given
+            backend: Inference backend ("torch", "onnx" or "onnx-int8")
         """
-        self.chunk_size = chunk_size
-        self.overlap = overlap
+        self.model = get_model(model_name, backend)
+        self.model_name = model_name
+        self.backend = backend
+        self.cache_name = model_key(model_name, backend)
+        self.embedding_cache = embedding_cache if embedding_cache is not None else get_embedding_cache()
+        self.query_cache = LRUCache(query_cache_size)
+        self.scheduler = scheduler if scheduler is not None else EmbeddingScheduler()
     
-    def chunk_text(self, text: str, metadata: Dict = None) -> List[Dict]:
+    def embed_array(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
         """
-        Split text into overlapping chunks with metadata.
+        Generate embeddings for a list of texts as one float32 array.
+        Pass all texts at once: the scheduler sorts them by length and sizes
+        batches to a token budget, so larger calls batch better.
         
         Args:
-            text: The text to chunk
-            metadata: Optional metadata dict (e.g., file_name, document_class)
+            texts: List of text strings to embed
+            batch_size: Fixed batch size for encoding (None = scheduled batches)
             
         Returns:
-            List of chunk dicts with text, chunk_id, and metadata
+            float32 array of shape (len(texts), dim)
         """
-        if not text or len(text.strip()) == 0:
-            return []
-        
-        chunks = []
-        step = self.chunk_size - self.overlap
-        
-        for i in range(0, len(text), step):
-            chunk_text = text[i:i + self.chunk_size]
-            if len(chunk_text.strip()) > 0:
-                chunk_dict = {
-                    "text": chunk_text,
-                    "chunk_id": len(chunks),
-                    "start_pos": i,
-                    "end_pos": min(i + self.chunk_size, len(text))
-                }
-                if metadata:
-                    chunk_dict.update(metadata)
-                chunks.append(chunk_dict)
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
         
-        return chunks
-
-
-class DocumentEmbedder:
-    """
-    Generates embeddings for text using SentenceTransformers.
-    """
-    
-    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
-        """
-        Initialize embedder with a sentence transformer model.
+        encode_fn = None if batch_size else lambda missing: self.scheduler.encode(self.model, missing)
+        with timed("embed", items=len(texts)):
+            if self.embedding_cache is not None:
+                embeddings = self.embedding_cache.encode(
+                    self.model, self.cache_name, texts, batch_size=batch_size or 32, encode_fn=encode_fn
+                )
+            elif encode_fn is not None:
+                embeddings = encode_fn(texts)
+            else:
+                embeddings = self.model.encode(
+                    texts,
+                    batch_size=batch_size,
+                    convert_to_numpy=True,
+                    show_progress_bar=False
+                )
         
-        Args:
-            model_name: Name of the SentenceTransformer model
-        """
-        self.model = SentenceTransformer(model_name)
-        self.model_name = model_name
+        return np.asarray(embeddings, dtype=np.float32)
     
-    def embed_texts(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+    def embed_texts(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
         """
         Generate embeddings for a list of texts.
+        Prefer embed_array(), which avoids building Python float lists.
         
         Args:
             texts: List of text strings to embed
-            batch_size: Batch size for encoding
+            batch_size: Fixed batch size for encoding (None = scheduled batches)
             
         Returns:
             List of embedding vectors (each vector is a list of floats)
         """
         if not texts:
             return []
+        return self.embed_array(texts, batch_size=batch_size).tolist()
+    
+    def embed_queries(self, queries: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Embed search queries, serving repeats from the in-memory LRU cache and
+        encoding all misses in one batch.
+        
+        Args:
+            queries: Query strings
+            batch_size: Fixed batch size for encoding (None = scheduled batches)
+            
+        Returns:
+            float32 array of shape (len(queries), dim)
+        """
+        embeddings = [self.query_cache.get(query) for query in queries]
+        missing = list(dict.fromkeys(q for q, e in zip(queries, embeddings) if e is None))
         
-        embeddings = self.model.encode(
-            texts,
-            batch_size=batch_size,
-            convert_to_tensor=False,
-            show_progress_bar=False
-        )
+        if missing:
+            encoded = dict(zip(missing, self.embed_array(missing, batch_size=batch_size)))
+            for query, embedding in encoded.items():
+                self.query_cache.put(query, embedding)
+            embeddings = [e if e is not None else encoded[q] for q, e in zip(queries, embeddings)]
         
-        return embeddings.tolist() if hasattr(embeddings, 'tolist') else embeddings
+        return np.stack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
     
-    def embed_chunks(self, chunks: List[Dict], batch_size: int = 32) -> List[Dict]:
+    def embed_chunks(self, chunks: List[Dict], batch_size: Optional[int] = None) -> List[Dict]:
         """
         Generate embeddings for a list of chunks.
         
         Args:
             chunks: List of chunk dicts with 'text' key
-            batch_size: Batch size for encoding
+            batch_size: Fixed batch size for encoding (None = scheduled batches)
             
         Returns:
-            List of chunk dicts with added 'embedding' key
+            List of chunk dicts with added 'embedding' key (a float32 row vector)
         """
         if not chunks:
             return []
         
         texts = [chunk["text"] for chunk in chunks]
-        embeddings = self.embed_texts(texts, batch_size=batch_size)
+        embeddings = self.embed_array(texts, batch_size=batch_size)
         
         for i, chunk in enumerate(chunks):
             chunk["embedding"] = embeddings[i]
@@ -0,0 +1,219 @@
+"""
+Index benchmark module: Recall vs latency of approximate FAISS indexes against exact search.
+
+Usage:
+    python -m src.embeddings.index_benchmark                 # vectors from the saved store
+    python -m src.embeddings.index_benchmark --synthetic 200000
+    python -m src.embeddings.index_benchmark --precisions    # float32 vs float16 vs int8 storage
+"""
+
+import argparse
+import json
+import time
+import faiss
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from src.embeddings.vector_store import PRECISIONS, VectorStore, create_index, set_search_params
+
+
+def _timed_search(index, queries: np.ndarray, k: int):
+    """
+    Run queries one at a time (as the search engine does) and record per-query latency.
+    """
+    latencies = []
+    all_ids = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        all_ids.append(ids[0])
+    return np.array(all_ids), np.array(latencies) * 1000
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    """
+    Mean recall@k: fraction of the exact top-k that the approximate index returned.
+    """
+    k = truth.shape[1]
+    hits = [len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth)]
+    return float(np.mean(hits)) / k
+
+
+def benchmark_index_types(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    index_types: Sequence[str] = ("ivf_flat", "ivf_pq", "hnsw"),
+    nprobes: Sequence[int] = (1, 4, 16, 64),
+    ef_searches: Sequence[int] = (16, 64, 128, 256)
+) -> List[Dict]:
+    """
+    Build each index type over vectors and measure recall@k and query latency
+    against an exact flat index, sweeping nprobe (IVF) or efSearch (HNSW).
+
+    Args:
+        vectors: Stored vectors, shape (n, dim)
+        queries: Query vectors, shape (q, dim)
+        k: Number of neighbours per query
+        index_types: Approximate index types to compare
+        nprobes: IVF nprobe values to try
+        ef_searches: HNSW efSearch values to try
+
+    Returns:
+        One report row per (index type, parameter) with recall and latency stats
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    dim = vectors.shape[1]
+    k = min(k, len(vectors))
+
+    def row(index_type, param, build_seconds, ids, latencies, truth) -> Dict:
+        return {
+            "index_type": index_type,
+            "param": param,
+            "recall_at_k": _recall(ids, truth) if truth is not None else 1.0,
+            "latency_ms_p50": float(np.percentile(latencies, 50)),
+            "latency_ms_p99": float(np.percentile(latencies, 99)),
+            "latency_ms_mean": float(latencies.mean()),
+            "build_seconds": build_seconds
+        }
+
+    start = time.perf_counter()
+    flat = create_index("flat", dim)
+    flat.add(vectors)
+    flat_build = time.perf_counter() - start
+    truth, flat_latencies = _timed_search(flat, queries, k)
+    report = [row("flat", None, flat_build, truth, flat_latencies, None)]
+
+    for index_type in index_types:
+        start = time.perf_counter()
+        try:
+            index = create_index(index_type, dim, training_vectors=vectors)
+        except ValueError as e:
+            print(f"Skipping {index_type}: {e}")
+            continue
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+
+        if index_type == "hnsw":
+            params = [("ef_search", ef) for ef in ef_searches]
+        else:
+            params = [("nprobe", nprobe) for nprobe in nprobes]
+
+        for name, value in params:
+            set_search_params(index, **{name: value})
+            ids, latencies = _timed_search(index, queries, k)
+            report.append(row(index_type, {name: value}, build_seconds, ids, latencies, truth))
+
+    return report
+
+
+def benchmark_precisions(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    index_types: Sequence[str] = ("flat", "ivf_flat", "hnsw"),
+    precisions: Sequence[str] = PRECISIONS
+) -> List[Dict]:
+    """
+    Build each index type at each storage precision and measure its size,
+    recall@k against exact float32 search, and query latency.
+
+    Args:
+        vectors: Stored vectors, shape (n, dim)
+        queries: Query vectors, shape (q, dim)
+        k: Number of neighbours per query
+        index_types: Index types to compare
+        precisions: Storage precisions to compare
+
+    Returns:
+        One report row per (index type, precision) with size, recall and latency stats
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    dim = vectors.shape[1]
+    k = min(k, len(vectors))
+
+    flat = create_index("flat", dim)
+    flat.add(vectors)
+    truth, _ = _timed_search(flat, queries, k)
+
+    report = []
+    for index_type in index_types:
+        for precision in precisions:
+            start = time.perf_counter()
+            try:
+                index = create_index(index_type, dim, training_vectors=vectors, precision=precision)
+            except ValueError as e:
+                print(f"Skipping {index_type}/{precision}: {e}")
+                continue
+            index.add(vectors)
+            build_seconds = time.perf_counter() - start
+            ids, latencies = _timed_search(index, queries, k)
+            index_bytes = int(faiss.serialize_index(index).nbytes)
+            report.append({
+                "index_type": index_type,
+                "precision": precision,
+                "index_bytes": index_bytes,
+                "bytes_per_vector": index_bytes / len(vectors),
+                "recall_at_k": _recall(ids, truth),
+                "latency_ms_p50": float(np.percentile(latencies, 50)),
+                "latency_ms_p99": float(np.percentile(latencies, 99)),
+                "build_seconds": build_seconds
+            })
+
+    return report
+
+
+def _load_vectors(synthetic: Optional[int], dim: int, seed: int) -> np.ndarray:
+    if synthetic:
+        rng = np.random.default_rng(seed)
+        return rng.standard_normal((synthetic, dim)).astype(np.float32)
+    store = VectorStore(embedding_dim=dim)
+    if not store.load() or store.index.ntotal == 0:
+        raise SystemExit("No saved vector store found; index documents first or pass --synthetic N")
+    return store.get_vectors()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare recall and latency of FAISS index types")
+    parser.add_argument("--synthetic", type=int, default=None, help="benchmark N random vectors instead of the saved store")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--precisions", action="store_true",
+                        help="compare float32/float16/int8 vector storage instead of index types")
+    parser.add_argument("--output", type=str, default=None, help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    vectors = _load_vectors(args.synthetic, args.dim, args.seed)
+
+    # Queries: stored vectors with a little noise, like a paraphrased chunk
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    queries = vectors[picks] + 0.1 * rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+
+    print(f"{len(vectors)} vectors, {len(queries)} queries, k={args.k}")
+    if args.precisions:
+        report = benchmark_precisions(vectors, queries, k=args.k)
+        print(f"{'index':<10} {'precision':<10} {'MB':>9} {'B/vec':>8} {'recall@k':>9} {'p50 ms':>9} {'p99 ms':>9}")
+        for r in report:
+            print(f"{r['index_type']:<10} {r['precision']:<10} {r['index_bytes'] / 2**20:>9.1f} "
+                  f"{r['bytes_per_vector']:>8.0f} {r['recall_at_k']:>9.3f} {r['latency_ms_p50']:>9.3f} "
+                  f"{r['latency_ms_p99']:>9.3f}")
+    else:
+        report = benchmark_index_types(vectors, queries, k=args.k)
+        print(f"{'index':<10} {'param':<18} {'recall@k':>9} {'p50 ms':>9} {'p99 ms':>9} {'build s':>9}")
+        for r in report:
+            param = ",".join(f"{key}={value}" for key, value in (r["param"] or {}).items()) or "-"
+            print(f"{r['index_type']:<10} {param:<18} {r['recall_at_k']:>9.3f} {r['latency_ms_p50']:>9.3f} "
+                  f"{r['latency_ms_p99']:>9.3f} {r['build_seconds']:>9.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,488 @@
+"""
+Metadata store module: Compact, columnar storage for chunk metadata.
+
+Instead of one Python dict per chunk, rows are kept as:
+- interned string tables for repeated values (file names, classes)
+- a fixed-width NumPy record array (string ids, chunk id, positions, text offsets)
+- chunk text concatenated into one UTF-8 blob
+
+On disk the record array and the text blob are memory-mapped, so loading a store
+costs the same regardless of corpus size and a search only touches the k rows it returns.
+
+Every row has a stable chunk uid (also used as its FAISS id). Uids are assigned
+in increasing order and never reused; deleted rows are tombstoned until the
+store is compacted.
+
+Document-level fields (e.g. extracted date or company) are kept once per
+document and can be used, with class and file name, to filter searches.
+"""
+
+import json
+import mmap
+import os
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+ROW_DTYPE = np.dtype([
+    ("chunk_uid", np.int64),
+    ("file_idx", np.int32),
+    ("class_idx", np.int32),
+    ("chunk_id", np.int32),
+    ("start_pos", np.int64),
+    ("end_pos", np.int64),
+    ("text_start", np.int64),
+    ("text_end", np.int64),
+])
+
+# Chunk keys stored as columns; anything else goes to the (sparse) extras table
+_COLUMN_KEYS = {"file_name", "class", "chunk_id", "start_pos", "end_pos", "text"}
+
+# Range operators accepted in document field filters
+_RANGE_OPS = {
+    "gte": lambda a, b: a >= b,
+    "gt": lambda a, b: a > b,
+    "lte": lambda a, b: a <= b,
+    "lt": lambda a, b: a < b,
+}
+
+_TABLES_FILE = "tables.json"
+_ROWS_FILE = "rows.npy"
+_TEXT_FILE = "text.bin"
+
+
+class StringTable:
+    """
+    Interned strings: each distinct value is stored once and referenced by index.
+    """
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values = list(values or [])
+        self._ids = {value: i for i, value in enumerate(self.values)}
+
+    def intern(self, value) -> int:
+        """
+        Index of value, adding it to the table if new. None maps to -1.
+        """
+        if value is None:
+            return -1
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.values.append(value)
+            self._ids[value] = idx
+        return idx
+
+    def lookup(self, value) -> int:
+        """
+        Index of value, or -1 if it isn't in the table.
+        """
+        return self._ids.get(value, -1)
+
+    def get(self, idx: int):
+        return self.values[idx] if idx >= 0 else None
+
+
+def _as_list(value) -> list:
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def field_matches(value, condition) -> bool:
+    """
+    Check a document field value against a filter condition:
+    a list/tuple/set (membership), a dict of range operators
+    ({"gte": ..., "lte": ...}; ISO dates compare correctly as strings),
+    or a plain value (equality).
+    """
+    if isinstance(condition, dict):
+        try:
+            return all(_RANGE_OPS[op](value, bound) for op, bound in condition.items())
+        except (KeyError, TypeError):
+            return False
+    if isinstance(condition, (list, tuple, set)):
+        return value in condition
+    return value == condition
+
+
+class ChunkMetadataStore:
+    """
+    Columnar chunk metadata with memory-mapped persistence.
+    Rows are addressed by chunk uid (the FAISS id) and read back as dicts.
+    """
+
+    def __init__(self):
+        self.file_names = StringTable()
+        self.classes = StringTable()
+        self.extras: Dict[int, Dict] = {}  # chunk uid -> non-column keys
+        self.deleted = set()  # tombstoned chunk uids, dropped on compact()
+        self.doc_fields: Dict[str, Dict] = {}  # file name -> document-level fields
+        self.next_uid = 0
+
+        # Rows loaded from disk (memory-mapped) ...
+        self._base_rows = np.zeros(0, dtype=ROW_DTYPE)
+        self._base_text = b""
+        # ... and rows appended since, kept in memory until the next save
+        self._tail_rows: List[tuple] = []
+        self._tail_text: List[bytes] = []
+        self._tail_text_size = 0
+
+    def __len__(self) -> int:
+        """
+        Number of live (non-deleted) rows.
+        """
+        return self.total_rows - len(self.deleted)
+
+    @property
+    def total_rows(self) -> int:
+        """
+        Number of stored rows, including tombstoned ones.
+        """
+        return len(self._base_rows) + len(self._tail_rows)
+
+    def _text_end(self) -> int:
+        base_end = int(self._base_rows["text_end"][-1]) if len(self._base_rows) else 0
+        return base_end + self._tail_text_size
+
+    def append(self, metadata: Dict) -> int:
+        """
+        Add one chunk's metadata (as produced by TextChunker plus file_name/class).
+
+        Returns:
+            The chunk uid assigned to the row
+        """
+        uid = self.next_uid
+        self.next_uid += 1
+        text = (metadata.get("text") or "").encode("utf-8")
+        text_start = self._text_end()
+        row = (
+            uid,
+            self.file_names.intern(metadata.get("file_name")),
+            self.classes.intern(metadata.get("class")),
+            metadata.get("chunk_id", -1),
+            metadata.get("start_pos", -1),
+            metadata.get("end_pos", -1),
+            text_start,
+            text_start + len(text),
+        )
+        extra = {k: v for k, v in metadata.items() if k not in _COLUMN_KEYS}
+        if extra:
+            self.extras[uid] = extra
+        self._tail_rows.append(row)
+        self._tail_text.append(text)
+        self._tail_text_size += len(text)
+        return uid
+
+    def append_chunks(self, chunks) -> np.ndarray:
+        """
+        Add all chunks of one document from a DocumentChunks (shared text and
+        metadata, offset arrays) without building a dict per chunk.
+
+        Returns:
+            The chunk uids assigned to the rows, in chunk order
+        """
+        n = len(chunks)
+        uids = np.arange(self.next_uid, self.next_uid + n, dtype=np.int64)
+        self.next_uid += n
+        metadata = chunks.metadata
+        file_idx = self.file_names.intern(metadata.get("file_name"))
+        class_idx = self.classes.intern(metadata.get("class"))
+        extra = {k: v for k, v in metadata.items() if k not in _COLUMN_KEYS}
+
+        starts, ends = chunks.starts.tolist(), chunks.ends.tolist()
+        if chunks.text.isascii():
+            # Character offsets are byte offsets: slice one encoded copy
+            encoded = chunks.text.encode("ascii")
+            texts = [encoded[start:end] for start, end in zip(starts, ends)]
+        else:
+            texts = [chunks.text[start:end].encode("utf-8") for start, end in zip(starts, ends)]
+
+        text_start = self._text_end()
+        for chunk_id, (uid, start, end, text) in enumerate(zip(uids.tolist(), starts, ends, texts)):
+            self._tail_rows.append((uid, file_idx, class_idx, chunk_id, start, end, text_start, text_start + len(text)))
+            text_start += len(text)
+            if extra:
+                self.extras[uid] = extra  # shared by the document's chunks
+        self._tail_text.extend(texts)
+        self._tail_text_size += sum(len(text) for text in texts)
+        return uids
+
+    def extend(self, rows: Iterable[Dict]) -> List[int]:
+        return [self.append(metadata) for metadata in rows]
+
+    def _position(self, uid: int) -> int:
+        """
+        Row position of a uid, or -1 if it isn't stored.
+        Uids are increasing, so the position is found by binary search.
+        """
+        n_base = len(self._base_rows)
+        if self._tail_rows and uid >= self._tail_rows[0][0]:
+            offset = uid - self._tail_rows[0][0]
+            # Tail uids are consecutive, assigned at append
+            return n_base + offset if offset < len(self._tail_rows) else -1
+        if n_base == 0:
+            return -1
+        pos = int(np.searchsorted(self._base_rows["chunk_uid"], uid))
+        if pos < n_base and int(self._base_rows["chunk_uid"][pos]) == uid:
+            return pos
+        return -1
+
+    def _row(self, pos: int):
+        """
+        Raw record at a row position: (record, text bytes).
+        """
+        n_base = len(self._base_rows)
+        if pos < n_base:
+            row = self._base_rows[pos]
+            text = self._base_text[int(row["text_start"]):int(row["text_end"])]
+            return row, text
+        tail_pos = pos - n_base
+        return np.array(self._tail_rows[tail_pos], dtype=ROW_DTYPE), self._tail_text[tail_pos]
+
+    def _row_dict(self, pos: int) -> Dict:
+        row, text = self._row(pos)
+        result = {
+            "text": bytes(text).decode("utf-8"),
+            "chunk_id": int(row["chunk_id"]),
+            "start_pos": int(row["start_pos"]),
+            "end_pos": int(row["end_pos"]),
+        }
+        file_name = self.file_names.get(int(row["file_idx"]))
+        doc_class = self.classes.get(int(row["class_idx"]))
+        if file_name is not None:
+            result["file_name"] = file_name
+        if doc_class is not None:
+            result["class"] = doc_class
+        result.update(self.extras.get(int(row["chunk_uid"]), {}))
+        return result
+
+    def get(self, uid: int) -> Optional[Dict]:
+        """
+        Materialize a single row as a chunk metadata dict, or None if the uid
+        is unknown or deleted.
+        """
+        uid = int(uid)
+        if uid in self.deleted:
+            return None
+        pos = self._position(uid)
+        return self._row_dict(pos) if pos >= 0 else None
+
+    def __getitem__(self, uid: int) -> Dict:
+        result = self.get(uid)
+        if result is None:
+            raise KeyError(f"No chunk with uid {uid}")
+        return result
+
+    def __iter__(self):
+        """
+        Iterate live rows as dicts, in uid order.
+        """
+        for pos in range(self.total_rows):
+            uid = int(self._row(pos)[0]["chunk_uid"])
+            if uid not in self.deleted:
+                yield self._row_dict(pos)
+
+    def get_rows(self, uids: Iterable[int]) -> List[Dict]:
+        """
+        Materialize only the requested rows (unknown/deleted uids are skipped).
+        """
+        rows = (self.get(uid) for uid in uids)
+        return [row for row in rows if row is not None]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Full column (e.g. "class_idx", "file_idx") across stored and appended
+        rows, including tombstoned ones.
+        """
+        base = np.asarray(self._base_rows[name])
+        if not self._tail_rows:
+            return base
+        tail = np.array(self._tail_rows, dtype=ROW_DTYPE)[name]
+        return np.concatenate([base, tail])
+
+    def live_uids(self) -> np.ndarray:
+        """
+        Uids of all non-deleted rows, ascending.
+        """
+        uids = self.column("chunk_uid")
+        if self.deleted:
+            uids = uids[~np.isin(uids, np.fromiter(self.deleted, dtype=np.int64))]
+        return uids
+
+    def set_document_fields(self, file_name: str, fields: Dict) -> None:
+        """
+        Store document-level fields (used by matching_uids filters).
+        """
+        if fields:
+            self.doc_fields[file_name] = dict(fields)
+        else:
+            self.doc_fields.pop(file_name, None)
+
+    def matching_uids(self, filters: Dict) -> np.ndarray:
+        """
+        Uids of live rows matching all filters.
+
+        Args:
+            filters: "class" and "file_name" take a value or a list of values;
+                any other key is matched against document fields with
+                field_matches(), e.g. {"date": {"gte": "2025-01-01"}}
+
+        Returns:
+            Matching uids, ascending
+        """
+        mask = np.ones(self.total_rows, dtype=bool)
+        for key, condition in filters.items():
+            if key == "class":
+                table, column, values = self.classes, "class_idx", _as_list(condition)
+            elif key == "file_name":
+                table, column, values = self.file_names, "file_idx", _as_list(condition)
+            else:
+                # Resolve document field conditions to the set of matching documents
+                table, column = self.file_names, "file_idx"
+                values = [
+                    name for name, fields in self.doc_fields.items()
+                    if key in fields and field_matches(fields[key], condition)
+                ]
+            ids = [idx for idx in (table.lookup(value) for value in values) if idx >= 0]
+            mask &= np.isin(self.column(column), ids)
+            if not mask.any():
+                return np.zeros(0, dtype=np.int64)
+
+        uids = self.column("chunk_uid")[mask]
+        if self.deleted:
+            uids = uids[~np.isin(uids, np.fromiter(self.deleted, dtype=np.int64))]
+        return uids
+
+    def uids_for_file(self, file_name: str) -> np.ndarray:
+        """
+        Uids of the live rows belonging to a document.
+        """
+        file_idx = self.file_names.lookup(file_name)
+        if file_idx < 0:
+            return np.zeros(0, dtype=np.int64)
+        uids = self.column("chunk_uid")[self.column("file_idx") == file_idx]
+        if self.deleted:
+            uids = uids[~np.isin(uids, np.fromiter(self.deleted, dtype=np.int64))]
+        return uids
+
+    def delete(self, uids: Iterable[int]) -> None:
+        """
+        Tombstone rows; they disappear from lookups immediately and from
+        storage on the next compact().
+        """
+        for uid in uids:
+            uid = int(uid)
+            self.deleted.add(uid)
+            self.extras.pop(uid, None)
+
+    @property
+    def deleted_ratio(self) -> float:
+        return len(self.deleted) / self.total_rows if self.total_rows else 0.0
+
+    def compact(self) -> None:
+        """
+        Drop tombstoned rows and their text, keeping uids unchanged.
+        """
+        if not self.deleted:
+            return
+        records = self.records()
+        keep = ~np.isin(records["chunk_uid"], np.fromiter(self.deleted, dtype=np.int64))
+
+        texts = []
+        for pos in np.flatnonzero(keep):
+            texts.append(bytes(self._row(int(pos))[1]))
+        records = records[keep].copy()
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        ends = np.cumsum(lengths)
+        records["text_start"] = ends - lengths
+        records["text_end"] = ends
+
+        self._base_rows = records
+        self._base_text = b"".join(texts)
+        self._tail_rows, self._tail_text, self._tail_text_size = [], [], 0
+        self.deleted = set()
+
+    def save(self, directory: Path) -> None:
+        """
+        Write the store to directory. Files are replaced atomically, so any
+        existing memory maps of the previous version stay valid.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        rows = self.records()
+        self._replace(directory / _ROWS_FILE, lambda f: np.save(f, rows))
+
+        def write_text(f):
+            f.write(self._base_text)
+            for text in self._tail_text:
+                f.write(text)
+        self._replace(directory / _TEXT_FILE, write_text)
+
+        tables = {
+            "file_names": self.file_names.values,
+            "classes": self.classes.values,
+            "extras": {str(uid): extra for uid, extra in self.extras.items()},
+            "deleted": sorted(self.deleted),
+            "doc_fields": self.doc_fields,
+            "next_uid": self.next_uid,
+        }
+        self._replace(directory / _TABLES_FILE, lambda f: f.write(json.dumps(tables).encode("utf-8")))
+
+        # Continue from the saved files so appended rows don't stay in memory
+        saved = self.load(directory)
+        self._base_rows, self._base_text = saved._base_rows, saved._base_text
+        self._tail_rows, self._tail_text, self._tail_text_size = [], [], 0
+
+    def records(self) -> np.ndarray:
+        """
+        All rows (including tombstoned ones) as one record array.
+        """
+        if not self._tail_rows:
+            return np.asarray(self._base_rows)
+        tail = np.array(self._tail_rows, dtype=ROW_DTYPE)
+        return np.concatenate([np.asarray(self._base_rows), tail])
+
+    @staticmethod
+    def _replace(path: Path, write) -> None:
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        directory = Path(directory)
+        return all((directory / name).exists() for name in (_TABLES_FILE, _ROWS_FILE, _TEXT_FILE))
+
+    @classmethod
+    def load(cls, directory: Path) -> "ChunkMetadataStore":
+        """
+        Open a saved store. Row records and text are memory-mapped, not read.
+        """
+        directory = Path(directory)
+        store = cls()
+        with open(directory / _TABLES_FILE, "r", encoding="utf-8") as f:
+            tables = json.load(f)
+        store.file_names = StringTable(tables["file_names"])
+        store.classes = StringTable(tables["classes"])
+        store.extras = {int(uid): extra for uid, extra in tables.get("extras", {}).items()}
+        store.deleted = set(tables.get("deleted", []))
+        store.doc_fields = tables.get("doc_fields", {})
+
+        store._base_rows = np.load(directory / _ROWS_FILE, mmap_mode="r")
+        store.next_uid = tables.get("next_uid", len(store._base_rows))
+        text_path = directory / _TEXT_FILE
+        if text_path.stat().st_size > 0:
+            with open(text_path, "rb") as f:
+                store._base_text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return store
+
+    @classmethod
+    def from_dicts(cls, rows: Iterable[Dict]) -> "ChunkMetadataStore":
+        """
+        Build a store from a list of metadata dicts (e.g. a legacy pickled store).
+        Uids are assigned 0..n-1, matching the positions of a legacy index.
+        """
+        store = cls()
+        store.extend(rows)
+        return store
@@ -0,0 +1,114 @@
+"""
+Model registry module: Process-wide, lazily loaded SentenceTransformer instances.
+
+The classifier, the embedder and the search engine all draw their model from
+here, so a process that classifies and indexes loads the weights only once.
+sentence_transformers (and with it torch) is only imported when the first
+model is loaded, so importing this module is cheap.
+
+Models are registered per inference backend (EMBEDDING_BACKEND): "torch"
+loads a SentenceTransformer, "onnx" and "onnx-int8" an OnnxEncoder (see
+onnx_backend.py), which has the same encode() interface.
+"""
+
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterable
+from src.config import EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+_models: Dict[str, "SentenceTransformer"] = {}
+_load_times: Dict[str, Dict[str, float]] = {}
+_registry_lock = threading.Lock()
+_model_locks: Dict[str, threading.Lock] = {}
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def _lock_for(model_name: str) -> threading.Lock:
+    with _registry_lock:
+        return _model_locks.setdefault(model_name, threading.Lock())
+
+
+def model_key(model_name: str = EMBEDDING_MODEL_NAME, backend: str = EMBEDDING_BACKEND) -> str:
+    """
+    Name a model is registered under, also used to key its embedding cache
+    entries: the model name, suffixed with the backend unless it is torch
+    (backends produce slightly different embeddings).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def _load(model_name: str, backend: str):
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    from src.embeddings.onnx_backend import load_onnx_model
+    return load_onnx_model(model_name, quantized=backend == "onnx-int8")
+
+
+def get_model(model_name: str = EMBEDDING_MODEL_NAME, backend: str = EMBEDDING_BACKEND) -> "SentenceTransformer":
+    """
+    Return the shared model instance, loading it on first use.
+    Concurrent callers asking for the same model wait for a single load.
+
+    Args:
+        model_name: Name of the SentenceTransformer model
+        backend: "torch", "onnx" or "onnx-int8" (exported on first use)
+    """
+    key = model_key(model_name, backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock_for(key):
+        model = _models.get(key)
+        if model is None:
+            start = time.perf_counter()
+            model = _load(model_name, backend)
+            _load_times.setdefault(key, {})["load_seconds"] = time.perf_counter() - start
+            _models[key] = model
+    return model
+
+
+def warmup(model_names: Iterable[str] = (EMBEDDING_MODEL_NAME,), backend: str = EMBEDDING_BACKEND) -> None:
+    """
+    Load models ahead of time and run one small encode so the first real
+    request doesn't pay for lazy initialization.
+
+    Args:
+        model_names: Models to warm up
+        backend: Inference backend of the models
+    """
+    for model_name in model_names:
+        model = get_model(model_name, backend)
+        start = time.perf_counter()
+        model.encode(["warmup"], show_progress_bar=False)
+        _load_times.setdefault(model_key(model_name, backend), {})["warmup_seconds"] = time.perf_counter() - start
+
+
+def is_loaded(model_name: str = EMBEDDING_MODEL_NAME, backend: str = EMBEDDING_BACKEND) -> bool:
+    """
+    Whether a model has already been loaded in this process.
+    """
+    return model_key(model_name, backend) in _models
+
+
+def get_startup_report() -> Dict[str, Dict[str, float]]:
+    """
+    Load and warmup times (in seconds) for every model loaded so far.
+    """
+    return {name: dict(times) for name, times in _load_times.items()}
+
+
+def clear() -> None:
+    """
+    Drop all loaded models (mainly to free memory).
+    """
+    with _registry_lock:
+        _models.clear()
+        _load_times.clear()
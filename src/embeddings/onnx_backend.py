@@ -0,0 +1,316 @@
+"""
+ONNX backend module: Embedding models exported to ONNX and run with ONNX Runtime.
+
+export_model() converts a SentenceTransformer (transformer, pooling and
+normalization in one graph) to ONNX once, under ONNX_MODEL_DIR, and can
+quantize its weights to int8 (dynamic quantization: activations stay float
+and are quantized on the fly, so no calibration data is needed).
+
+OnnxEncoder runs an exported model with onnxruntime. It implements the part
+of the SentenceTransformer interface the classifier, embedder, scheduler and
+chunker use (encode, tokenizer, max_seq_length, get_sentence_embedding_dimension),
+so the model registry can hand it out in place of the torch model
+(EMBEDDING_BACKEND = "onnx" or "onnx-int8").
+
+Requires onnxruntime, plus onnx for exporting and quantizing.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from src.config import ONNX_MODEL_DIR, ONNX_INTRA_OP_THREADS, ONNX_INTER_OP_THREADS
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_int8.onnx"
+METADATA_FILE = "encoder.json"
+
+# Bump when the exported graph changes so models are exported again
+EXPORT_VERSION = 1
+
+
+def export_dir(model_name: str, directory: Path = ONNX_MODEL_DIR) -> Path:
+    """
+    Directory an exported model is stored in.
+    """
+    return Path(directory) / model_name.replace("/", "--")
+
+
+def _pooling(model) -> Dict:
+    """
+    Pooling mode ("mean", "cls" or "max") and whether embeddings are normalized,
+    read from a SentenceTransformer's modules.
+    """
+    pooling, normalize = "mean", False
+    for module in list(model)[1:]:
+        name = type(module).__name__
+        if name == "Pooling":
+            config = module.get_config_dict()
+            if "pooling_mode" in config:
+                pooling = config["pooling_mode"]
+            else:
+                # sentence-transformers < 5: one boolean per mode
+                modes = [mode for mode in ("cls", "mean", "max") if config.get(f"pooling_mode_{mode}_token{'' if mode == 'cls' else 's'}")]
+                pooling = modes[0] if len(modes) == 1 else "+".join(modes)
+        elif name == "Normalize":
+            normalize = True
+        else:
+            raise ValueError(f"Can't export a model with a {name} module to ONNX")
+    if pooling not in ("mean", "cls", "max"):
+        raise ValueError(f"Can't export pooling mode {pooling} to ONNX")
+    return {"pooling": pooling, "normalize": normalize}
+
+
+def _export_graph(model, path: Path, inputs: List[str], pooling: str, normalize: bool, opset: int) -> None:
+    """
+    Export transformer + pooling (+ normalization) as one ONNX graph with
+    dynamic batch and sequence axes.
+    """
+    import torch
+
+    class Pooled(torch.nn.Module):
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            kwargs = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if token_type_ids is not None:
+                kwargs["token_type_ids"] = token_type_ids
+            hidden = self.transformer(**kwargs)[0]
+            mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+            if pooling == "cls":
+                embedding = hidden[:, 0]
+            elif pooling == "max":
+                embedding = (hidden - (1 - mask) * 1e9).max(dim=1).values
+            else:
+                embedding = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            if normalize:
+                embedding = torch.nn.functional.normalize(embedding, p=2, dim=1)
+            return embedding
+
+    transformer = model[0].auto_model.eval()
+    sample = model.tokenizer(["export sample", "a somewhat longer export sample"], padding=True, return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            Pooled(transformer),
+            tuple(sample[name] for name in inputs),
+            str(path),
+            input_names=inputs,
+            output_names=["sentence_embedding"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in inputs}, "sentence_embedding": {0: "batch"}},
+            opset_version=opset,
+            dynamo=False
+        )
+
+
+def quantize_model(source: Path, target: Path, per_channel: bool = True) -> None:
+    """
+    Dynamic int8 quantization of an exported model's weights (MatMul/Gemm).
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        quantize_dynamic(str(source), str(tmp), weight_type=QuantType.QInt8, per_channel=per_channel)
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def export_model(model_name: str, directory: Path = ONNX_MODEL_DIR, quantize: bool = True, opset: int = 17) -> Path:
+    """
+    Export a SentenceTransformer to ONNX (and its int8-quantized version),
+    unless an export of the current EXPORT_VERSION already exists.
+
+    Args:
+        model_name: Name or path of the SentenceTransformer model
+        directory: Parent directory of exported models
+        quantize: Also write the int8-quantized model
+        opset: ONNX opset version
+
+    Returns:
+        Directory holding the ONNX files, tokenizer and metadata
+    """
+    target = export_dir(model_name, directory)
+    metadata = _read_metadata(target)
+    if metadata is not None and metadata["export_version"] == EXPORT_VERSION:
+        if quantize and not (target / QUANTIZED_MODEL_FILE).exists():
+            quantize_model(target / MODEL_FILE, target / QUANTIZED_MODEL_FILE)
+        return target
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device="cpu")
+    forward_inputs = ("input_ids", "attention_mask", "token_type_ids")
+    sample_inputs = model.tokenizer(["sample"], return_tensors="np").keys()
+    inputs = [name for name in forward_inputs if name in sample_inputs]
+    pooling = _pooling(model)
+
+    # Exported into a temporary directory and renamed into place, so a
+    # concurrent or interrupted export never leaves a partial model behind
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=target.parent, prefix=f".{target.name}."))
+    try:
+        _export_graph(model, tmp / MODEL_FILE, inputs, pooling["pooling"], pooling["normalize"], opset)
+        if quantize:
+            quantize_model(tmp / MODEL_FILE, tmp / QUANTIZED_MODEL_FILE)
+        model.tokenizer.save_pretrained(str(tmp))
+        with open(tmp / METADATA_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "export_version": EXPORT_VERSION,
+                "model_name": model_name,
+                "inputs": inputs,
+                "max_seq_length": model.max_seq_length,
+                "dimension": model.get_sentence_embedding_dimension(),
+                **pooling
+            }, f, indent=2)
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return target
+
+
+def _read_metadata(directory: Path) -> Optional[Dict]:
+    try:
+        with open(Path(directory) / METADATA_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def session_options(intra_op_threads: Optional[int] = ONNX_INTRA_OP_THREADS, inter_op_threads: Optional[int] = ONNX_INTER_OP_THREADS):
+    """
+    onnxruntime session options: all graph optimizations, sequential
+    execution unless inter_op_threads > 1, and the given thread counts
+    (None = onnxruntime's default).
+    """
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if inter_op_threads is not None and inter_op_threads > 1:
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    else:
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    if intra_op_threads is not None:
+        options.intra_op_num_threads = intra_op_threads
+    if inter_op_threads is not None:
+        options.inter_op_num_threads = inter_op_threads
+    return options
+
+
+class OnnxEncoder:
+    """
+    Sentence embeddings from an exported ONNX model, with the encode()
+    interface of SentenceTransformer.
+    """
+
+    device = "cpu"
+
+    def __init__(
+        self,
+        directory: Path,
+        quantized: bool = False,
+        intra_op_threads: Optional[int] = ONNX_INTRA_OP_THREADS,
+        inter_op_threads: Optional[int] = ONNX_INTER_OP_THREADS
+    ):
+        """
+        Args:
+            directory: Export directory (see export_model())
+            quantized: Run the int8-quantized model
+            intra_op_threads: Threads used within an operator (None = one per physical core)
+            inter_op_threads: Threads running independent operators in parallel
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        directory = Path(directory)
+        metadata = _read_metadata(directory)
+        if metadata is None:
+            raise FileNotFoundError(f"No exported model in {directory}")
+        self.directory = directory
+        self.quantized = quantized
+        self.inputs = metadata["inputs"]
+        self.max_seq_length = metadata["max_seq_length"]
+        self.dimension = metadata["dimension"]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(directory))
+        self.session = ort.InferenceSession(
+            str(directory / (QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)),
+            sess_options=session_options(intra_op_threads, inter_op_threads),
+            providers=["CPUExecutionProvider"]
+        )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    get_embedding_dimension = get_sentence_embedding_dimension
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np")
+        feeds = {name: encoded[name].astype(np.int64) for name in self.inputs}
+        return self.session.run(None, feeds)[0]
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        convert_to_tensor: bool = False,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ):
+        """
+        Embed sentences like SentenceTransformer.encode: batches are formed
+        from length-sorted sentences and results come back in input order.
+
+        Returns:
+            float32 array of shape (len(sentences), dim) (1-D for a single
+            string), or a torch tensor if convert_to_tensor
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._encode_batch([texts[i] for i in batch])
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        if single:
+            embeddings = embeddings[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(embeddings)
+        return embeddings
+
+
+def load_onnx_model(
+    model_name: str,
+    quantized: bool = False,
+    directory: Path = ONNX_MODEL_DIR,
+    intra_op_threads: Optional[int] = ONNX_INTRA_OP_THREADS,
+    inter_op_threads: Optional[int] = ONNX_INTER_OP_THREADS
+) -> OnnxEncoder:
+    """
+    OnnxEncoder for a model, exporting it on first use.
+
+    Args:
+        model_name: Name or path of the SentenceTransformer model
+        quantized: Run the int8-quantized model
+        directory: Parent directory of exported models
+        intra_op_threads: Threads used within an operator (None = one per physical core)
+        inter_op_threads: Threads running independent operators in parallel
+    """
+    return OnnxEncoder(
+        export_model(model_name, directory, quantize=quantized),
+        quantized=quantized,
+        intra_op_threads=intra_op_threads,
+        inter_op_threads=inter_op_threads
+    )
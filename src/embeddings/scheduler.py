@@ -0,0 +1,156 @@
+"""
+Embedding scheduler module: Length-bucketed, token-budgeted batching.
+
+The model pads every batch to its longest text, so a fixed batch size either
+wastes compute on padding (short chunks batched with long ones) or leaves
+batches underfilled (a small document's few chunks). The scheduler takes
+all texts to embed at once, sorts them by (estimated) token length and cuts
+the sorted list into batches whose padded size, batch size x longest text,
+stays within a token budget: many short texts per batch, fewer long ones.
+Embeddings are written back in input order.
+"""
+
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Optional
+from src.config import EMBED_TOKEN_BUDGET, EMBED_MAX_BATCH_SIZE, EMBED_CHARS_PER_TOKEN, EMBED_EXACT_LENGTHS
+
+
+def plan_batches(lengths: np.ndarray, token_budget: int, max_batch_size: int) -> List[np.ndarray]:
+    """
+    Group text indices into batches, longest texts first.
+
+    Args:
+        lengths: Token length per text
+        token_budget: Maximum padded tokens (batch size x longest length) per batch
+        max_batch_size: Maximum texts per batch
+
+    Returns:
+        List of index arrays into lengths; every index appears exactly once
+    """
+    order = np.argsort(-np.asarray(lengths), kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        # Sorted descending, so the first text of a batch is its longest
+        longest = max(int(lengths[order[start]]), 1)
+        size = max(1, min(max_batch_size, token_budget // longest))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+class EmbeddingScheduler:
+    """
+    Encodes texts in length-sorted batches sized to a token budget.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = EMBED_TOKEN_BUDGET,
+        max_batch_size: int = EMBED_MAX_BATCH_SIZE,
+        chars_per_token: float = EMBED_CHARS_PER_TOKEN,
+        exact_lengths: bool = EMBED_EXACT_LENGTHS
+    ):
+        """
+        Args:
+            token_budget: Maximum padded tokens per batch
+            max_batch_size: Maximum texts per batch
+            chars_per_token: Characters per token used to estimate lengths
+            exact_lengths: Measure lengths with the model's tokenizer instead
+        """
+        self.token_budget = token_budget
+        self.max_batch_size = max_batch_size
+        self.chars_per_token = chars_per_token
+        self.exact_lengths = exact_lengths
+        self._lock = threading.Lock()
+        self.texts = 0
+        self.batches = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+        self.seconds = 0.0
+
+    def token_lengths(self, model, texts: List[str]) -> np.ndarray:
+        """
+        Token length of each text (with special tokens), capped at the model's
+        max sequence length as the model truncates longer texts.
+        """
+        max_length = getattr(model, "max_seq_length", None)
+        tokenizer = getattr(model, "tokenizer", None)
+        if self.exact_lengths and tokenizer is not None:
+            encoded = tokenizer(
+                texts,
+                add_special_tokens=True,
+                truncation=max_length is not None,
+                max_length=max_length,
+                return_attention_mask=False,
+                return_token_type_ids=False
+            )
+            lengths = np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(texts))
+        else:
+            chars = np.fromiter((len(text) for text in texts), dtype=np.float64, count=len(texts))
+            lengths = np.ceil(chars / self.chars_per_token).astype(np.int64) + 2
+        if max_length:
+            lengths = np.minimum(lengths, max_length)
+        return lengths
+
+    def encode(self, model, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts in scheduled batches.
+
+        Args:
+            model: SentenceTransformer (or compatible) model
+            texts: Texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), dim), in input order
+        """
+        if not texts:
+            return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        start = time.perf_counter()
+        lengths = self.token_lengths(model, texts)
+        embeddings: Optional[np.ndarray] = None
+        padded = 0
+        batches = plan_batches(lengths, self.token_budget, self.max_batch_size)
+        for batch in batches:
+            encoded = model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            encoded = np.asarray(encoded, dtype=np.float32)
+            if embeddings is None:
+                embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            embeddings[batch] = encoded
+            padded += len(batch) * int(lengths[batch[0]])
+
+        with self._lock:
+            self.texts += len(texts)
+            self.batches += len(batches)
+            self.tokens += int(lengths.sum())
+            self.padded_tokens += padded
+            self.seconds += time.perf_counter() - start
+        return embeddings
+
+    def get_stats(self) -> Dict:
+        """
+        Get throughput statistics.
+
+        Returns:
+            Dict with texts and batches encoded, chunks_per_sec, mean batch
+            size and padding efficiency (real / padded tokens, estimated
+            unless exact_lengths)
+        """
+        with self._lock:
+            return {
+                "texts": self.texts,
+                "batches": self.batches,
+                "seconds": self.seconds,
+                "chunks_per_sec": self.texts / self.seconds if self.seconds else 0.0,
+                "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+                "padding_efficiency": self.tokens / self.padded_tokens if self.padded_tokens else 1.0,
+                "token_budget": self.token_budget
+            }
@@ -2,93 +2,613 @@
 Vector store module: Handles FAISS index creation, saving, loading, and similarity search.
 """
 
+import math
 import os
 import pickle
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 import faiss
 from pathlib import Path
-from src.config import FAISS_INDEX_PATH, TOP_K_RESULTS
+from src.embeddings.chunker import DocumentChunks
+from src.embeddings.metadata_store import ChunkMetadataStore
+from src.instrumentation import timed
+from src.config import (
+    FAISS_INDEX_PATH, TOP_K_RESULTS, FAISS_INDEX_TYPE, FAISS_AUTO_IVF_THRESHOLD,
+    FAISS_AUTO_PQ_THRESHOLD, FAISS_MIN_TRAIN_SIZE, FAISS_NLIST, FAISS_NPROBE,
+    FAISS_PQ_M, FAISS_HNSW_M, FAISS_HNSW_EF_CONSTRUCTION, FAISS_EF_SEARCH,
+    FAISS_FILTER_EXACT_MAX, FAISS_RETRAIN_GROWTH, VECTOR_STORE_COMPACT_RATIO, VECTOR_STORE_PRECISION
+)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# Storage precision of flat, IVF-Flat and HNSW vectors (IVF-PQ has its own codes)
+PRECISIONS = ("float32", "float16", "int8")
+_SQ_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit
+}
+
+# 8-bit PQ trains 256 centroids per sub-quantizer; FAISS wants ~39 points each
+PQ_MIN_TRAIN_SIZE = 39 * 256
+
+
+def select_index_type(ntotal: int) -> str:
+    """
+    Pick an index type for a store holding ntotal vectors.
+    Exact search is fast enough for small stores; IVF trades a little recall
+    for sublinear search, and PQ compresses vectors once memory dominates.
+    """
+    if ntotal < FAISS_AUTO_IVF_THRESHOLD:
+        return "flat"
+    if ntotal < FAISS_AUTO_PQ_THRESHOLD:
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def _choose_nlist(ntotal: int) -> int:
+    """
+    Number of IVF cells: ~4*sqrt(n), keeping at least 39 training points per cell.
+    """
+    nlist = FAISS_NLIST or int(4 * math.sqrt(ntotal))
+    return max(1, min(nlist, ntotal // 39))
+
+
+def needs_training(index_type: str, precision: str = "float32") -> bool:
+    """
+    Whether an index of this type and precision must be trained before use:
+    IVF quantizers, and int8 scalar quantization (which learns value ranges).
+    """
+    return index_type in ("ivf_flat", "ivf_pq") or precision == "int8"
+
+
+def create_index(
+    index_type: str,
+    embedding_dim: int,
+    training_vectors: Optional[np.ndarray] = None,
+    precision: str = "float32"
+) -> faiss.Index:
+    """
+    Create an empty FAISS index of the given type.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        embedding_dim: Dimension of the vectors
+        training_vectors: Vectors to train on (required when needs_training())
+        precision: One of PRECISIONS; float16 and int8 store scalar-quantized
+            vectors (2 and 1 bytes per dimension). Ignored for ivf_pq.
+
+    Returns:
+        Trained, empty FAISS index
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (expected one of {PRECISIONS})")
+    if needs_training(index_type, precision) and (training_vectors is None or len(training_vectors) == 0):
+        raise ValueError(f"Index type {index_type} with {precision} precision needs training vectors")
+    qtype = _SQ_TYPES.get(precision)
+
+    if index_type in ("flat", "hnsw"):
+        if index_type == "flat":
+            if qtype is None:
+                return faiss.IndexFlatL2(embedding_dim)
+            index = faiss.IndexScalarQuantizer(embedding_dim, qtype, faiss.METRIC_L2)
+        else:
+            if qtype is None:
+                index = faiss.IndexHNSWFlat(embedding_dim, FAISS_HNSW_M)
+            else:
+                index = faiss.IndexHNSWSQ(embedding_dim, qtype, FAISS_HNSW_M)
+            index.hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+        if not index.is_trained:
+            index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+        return index
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = _choose_nlist(len(training_vectors))
+        quantizer = faiss.IndexFlatL2(embedding_dim)
+        if index_type == "ivf_pq":
+            if embedding_dim % FAISS_PQ_M != 0:
+                raise ValueError(f"FAISS_PQ_M={FAISS_PQ_M} must divide embedding dim {embedding_dim}")
+            index = faiss.IndexIVFPQ(quantizer, embedding_dim, nlist, FAISS_PQ_M, 8)
+        elif qtype is not None:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, embedding_dim, nlist, qtype, faiss.METRIC_L2)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, embedding_dim, nlist)
+        index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+        # Keep arbitrary chunk ids addressable for reconstruct() and remove_ids()
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        index.nprobe = FAISS_NPROBE
+        return index
+
+    raise ValueError(f"Unknown index type: {index_type} (expected one of {INDEX_TYPES})")
+
+
+def with_ids(index: faiss.Index) -> faiss.Index:
+    """
+    Make an index accept caller-chosen ids (add_with_ids). IVF indexes store
+    ids natively; other types are wrapped in an IndexIDMap2.
+    """
+    if isinstance(faiss.downcast_index(index), faiss.IndexIVF):
+        return index
+    return faiss.IndexIDMap2(index)
+
+
+def unwrap_index(index: faiss.Index) -> faiss.Index:
+    """
+    The underlying index, with any id-map wrapper removed.
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """
+    Whether vectors can be physically removed (HNSW graphs can't drop nodes).
+    """
+    return not isinstance(unwrap_index(index), faiss.IndexHNSW)
+
+
+def detect_index_type(index: faiss.Index) -> str:
+    """
+    Map a FAISS index object back to its INDEX_TYPES name.
+    """
+    index = unwrap_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def detect_precision(index: faiss.Index) -> str:
+    """
+    Storage precision of an index's vectors (one of PRECISIONS, or "pq").
+    """
+    index = unwrap_index(index)
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "pq"
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        for precision, qtype in _SQ_TYPES.items():
+            if index.sq.qtype == qtype:
+                return precision
+    return "float32"
+
+
+def set_search_params(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+    """
+    Apply query-time parameters (IVF nprobe, HNSW efSearch) where the index supports them.
+    """
+    index = unwrap_index(index)
+    if nprobe is not None and isinstance(index, faiss.IndexIVF):
+        index.nprobe = nprobe
+    if ef_search is not None and isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
 
 
 class VectorStore:
     """
     FAISS-based vector store for document chunk embeddings.
+
+    Each chunk gets a stable uid, used both as its FAISS id and as its key in
+    the metadata store, so documents can be removed or replaced in place.
     """
     
-    def __init__(self, embedding_dim: int = 384, index_path: Path = FAISS_INDEX_PATH):
+    def __init__(
+        self,
+        embedding_dim: int = 384,
+        index_path: Path = FAISS_INDEX_PATH,
+        index_type: str = FAISS_INDEX_TYPE,
+        precision: str = VECTOR_STORE_PRECISION
+    ):
         """
         Initialize vector store.
         
         Args:
             embedding_dim: Dimension of embeddings (384 for all-MiniLM-L6-v2)
             index_path: Path to save/load FAISS index
+            index_type: One of INDEX_TYPES, or "auto" to choose from the number of chunks
+            precision: Vector storage precision, one of PRECISIONS. int8 needs
+                training, so the store keeps float32 vectors until FAISS_MIN_TRAIN_SIZE chunks exist
         """
+        if index_type != "auto" and index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type} (expected 'auto' or one of {INDEX_TYPES})")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision} (expected one of {PRECISIONS})")
         self.embedding_dim = embedding_dim
         self.index_path = Path(index_path)
-        self.metadata_path = self.index_path.parent / "metadata.pkl"
+        self.metadata_path = self.index_path.parent / "chunk_metadata"
+        self.legacy_metadata_path = self.index_path.parent / "metadata.pkl"
+        self.index_type = index_type
+        self.precision = precision
         
         # Create FAISS index
-        self.index = faiss.IndexFlatL2(embedding_dim)
-        self.chunks_metadata = []  # List of chunk metadata dicts
+        self.index = self._empty_index()
+        self.chunks_metadata = ChunkMetadataStore()  # Columnar chunk metadata, keyed by FAISS id
+        self.version = 0  # Bumped on every change, so callers can invalidate cached results
+    
+    def _empty_index(self) -> faiss.Index:
+        """
+        Starting index: types that need training (IVF, int8) begin as float32
+        flat until there is enough data to train on.
+        """
+        index_type = "hnsw" if self.index_type == "hnsw" else "flat"
+        precision = "float32" if needs_training(index_type, self.precision) else self.precision
+        return with_ids(create_index(index_type, self.embedding_dim, precision=precision))
+    
+    @property
+    def stale_vectors(self) -> int:
+        """
+        Vectors of removed chunks still physically in the index (HNSW only);
+        they are skipped at search time and dropped on compact().
+        """
+        return max(0, self.index.ntotal - len(self.chunks_metadata))
     
-    def add_chunks(self, chunks: List[Dict]) -> None:
+    @property
+    def current_index_type(self) -> str:
+        """
+        Type of the index currently in use.
+        """
+        return detect_index_type(self.index)
+    
+    @property
+    def current_precision(self) -> str:
+        """
+        Storage precision of the index currently in use.
+        """
+        return detect_precision(self.index)
+    
+    def _target_index_type(self) -> str:
+        if self.index_type == "auto":
+            return select_index_type(self.index.ntotal)
+        return self.index_type
+    
+    def _nlist_outgrown(self) -> bool:
+        """
+        Whether the store has grown enough since its IVF quantizer was trained
+        that the nlist chosen now is more than FAISS_RETRAIN_GROWTH times the trained one.
+        """
+        index = unwrap_index(self.index)
+        if not isinstance(index, faiss.IndexIVF):
+            return False
+        return _choose_nlist(index.ntotal) > FAISS_RETRAIN_GROWTH * index.nlist
+
+    def _maybe_rebuild(self) -> None:
+        """
+        Switch to the configured (or auto-selected) index type and precision
+        once enough vectors exist to train it, and retrain ivf_flat indexes
+        whose nlist the store has outgrown.
+        """
+        target = self._target_index_type()
+        current = self.current_index_type
+        if current == "ivf_pq":
+            # PQ codes can't be reconstructed exactly, so never rebuild from them
+            return
+        if target == current == "ivf_flat" and self._nlist_outgrown():
+            self.rebuild(target)
+            return
+        if target == current and (target == "ivf_pq" or self.current_precision == self.precision):
+            return
+        if needs_training(target, self.precision) and self.index.ntotal < FAISS_MIN_TRAIN_SIZE:
+            return
+        if target == "ivf_pq" and self.index.ntotal < max(FAISS_MIN_TRAIN_SIZE, PQ_MIN_TRAIN_SIZE):
+            return
+        self.rebuild(target)
+    
+    def rebuild(self, index_type: str, precision: Optional[str] = None) -> None:
+        """
+        Rebuild the index as index_type from the live vectors currently stored,
+        training IVF / int8 quantizers on them. Chunk uids (and metadata) are unchanged.
+        
+        Args:
+            index_type: One of INDEX_TYPES
+            precision: One of PRECISIONS (defaults to the store's precision)
+        """
+        uids, vectors = self.get_ids_and_vectors()
+        index = with_ids(create_index(
+            index_type,
+            self.embedding_dim,
+            training_vectors=vectors,
+            precision=precision or self.precision
+        ))
+        if len(uids):
+            index.add_with_ids(vectors, uids)
+        self.index = index
+        self.version += 1
+    
+    def get_ids_and_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Uids and vectors of all live chunks, in uid order (vectors are approximate for PQ indexes).
+        """
+        uids = self.chunks_metadata.live_uids()
+        if len(uids) == 0:
+            return uids, np.zeros((0, self.embedding_dim), dtype=np.float32)
+        return uids, self.index.reconstruct_batch(uids)
+    
+    def get_vectors(self) -> np.ndarray:
+        """
+        All live vectors, in uid order (approximate for PQ indexes).
+        """
+        return self.get_ids_and_vectors()[1]
+    
+    def add_chunks(self, chunks: Union[List[Dict], List[DocumentChunks], DocumentChunks], embeddings: Optional[np.ndarray] = None) -> None:
         """
         Add embedded chunks to the vector store.
         
         Args:
-            chunks: List of chunk dicts with 'embedding' and metadata
+            chunks: List of chunk dicts with metadata (and 'embedding' unless
+                embeddings is given), or compact DocumentChunks (one or a list)
+            embeddings: Optional float32 array of shape (number of chunks, dim), used
+                instead of the chunks' 'embedding' values (required for DocumentChunks)
         """
+        if isinstance(chunks, DocumentChunks):
+            chunks = [chunks]
+        if chunks and isinstance(chunks[0], DocumentChunks):
+            with timed("index", items=sum(len(document) for document in chunks)):
+                self._add_document_chunks(chunks, embeddings)
+            return
         if not chunks:
             return
         
-        embeddings = np.array([chunk["embedding"] for chunk in chunks], dtype=np.float32)
-        self.index.add(embeddings)
+        with timed("index", items=len(chunks)):
+            if embeddings is None:
+                embeddings = np.stack([np.asarray(chunk["embedding"], dtype=np.float32) for chunk in chunks])
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+            
+            # Store metadata (without embeddings to save space); the returned uids become FAISS ids
+            uids = np.array([
+                self.chunks_metadata.append({k: v for k, v in chunk.items() if k != "embedding"})
+                for chunk in chunks
+            ], dtype=np.int64)
+            self.index.add_with_ids(embeddings, uids)
+            self.version += 1
+            
+            self._maybe_rebuild()
+    
+    def _add_document_chunks(self, documents: List[DocumentChunks], embeddings: np.ndarray) -> None:
+        """
+        Add compact per-document chunks; rows are appended straight from their offset arrays.
+        """
+        if embeddings is None:
+            raise ValueError("Embeddings are required when adding DocumentChunks")
+        if sum(len(document) for document in documents) == 0:
+            return
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        uids = np.concatenate([self.chunks_metadata.append_chunks(document) for document in documents])
+        self.index.add_with_ids(embeddings, uids)
+        self.version += 1
+        
+        self._maybe_rebuild()
+    
+    def remove_document(self, file_name: str) -> int:
+        """
+        Remove all chunks of a document.
+        
+        Args:
+            file_name: Document whose chunks should be removed
+            
+        Returns:
+            Number of chunks removed
+        """
+        uids = self.chunks_metadata.uids_for_file(file_name)
+        if len(uids) == 0:
+            return 0
+        if supports_remove(self.index):
+            self.index.remove_ids(uids)
+        self.chunks_metadata.delete(uids)
+        self.set_document_fields(file_name, None)
+        return len(uids)
+    
+    def upsert_document(
+        self,
+        file_name: str,
+        chunks: Union[List[Dict], DocumentChunks],
+        fields: Optional[Dict] = None,
+        embeddings: Optional[np.ndarray] = None
+    ) -> int:
+        """
+        Replace a document's chunks with new embedded chunks.
         
-        # Store metadata (without embeddings to save space)
-        for chunk in chunks:
-            metadata = {k: v for k, v in chunk.items() if k != "embedding"}
-            self.chunks_metadata.append(metadata)
+        Args:
+            file_name: Document to replace
+            chunks: Its new chunk dicts with metadata (and 'embedding' unless
+                embeddings is given), or its DocumentChunks
+            fields: Optional document-level fields for filtering (e.g. extracted date)
+            embeddings: Optional float32 array of the chunks' embeddings
+            
+        Returns:
+            Number of chunks removed
+        """
+        removed = self.remove_document(file_name)
+        self.add_chunks(chunks, embeddings=embeddings)
+        self.set_document_fields(file_name, fields)
+        return removed
+    
+    def set_document_fields(self, file_name: str, fields: Optional[Dict]) -> None:
+        """
+        Attach document-level fields (e.g. extracted date, company) that
+        search filters can match on.
+        """
+        self.chunks_metadata.set_document_fields(file_name, fields)
+        self.version += 1
     
-    def search(self, query_embedding: List[float], k: int = TOP_K_RESULTS) -> List[Dict]:
+    def compact(self) -> None:
+        """
+        Physically drop removed chunks: rebuild HNSW indexes that still hold
+        their vectors and rewrite metadata without tombstoned rows.
+        """
+        if self.stale_vectors:
+            self.rebuild(self.current_index_type, precision=self.current_precision)
+        self.chunks_metadata.compact()
+        self.version += 1
+    
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int = TOP_K_RESULTS,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
         """
         Search for the k most similar chunks.
         
         Args:
             query_embedding: Query embedding vector
             k: Number of top results to return
-            
+            nprobe: IVF cells to visit (defaults to FAISS_NPROBE; higher = better recall, slower)
+            ef_search: HNSW candidate list size (defaults to FAISS_EF_SEARCH)
+            filters: Optional metadata filters, e.g. {"class": "Invoice",
+                "date": {"gte": "2025-01-01"}} (see ChunkMetadataStore.matching_uids).
+                Only matching chunks are searched, so k results are returned
+                whenever k matching chunks exist.
+        
         Returns:
             List of result dicts with chunk info and similarity distance
         """
-        if self.index.ntotal == 0:
-            return []
+        return self.search_many([query_embedding], k=k, nprobe=nprobe, ef_search=ef_search, filters=filters)[0]
+    
+    def search_many(
+        self,
+        query_embeddings: np.ndarray,
+        k: int = TOP_K_RESULTS,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[List[Dict]]:
+        """
+        Search for the k most similar chunks of several queries with a single
+        FAISS call over the query matrix.
+        
+        Args:
+            query_embeddings: Query embedding vectors, shape (n_queries, dim)
+            k: Number of top results per query
+            nprobe: IVF cells to visit (defaults to FAISS_NPROBE)
+            ef_search: HNSW candidate list size (defaults to FAISS_EF_SEARCH)
+            filters: Optional metadata filters applied to every query (see search())
+        
+        Returns:
+            One result list per query, in query order
+        """
+        query_vectors = np.ascontiguousarray(query_embeddings, dtype=np.float32).reshape(-1, self.embedding_dim)
+        if self.index.ntotal == 0 or len(self.chunks_metadata) == 0 or len(query_vectors) == 0:
+            return [[] for _ in range(len(query_vectors))]
+        
+        nprobe = nprobe if nprobe is not None else FAISS_NPROBE
+        ef_search = ef_search if ef_search is not None else FAISS_EF_SEARCH
+        
+        if filters:
+            return self._filtered_search(query_vectors, k, filters, nprobe, ef_search)
         
-        query_vector = np.array([query_embedding], dtype=np.float32)
-        distances, indices = self.index.search(query_vector, min(k, self.index.ntotal))
+        set_search_params(self.index, nprobe=nprobe, ef_search=ef_search)
         
+        # Over-fetch by the number of removed-but-not-compacted vectors so k live results remain
+        n_fetch = min(k + self.stale_vectors, self.index.ntotal)
+        distances, indices = self.index.search(query_vectors, n_fetch)
+        
+        return [self._to_results(d, i, k) for d, i in zip(distances, indices)]
+    
+    def _to_results(self, distances: np.ndarray, uids: np.ndarray, k: int) -> List[Dict]:
+        """
+        Turn FAISS (distance, uid) pairs into result dicts, skipping padding and removed chunks.
+        """
         results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx < len(self.chunks_metadata):
-                result = self.chunks_metadata[idx].copy()
-                result["distance"] = float(dist)
-                result["similarity_score"] = 1 / (1 + float(dist))  # Convert distance to similarity
-                results.append(result)
+        for dist, uid in zip(distances, uids):
+            # Approximate indexes pad with -1 when fewer than k neighbours are found
+            if uid < 0:
+                continue
+            result = self.chunks_metadata.get(uid)  # materializes just this row; None if removed
+            if result is None:
+                continue
+            result["distance"] = float(dist)
+            result["similarity_score"] = 1 / (1 + float(dist))  # Convert distance to similarity
+            results.append(result)
+            if len(results) == k:
+                break
         
         return results
     
+    def _filtered_search(self, query_vectors: np.ndarray, k: int, filters: Dict, nprobe: int, ef_search: int) -> List[List[Dict]]:
+        """
+        Search restricted to chunks matching filters.
+        Small candidate sets are scanned exactly; larger ones are searched in
+        FAISS with an id-selector bitmap, falling back to an exact scan for
+        queries where the approximate index returns fewer than k matches.
+        """
+        uids = self.chunks_metadata.matching_uids(filters)
+        if len(uids) == 0:
+            return [[] for _ in range(len(query_vectors))]
+        k = min(k, len(uids))
+        
+        if len(uids) <= FAISS_FILTER_EXACT_MAX:
+            return self._exact_search(query_vectors, uids, k)
+        
+        # Bitmap over the uid space; must stay alive for the duration of the search
+        mask = np.zeros(self.chunks_metadata.next_uid, dtype=bool)
+        mask[uids] = True
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        
+        index = unwrap_index(self.index)
+        if isinstance(index, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+        elif isinstance(index, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(ef_search, k))
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        
+        distances, indices = self.index.search(query_vectors, k, params=params)
+        results = [self._to_results(d, i, k) for d, i in zip(distances, indices)]
+        
+        # IVF cells / HNSW neighbourhoods visited held too few matches for these queries
+        short = [row for row, r in enumerate(results) if len(r) < k]
+        if short:
+            for row, exact in zip(short, self._exact_search(query_vectors[short], uids, k)):
+                results[row] = exact
+        return results
+    
+    def _exact_search(self, query_vectors: np.ndarray, uids: np.ndarray, k: int, batch_size: int = 65536) -> List[List[Dict]]:
+        """
+        Exact L2 top-k over the given uids for each query, reconstructing
+        their vectors in batches.
+        """
+        n_queries = len(query_vectors)
+        query_norms = (query_vectors ** 2).sum(axis=1)[:, None]
+        best_distances = np.zeros((n_queries, 0), dtype=np.float32)
+        best_uids = np.zeros((n_queries, 0), dtype=np.int64)
+        for start in range(0, len(uids), batch_size):
+            batch_uids = uids[start:start + batch_size]
+            vectors = self.index.reconstruct_batch(batch_uids)
+            distances = query_norms - 2 * query_vectors @ vectors.T + (vectors ** 2).sum(axis=1)[None, :]
+            best_distances = np.hstack([best_distances, np.maximum(distances, 0)])
+            best_uids = np.hstack([best_uids, np.broadcast_to(batch_uids, (n_queries, len(batch_uids)))])
+            if best_uids.shape[1] > k:
+                keep = np.argpartition(best_distances, k - 1, axis=1)[:, :k]
+                best_distances = np.take_along_axis(best_distances, keep, axis=1)
+                best_uids = np.take_along_axis(best_uids, keep, axis=1)
+        order = np.argsort(best_distances, axis=1)
+        best_distances = np.take_along_axis(best_distances, order, axis=1)
+        best_uids = np.take_along_axis(best_uids, order, axis=1)
+        return [self._to_results(d, u, k) for d, u in zip(best_distances, best_uids)]
+    
     def save(self) -> None:
         """
-        Save FAISS index and metadata to disk.
+        Save FAISS index and metadata to disk, compacting first once enough
+        chunks have been removed.
         """
+        if self.chunks_metadata.deleted_ratio >= VECTOR_STORE_COMPACT_RATIO:
+            self.compact()
+        
         self.index_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Save FAISS index
         faiss.write_index(self.index, str(self.index_path))
         
         # Save metadata
-        with open(self.metadata_path, "wb") as f:
-            pickle.dump(self.chunks_metadata, f)
+        self.chunks_metadata.save(self.metadata_path)
     
     def load(self) -> bool:
         """
@@ -97,18 +617,42 @@ class VectorStore:
         Returns:
             True if loaded successfully, False otherwise
         """
-        if not self.index_path.exists() or not self.metadata_path.exists():
+        has_metadata = ChunkMetadataStore.exists(self.metadata_path)
+        if not self.index_path.exists() or not (has_metadata or self.legacy_metadata_path.exists()):
             return False
         
         try:
             self.index = faiss.read_index(str(self.index_path))
-            with open(self.metadata_path, "rb") as f:
-                self.chunks_metadata = pickle.load(f)
+            if has_metadata:
+                self.chunks_metadata = ChunkMetadataStore.load(self.metadata_path)
+            else:
+                # Stores saved before the columnar format: convert the pickled dicts
+                with open(self.legacy_metadata_path, "rb") as f:
+                    self.chunks_metadata = ChunkMetadataStore.from_dicts(pickle.load(f))
+            self._upgrade_legacy_index()
+            self.version += 1
             return True
         except Exception as e:
             print(f"Error loading vector store: {e}")
             return False
     
+    def _upgrade_legacy_index(self) -> None:
+        """
+        Indexes saved before stable chunk ids used positions 0..n-1 as ids,
+        which is what from_dicts() assigns; give them explicit ids.
+        """
+        index = faiss.downcast_index(self.index)
+        if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            return
+        if isinstance(index, faiss.IndexIVF):
+            if index.direct_map.type != faiss.DirectMap.Hashtable:
+                index.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return
+        vectors = index.reconstruct_n(0, index.ntotal)
+        self.index = with_ids(create_index(detect_index_type(index), self.embedding_dim))
+        if len(vectors):
+            self.index.add_with_ids(vectors, np.arange(len(vectors), dtype=np.int64))
+    
     def get_stats(self) -> Dict:
         """
         Get statistics about the vector store.
@@ -117,8 +661,13 @@ class VectorStore:
             Dict with index stats
         """
         return {
-            "total_chunks": self.index.ntotal,
+            "total_chunks": len(self.chunks_metadata),
+            "removed_chunks": len(self.chunks_metadata.deleted),
             "embedding_dim": self.embedding_dim,
+            "index_type": self.current_index_type,
+            "configured_index_type": self.index_type,
+            "precision": self.current_precision,
+            "configured_precision": self.precision,
             "index_path": str(self.index_path),
             "metadata_path": str(self.metadata_path)
         }
@@ -127,5 +676,6 @@ class VectorStore:
         """
         Clear the vector store.
         """
-        self.index = faiss.IndexFlatL2(self.embedding_dim)
-        self.chunks_metadata = []
+        self.index = self._empty_index()
+        self.chunks_metadata = ChunkMetadataStore()
+        self.version += 1
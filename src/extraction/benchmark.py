@@ -0,0 +1,214 @@
+"""
+Extraction benchmark: throughput of the single-pass extraction engine against
+the previous pattern-by-pattern extractors, checking that both produce the
+same output.
+
+Usage:
+    python -m src.extraction.benchmark                # documents in INPUT_DOCS_DIR
+    python -m src.extraction.benchmark --synthetic 200 --pages 20
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import Callable, Dict, List, Tuple
+from src.config import EMAIL_REGEX, PHONE_REGEX, INPUT_DOCS_DIR
+from src.extraction.invoice import extract_invoice
+from src.extraction.resume import extract_resume
+from src.extraction.utility_bill import extract_utility_bill
+
+
+def _first_of(patterns: List[str], text: str, flags: int = 0):
+    for pattern in patterns:
+        match = re.search(pattern, text, flags)
+        if match:
+            return match
+    return None
+
+
+def reference_invoice(text: str) -> dict:
+    """
+    Previous invoice extractor: one re.search per pattern.
+    """
+    m = _first_of([r"Invoice\s*[#:]?\s*(\d+)", r"(INV[-_ ]?\d+)", r"[Ii]nvoice\s+[Nn]umber[: ]+([A-Z0-9-]+)"], text, re.IGNORECASE)
+    date = re.search(r"(\d{4}[-/]\d{2}[-/]\d{2})", text)
+    company = _first_of([r"[Cc]ompany[: ]+([A-Z][A-Za-z0-9 &.,'-]*?)(?:\n|$)", r"[Ff]rom[: ]+([A-Z][A-Za-z0-9 &.,'-]*?)(?:\n|$)"], text)
+    total = _first_of([r"[Tt]otal\s+[Aa]mount[: ]+(\$?[\d,]+\.?\d*)", r"[Tt]otal[: ]+(\$?[\d,]+\.?\d*)", r"[Gg]rand\s+[Tt]otal[: ]+(\$?[\d,]+\.?\d*)"], text)
+    return {
+        "invoice_number": (m.group(1) if m.lastindex else m.group(0)) if m else None,
+        "date": date.group(1) if date else None,
+        "company": company.group(1).strip() if company else None,
+        "total_amount": total.group(1) if total else None
+    }
+
+
+def reference_utility_bill(text: str) -> dict:
+    """
+    Previous utility bill extractor: one re.search per pattern.
+    """
+    acct = _first_of([r"[Aa]ccount\s+[Nn]umber[: ]+([A-Z0-9-]+)", r"[Aa]ccount[: ]+([A-Z0-9-]+)", r"[Aa]ccount\s+#?([A-Z0-9-]+)"], text)
+    date = _first_of([r"[Bb]illing\s+[Dd]ate[: ]+(\d{4}[-/]\d{2}[-/]\d{2})", r"[Dd]ate[: ]+(\d{4}[-/]\d{2}[-/]\d{2})", r"(\d{4}[-/]\d{2}[-/]\d{2})"], text)
+    usage = _first_of([r"[Uu]sage[: ]+(\d+(?:\.\d+)?)\s*[Kk][Ww][Hh]", r"(\d+(?:\.\d+)?)\s*[Kk][Ww][Hh]"], text)
+    amount = _first_of([r"[Aa]mount\s+[Dd]ue[: ]+(\$?[\d,]+\.?\d*)", r"[Aa]mount[: ]+(\$?[\d,]+\.?\d*)", r"[Tt]otal\s+[Dd]ue[: ]+(\$?[\d,]+\.?\d*)"], text)
+    return {
+        "account_number": acct.group(1) if acct else None,
+        "date": date.group(1) if date else None,
+        "usage_kwh": float(usage.group(1)) if usage else None,
+        "amount_due": amount.group(1) if amount else None
+    }
+
+
+def reference_resume(text: str) -> dict:
+    """
+    Previous resume extractor: one re.search per field.
+    """
+    lines = text.split("\n")
+    email = re.search(EMAIL_REGEX, text)
+    phone = re.search(PHONE_REGEX, text)
+    exp = re.search(r"(\d+)\s+years?", text, re.IGNORECASE)
+    return {
+        "name": lines[0] if lines else None,
+        "email": email.group(0) if email else None,
+        "phone": phone.group(0).strip().replace('\n', '').replace('\r', '').strip() if phone else None,
+        "experience_years": int(exp.group(1)) if exp else None
+    }
+
+
+EXTRACTORS: Dict[str, Tuple[Callable[[str], dict], Callable[[str], dict]]] = {
+    "Invoice": (extract_invoice, reference_invoice),
+    "Utility Bill": (extract_utility_bill, reference_utility_bill),
+    "Resume": (extract_resume, reference_resume)
+}
+
+_FILLER = (
+    "Thank you for your business. Please retain this page for your records. "
+    "Charges are itemised below and include applicable taxes and fees.\n"
+)
+
+
+def synthetic_documents(count: int, pages: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    Generate (doc_class, text) pairs; key fields are placed at random pages
+    (or left out) so both early and late matches are exercised.
+    """
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        doc_class = ("Invoice", "Utility Bill", "Resume")[i % 3]
+        page_texts = [_FILLER * 30 for _ in range(pages)]
+
+        def place(line: str) -> None:
+            if rng.random() < 0.9:
+                page = rng.randrange(pages)
+                page_texts[page] += line + "\n"
+
+        if doc_class == "Invoice":
+            place(rng.choice([f"Invoice #{rng.randint(1000, 9999)}", f"INV-{rng.randint(1000, 9999)}"]))
+            place(f"Date: 2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+            place(rng.choice(["Company: Pioneer Ltd", "From: Acme Corp"]))
+            place(rng.choice([f"Total Amount: ${rng.randint(10, 9999)}.00", f"Grand Total: ${rng.randint(10, 9999)}.00"]))
+        elif doc_class == "Utility Bill":
+            place(f"Account Number: ACC-{rng.randint(10000, 99999)}")
+            place(rng.choice(["Billing Date", "Date", "Issued"]) + f": 2025-{rng.randint(1, 12):02d}-01")
+            place(f"Usage: {rng.randint(100, 999)} kWh")
+            place(rng.choice(["Amount Due", "Total Due"]) + f": ${rng.randint(10, 999)}.00")
+        else:
+            page_texts[0] = "Jane Doe\n" + page_texts[0]
+            place(f"jane.doe{i}@example.com")
+            place(f"+1 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}")
+            place(f"{rng.randint(1, 20)} years of experience")
+        docs.append((doc_class, "\n".join(page_texts)))
+    return docs
+
+
+def load_input_documents() -> List[Tuple[str, str]]:
+    """
+    (doc_class, text) pairs for readable documents in INPUT_DOCS_DIR, with the
+    class taken from output.json when available (otherwise every extractor is run).
+    """
+    from src.ingestion.loader import list_documents
+    from src.ingestion.parallel import read_documents
+    try:
+        with open("output.json", "r", encoding="utf-8") as f:
+            classes = {name: result.get("class") for name, result in json.load(f).items()}
+    except (OSError, ValueError):
+        classes = {}
+    docs = []
+    for doc in read_documents(list_documents(INPUT_DOCS_DIR)):
+        if not doc["readable"]:
+            continue
+        doc_class = classes.get(doc["file_name"])
+        for cls in ([doc_class] if doc_class in EXTRACTORS else EXTRACTORS):
+            docs.append((cls, doc["text"]))
+    return docs
+
+
+def benchmark_extractors(docs: List[Tuple[str, str]], repeat: int = 3) -> Dict:
+    """
+    Time the engine-based extractors against the reference ones over docs.
+
+    Args:
+        docs: (doc_class, text) pairs
+        repeat: Passes over docs per implementation (best pass is reported)
+
+    Returns:
+        Dict with per-class docs/sec and MB/sec for both implementations, the
+        speedup, and the number of documents whose outputs differ
+    """
+    report = {}
+    for doc_class, (engine_fn, reference_fn) in EXTRACTORS.items():
+        texts = [text for cls, text in docs if cls == doc_class]
+        if not texts:
+            continue
+        mismatches = sum(engine_fn(text) != reference_fn(text) for text in texts)
+        megabytes = sum(len(text) for text in texts) / 1e6
+
+        timings = {}
+        for name, fn in (("engine", engine_fn), ("reference", reference_fn)):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for text in texts:
+                    fn(text)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+
+        report[doc_class] = {
+            "documents": len(texts),
+            "megabytes": megabytes,
+            "engine_docs_per_sec": len(texts) / timings["engine"],
+            "reference_docs_per_sec": len(texts) / timings["reference"],
+            "engine_mb_per_sec": megabytes / timings["engine"],
+            "reference_mb_per_sec": megabytes / timings["reference"],
+            "speedup": timings["reference"] / timings["engine"],
+            "mismatches": mismatches
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the single-pass extraction engine with per-pattern extraction")
+    parser.add_argument("--synthetic", type=int, default=None, help="benchmark N generated documents instead of INPUT_DOCS_DIR")
+    parser.add_argument("--pages", type=int, default=10, help="pages per generated document")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    docs = synthetic_documents(args.synthetic, args.pages, args.seed) if args.synthetic else load_input_documents()
+    report = benchmark_extractors(docs, repeat=args.repeat)
+
+    print(f"{'class':<14} {'docs':>6} {'engine doc/s':>13} {'reference doc/s':>16} {'speedup':>8} {'mismatches':>11}")
+    for doc_class, r in report.items():
+        print(f"{doc_class:<14} {r['documents']:>6} {r['engine_docs_per_sec']:>13.1f} "
+              f"{r['reference_docs_per_sec']:>16.1f} {r['speedup']:>7.2f}x {r['mismatches']:>11}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
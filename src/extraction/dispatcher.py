@@ -1,17 +1,29 @@
 from .invoice import extract_invoice
 from .resume import extract_resume
 from .utility_bill import extract_utility_bill
+from src.instrumentation import timed
 
-def extract_fields(doc_class: str, text: str) -> dict:
+# Document classes that have fields to extract
+EXTRACTED_CLASSES = ("Invoice", "Resume", "Utility Bill")
+
+def has_extractor(doc_class: str) -> bool:
+    """
+    Whether extract_fields returns anything for this class (and so needs the full text).
+    """
+    return doc_class in EXTRACTED_CLASSES
+
+def extract_fields(doc_class: str, text: str, document: str = None) -> dict:
     """
     Dispatch extraction based on document class.
     Returns an empty dict for Other / Unclassifiable.
+    document (the file name) only labels the extraction timing.
     """
-    if doc_class == "Invoice":
-        return extract_invoice(text)
-    elif doc_class == "Resume":
-        return extract_resume(text)
-    elif doc_class == "Utility Bill":
-        return extract_utility_bill(text)
-    else:
+    if not has_extractor(doc_class):
         return {}
+    with timed("extract", document=document, doc_class=doc_class):
+        if doc_class == "Invoice":
+            return extract_invoice(text)
+        elif doc_class == "Resume":
+            return extract_resume(text)
+        else:
+            return extract_utility_bill(text)
@@ -0,0 +1,147 @@
+"""
+Extraction engine: declarative field patterns filled with as little
+scanning of the text as possible.
+
+Each document type declares its fields with regex patterns in priority
+order. For every field the result is the leftmost match of the highest
+priority pattern that matches anywhere, exactly as trying the patterns one
+after another with re.search, but:
+
+- patterns are compiled once, at registration;
+- most patterns start with a keyword ("Invoice", "[Aa]ccount", ...). That
+  literal anchor is located with str.find on a lowercased copy of the text
+  (made once per document), and the regex is only tried, anchored, at those
+  positions instead of at every character;
+- patterns without a leading literal fall back to a regular search.
+
+Python's re engine tries every alternative at every position, so a single
+combined alternation of all patterns is no faster than separate searches;
+anchors are what avoid the repeated full-text regex scans.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+_LITERAL = _sre_parse.LITERAL
+_IN = _sre_parse.IN
+_SUBPATTERN = _sre_parse.SUBPATTERN
+
+
+def leading_literal(pattern: str, flags: int = 0) -> Optional[str]:
+    """
+    Lowercased literal text every match of pattern starts with (e.g.
+    "account" for r"[Aa]ccount\\s+..."), or None if it has no usable prefix.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+
+    chars = []
+
+    def walk(items) -> bool:
+        # Collect literal characters until the first non-literal item
+        for op, av in items:
+            if op is _LITERAL:
+                chars.append(chr(av).lower())
+            elif op is _IN and av and all(item_op is _LITERAL for item_op, _ in av) \
+                    and len({chr(code).lower() for _, code in av}) == 1:
+                chars.append(chr(av[0][1]).lower())  # case variants like [Aa]
+            elif op is _SUBPATTERN and not av[1] and not av[2]:
+                if not walk(av[3]):
+                    return False
+            else:
+                return False
+        return True
+
+    walk(parsed)
+    literal = "".join(chars)
+    return literal if len(literal) >= 2 and literal.isascii() else None
+
+
+def first_group(match: re.Match):
+    """
+    Default field value: the first capture group, or the whole match if there is none.
+    """
+    return match.group(1) if match.lastindex else match.group(0)
+
+
+class ExtractionEngine:
+    """
+    Declarative set of field patterns for one document type.
+    """
+
+    def __init__(self):
+        self.fields = []  # (name, convert, [(compiled pattern, anchor or None), ...]) in output order
+
+    def add_field(
+        self,
+        name: str,
+        patterns: List[str],
+        convert: Callable[[re.Match], object] = first_group,
+        flags: int = 0
+    ) -> "ExtractionEngine":
+        """
+        Register a field.
+
+        Args:
+            name: Key in the extracted dict
+            patterns: Regex patterns, highest priority first
+            convert: Turns the winning match into the field value
+            flags: re flags applied to all of the field's patterns
+
+        Returns:
+            The engine, so registrations can be chained
+        """
+        compiled = [(re.compile(pattern, flags), leading_literal(pattern, flags)) for pattern in patterns]
+        self.fields.append((name, convert, compiled))
+        return self
+
+    @staticmethod
+    def _search(pattern: re.Pattern, anchor: Optional[str], text: str, lowered: Optional[str]) -> Optional[re.Match]:
+        """
+        Leftmost match of pattern in text, trying it only where its anchor occurs.
+        """
+        if anchor is None or lowered is None:
+            return pattern.search(text)
+        pos = lowered.find(anchor)
+        while pos != -1:
+            match = pattern.match(text, pos)
+            if match is not None:
+                return match
+            pos = lowered.find(anchor, pos + 1)
+        return None
+
+    def find(self, text: str) -> List[Optional[re.Match]]:
+        """
+        Winning match per field (None where no pattern matched), in field order.
+        """
+        # Anchors are only used on ASCII text, where lowercasing keeps
+        # positions aligned and case-insensitive matching is plain ASCII folding
+        lowered = text.lower() if text.isascii() else None
+        matches = []
+        for _, _, patterns in self.fields:
+            match = None
+            for pattern, anchor in patterns:
+                match = self._search(pattern, anchor, text, lowered)
+                if match is not None:
+                    break
+            matches.append(match)
+        return matches
+
+    def extract(self, text: str) -> Dict:
+        """
+        Extract all registered fields from text.
+
+        Returns:
+            Dict with one key per field, None for fields that were not found
+        """
+        result = {}
+        for (name, convert, _), match in zip(self.fields, self.find(text)):
+            result[name] = convert(match) if match is not None else None
+        return result
@@ -1,56 +1,34 @@
 import re
 from src.config import CURRENCY_REGEX
+from src.extraction.engine import ExtractionEngine
 
-def extract_invoice(text: str) -> dict:
-
-    result = {}
-
+# Fields in output order; each field's patterns are tried in priority order
+INVOICE_FIELDS = (
+    ExtractionEngine()
     # Invoice number - flexible patterns: INV-1234, Invoice #1001, Invoice: 1001, etc.
-    inv_patterns = [
+    .add_field("invoice_number", [
         r"Invoice\s*[#:]?\s*(\d+)",  # Invoice #1001 or Invoice: 1001
         r"(INV[-_ ]?\d+)",  # INV-1001
         r"[Ii]nvoice\s+[Nn]umber[: ]+([A-Z0-9-]+)",  # Invoice Number: INV-123
-    ]
-    inv_match = None
-    for pattern in inv_patterns:
-        inv_match = re.search(pattern, text, re.IGNORECASE)
-        if inv_match:
-            result["invoice_number"] = inv_match.group(1) if inv_match.lastindex else inv_match.group(0)
-            break
-    if not inv_match:
-        result["invoice_number"] = None
-
+    ], flags=re.IGNORECASE)
     # Date (YYYY-MM-DD or similar)
-    date_match = re.search(r"(\d{4}[-/]\d{2}[-/]\d{2})", text)
-    result["date"] = date_match.group(1) if date_match else None
-
+    .add_field("date", [
+        r"(\d{4}[-/]\d{2}[-/]\d{2})",
+    ])
     # Company - look for "Company:" or company name after key terms
-    comp_patterns = [
+    .add_field("company", [
         r"[Cc]ompany[: ]+([A-Z][A-Za-z0-9 &.,'-]*?)(?:\n|$)",  # Company: Pioneer Ltd
         r"[Ff]rom[: ]+([A-Z][A-Za-z0-9 &.,'-]*?)(?:\n|$)",  # From: Company Name
-    ]
-    comp_match = None
-    for pattern in comp_patterns:
-        comp_match = re.search(pattern, text)
-        if comp_match:
-            result["company"] = comp_match.group(1).strip()
-            break
-    if not comp_match:
-        result["company"] = None
-
+    ], convert=lambda m: m.group(1).strip())
     # Total amount - flexible: "Total:", "Total Amount:", "Grand Total:"
-    amt_patterns = [
+    .add_field("total_amount", [
         r"[Tt]otal\s+[Aa]mount[: ]+(\$?[\d,]+\.?\d*)",  # Total Amount: $2073.00
         r"[Tt]otal[: ]+(\$?[\d,]+\.?\d*)",  # Total: $2073.00
         r"[Gg]rand\s+[Tt]otal[: ]+(\$?[\d,]+\.?\d*)",  # Grand Total: $2073.00
-    ]
-    amt_match = None
-    for pattern in amt_patterns:
-        amt_match = re.search(pattern, text)
-        if amt_match:
-            result["total_amount"] = amt_match.group(1)
-            break
-    if not amt_match:
-        result["total_amount"] = None
+    ])
+)
+
+def extract_invoice(text: str) -> dict:
 
-    return result
+    # All fields are filled in a single scan of the text
+    return INVOICE_FIELDS.extract(text)
@@ -1,30 +1,31 @@
 import re
 from src.config import EMAIL_REGEX, PHONE_REGEX
+from src.extraction.engine import ExtractionEngine
+
+
+def _clean_phone(match: re.Match) -> str:
+    phone = match.group(0).strip()
+    # Remove any newlines or carriage returns
+    return phone.replace('\n', '').replace('\r', '').strip()
+
+
+# Fields in output order (after name); each field's patterns are tried in priority order
+RESUME_FIELDS = (
+    ExtractionEngine()
+    .add_field("email", [EMAIL_REGEX], convert=lambda m: m.group(0))
+    .add_field("phone", [PHONE_REGEX], convert=_clean_phone)
+    # Experience: simple heuristic
+    .add_field("experience_years", [r"(\d+)\s+years?"], convert=lambda m: int(m.group(1)), flags=re.IGNORECASE)
+)
 
 def extract_resume(text: str) -> dict:
 
     result = {}
 
-    lines = text.split("\n")
     # Name: assume first non-empty line
-    result["name"] = lines[0] if lines else None
-
-    # Email
-    email_match = re.search(EMAIL_REGEX, text)
-    result["email"] = email_match.group(0) if email_match else None
-
-    # Phone
-    phone_match = re.search(PHONE_REGEX, text)
-    if phone_match:
-        phone = phone_match.group(0).strip()
-        # Remove any newlines or carriage returns
-        phone = phone.replace('\n', '').replace('\r', '').strip()
-        result["phone"] = phone
-    else:
-        result["phone"] = None
+    result["name"] = text.split("\n", 1)[0]
 
-    # Experience: simple heuristic
-    exp_match = re.search(r"(\d+)\s+years?", text, re.IGNORECASE)
-    result["experience_years"] = int(exp_match.group(1)) if exp_match else None
+    # Email, phone and experience are filled in a single scan of the text
+    result.update(RESUME_FIELDS.extract(text))
 
     return result
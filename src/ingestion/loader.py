@@ -1,7 +1,9 @@
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from src.config import INPUT_DOCS_DIR
-import PyPDF2
+from src.instrumentation import timed
+from src.ingestion.pdf_reader import count_pdf_pages, extract_pdf_text, extract_pdf_text_with_backend
+from src.ingestion.text_cache import CACHED_SUFFIXES, get_text_cache
 
 SUPPORTED_EXTENSIONS = {".pdf", ".txt", ".docx"}
 
@@ -21,10 +23,60 @@ def list_documents(directory: Path = INPUT_DOCS_DIR) -> List[Path]:
     return files
 
 
-def read_document(file_path: Path) -> str:
+def read_document(file_path: Path, max_pages: Optional[int] = None, start_page: int = 0) -> str:
     """
     Reads a document (PDF, TXT, or DOCX) and returns its text content.
-    Falls back to pdfplumber if PyPDF2 fails for PDFs.
+    PDFs go through the backend chain in pdf_reader (PyPDF2, then pdfplumber),
+    which raises if every backend fails or the time budget runs out;
+    max_pages / start_page limit which pages are parsed.
+    Whole-document reads of PDF/DOCX files go through the text cache.
+    """
+    if max_pages is None and start_page == 0:
+        return _read_whole(file_path)[0]
+    return _parse_document(file_path, max_pages=max_pages, start_page=start_page)
+
+
+def _read_whole(file_path: Path, cached_only: bool = False) -> Tuple[Optional[str], bool, Optional[str]]:
+    """
+    Whole text of a document from the text cache, else parsed (and stored).
+    Returns (text, served from cache, text cache key or None); with
+    cached_only a miss gives (None, False, key).
+    """
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    cache = get_text_cache() if file_path.suffix.lower() in CACHED_SUFFIXES else None
+    key = None
+    if cache is not None:
+        key = cache.key(file_path)
+        text = cache.get(key)
+        if text is not None:
+            return text, True, key
+    if cached_only:
+        return None, False, key
+
+    text = _parse_document(file_path)
+    _store_text(file_path, text, key)
+    return text, False, key
+
+
+def _store_text(file_path: Path, text: Optional[str], key: Optional[str] = None) -> None:
+    """
+    Adds a document's whole text to the text cache. Empty DOCX text is not
+    stored, as the DOCX reader also returns "" when it fails.
+    """
+    cache = get_text_cache() if file_path.suffix.lower() in CACHED_SUFFIXES else None
+    if cache is None or text is None or (not text and file_path.suffix.lower() != ".pdf"):
+        return
+    try:
+        cache.put(key or cache.key(file_path), text)
+    except OSError as e:
+        print(f"Could not cache text of {file_path}: {e}")
+
+
+def _parse_document(file_path: Path, max_pages: Optional[int] = None, start_page: int = 0) -> str:
+    """
+    Parses a document, bypassing the text cache (see read_document).
     """
     if not file_path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
@@ -56,17 +108,98 @@ def read_document(file_path: Path) -> str:
             return ""
     elif file_path.suffix.lower() == ".pdf":
         # Try PyPDF2 first, then fallback to pdfplumber
-        text = ""
-        try:
-            with open(file_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                for page in reader.pages:
-                    extracted = page.extract_text()
-                    if extracted:
-                        text += extracted + "\n"
-            if text.strip():
-                return text
-        except Exception:
-            return ""
+        return extract_pdf_text(file_path, max_pages=max_pages, start_page=start_page)
     else:
         raise ValueError(f"Unsupported file type: {file_path.suffix}")
+
+
+def count_pages(file_path: Path) -> Optional[int]:
+    """
+    Number of pages of a PDF (None for other file types or unreadable PDFs).
+    """
+    if file_path.suffix.lower() != ".pdf":
+        return None
+    return count_pdf_pages(file_path)
+
+
+def load_document(file_path: Path, max_pages: Optional[int] = None) -> Dict:
+    """
+    Reads a document and wraps it in the record used by the pipeline.
+    Read errors are captured in the record instead of raised, so unreadable
+    files are still reported (and later marked Unclassifiable).
+
+    With max_pages, only the first pages of a PDF are read; the record then
+    has "complete": False and the rest can be added with complete_document().
+    A PDF whose text is cached is loaded whole, as that costs no parsing.
+    """
+    with timed("read", document=file_path.name, format=file_path.suffix.lower().lstrip(".")):
+        return _load_record(file_path, max_pages)
+
+
+def _load_record(file_path: Path, max_pages: Optional[int]) -> Dict:
+    try:
+        partial = max_pages is not None and file_path.suffix.lower() == ".pdf"
+        text, cached, key = _read_whole(file_path, cached_only=partial)
+        backend = None
+        if text is None:
+            text, backend = extract_pdf_text_with_backend(file_path, max_pages=max_pages)
+        record = {
+            "file_name": file_path.name,
+            "text": text,
+            "readable": bool(text and text.strip()),
+            "path": str(file_path),
+            "cached": cached
+        }
+        if partial and not cached:
+            record["pages_read"] = max_pages
+            record["pdf_backend"] = backend  # completed with the same backend
+            record["complete"] = False
+            if record["readable"]:
+                page_count = count_pages(file_path)
+                record["complete"] = page_count is not None and page_count <= max_pages
+                if record["complete"]:
+                    # The first pages were the whole document
+                    _store_text(file_path, text, key)
+            else:
+                # No text in the first pages (e.g. a scanned cover): read the rest now
+                record = complete_document(record)
+        return record
+    except Exception as e:
+        return {
+            "file_name": file_path.name,
+            "text": "",
+            "readable": False,
+            "path": str(file_path),
+            "error": str(e)
+        }
+
+
+def complete_document(record: Dict) -> Dict:
+    """
+    Adds the pages a partial record (see load_document's max_pages) has not
+    read yet, with the backend that read the first pages, so the text matches
+    reading the whole document at once. If that backend fails on the
+    remaining pages, the whole document is read again through the backend chain.
+    Records that are already complete are returned unchanged.
+    """
+    if record.get("complete", True):
+        return record
+    file_path = Path(record["path"])
+    backend = record.get("pdf_backend")
+    with timed("complete", document=record["file_name"]):
+        try:
+            if backend is None:
+                # No backend found text in the first pages, so none is preferred for the rest
+                text = (record["text"] or "") + (read_document(file_path, start_page=record["pages_read"]) or "")
+                _store_text(file_path, text)
+            else:
+                try:
+                    rest = extract_pdf_text(file_path, start_page=record["pages_read"], backends=[backend])
+                    text = (record["text"] or "") + rest
+                    _store_text(file_path, text)
+                except Exception:
+                    text = _read_whole(file_path)[0]
+        except Exception as e:
+            # Keep the pages already read; extraction works on what is available
+            return {**record, "complete": True, "error": str(e)}
+    return {**record, "text": text, "readable": bool(text.strip()), "complete": True}
@@ -0,0 +1,139 @@
+"""
+Manifest module: Tracks processed documents for incremental pipeline runs.
+
+Each input file is recorded with its size, mtime, content hash and the pipeline
+version that produced its result. On the next run, files whose entry still
+matches are skipped and their stored result is reused.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from src.config import MANIFEST_PATH, PIPELINE_VERSION
+
+
+def file_hash(file_path: Path, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file's contents, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentManifest:
+    """
+    Persistent record of (path, size, mtime, content hash, pipeline version) -> result.
+    """
+
+    def __init__(self, path: Path = MANIFEST_PATH, pipeline_version: str = PIPELINE_VERSION):
+        """
+        Args:
+            path: JSON file the manifest is stored in
+            pipeline_version: Version tag; entries from other versions are reprocessed
+        """
+        self.path = Path(path)
+        self.pipeline_version = pipeline_version
+        self.entries: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _key(file_path: Path) -> str:
+        return str(Path(file_path).resolve())
+
+    def load(self) -> bool:
+        """
+        Load the manifest from disk.
+
+        Returns:
+            True if loaded successfully, False otherwise
+        """
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+            return True
+        except Exception as e:
+            print(f"Error loading manifest: {e}")
+            self.entries = {}
+            return False
+
+    def save(self) -> None:
+        """
+        Write the manifest to disk (atomically, via a temporary file).
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"pipeline_version": self.pipeline_version, "files": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+    def is_unchanged(self, file_path: Path) -> bool:
+        """
+        Check whether a file still matches its manifest entry.
+        Size and mtime are compared first; the content hash is only computed
+        when the size matches but the mtime moved (e.g. the file was touched or copied).
+        """
+        entry = self.entries.get(self._key(file_path))
+        if entry is None or entry.get("pipeline_version") != self.pipeline_version:
+            return False
+
+        stat = file_path.stat()
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime == entry["mtime"]:
+            return True
+
+        if file_hash(file_path) != entry["hash"]:
+            return False
+        entry["mtime"] = stat.st_mtime
+        return True
+
+    def changed_files(self, paths: Iterable[Path]) -> List[Path]:
+        """
+        Return the new or modified files among paths.
+        """
+        return [path for path in paths if not self.is_unchanged(path)]
+
+    def prune(self, paths: Iterable[Path]) -> List[str]:
+        """
+        Drop entries for files that are no longer present.
+
+        Returns:
+            Keys of the removed entries
+        """
+        keep = {self._key(path) for path in paths}
+        removed = [key for key in self.entries if key not in keep]
+        for key in removed:
+            del self.entries[key]
+        return removed
+
+    def record(self, file_path: Path, result: Dict) -> None:
+        """
+        Store the result for a processed file along with its current state.
+        Failed results (flagged with "error", e.g. a read timeout or a killed
+        worker) are not stored, and drop any earlier entry, so the next
+        incremental run processes the file again.
+        """
+        if result.get("error"):
+            self.entries.pop(self._key(file_path), None)
+            return
+        stat = file_path.stat()
+        self.entries[self._key(file_path)] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "hash": file_hash(file_path),
+            "pipeline_version": self.pipeline_version,
+            "result": result
+        }
+
+    def get_result(self, file_path: Path) -> Optional[Dict]:
+        """
+        Stored result for a file, or None if it has no entry.
+        """
+        entry = self.entries.get(self._key(file_path))
+        return entry["result"] if entry else None
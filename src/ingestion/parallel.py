@@ -0,0 +1,358 @@
+"""
+Parallel ingestion: reads documents across a pool of worker processes.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from src.config import INGESTION_WORKERS, INGESTION_CHUNKSIZE, PDF_FILE_TIMEOUT, PDF_KILL_GRACE
+from src.ingestion.loader import complete_document, load_document
+from src.ingestion.pdf_reader import diff_backend_stats, get_backend_stats, merge_backend_stats
+from src.instrumentation import diff_metrics, dump_profiles, get_metrics_snapshot, merge_metrics, profiling_enabled
+
+# Seconds between checks for jobs that overran their limit
+_WATCHDOG_INTERVAL = 0.5
+
+
+def _worker_stats(before: Tuple[Dict, Dict]) -> Dict:
+    """
+    PDF backend stats and stage metrics a worker collected since before;
+    profiles of profiled stages are written out as well.
+    """
+    if profiling_enabled():
+        dump_profiles()
+    return {"backends": diff_backend_stats(before[0]), "metrics": diff_metrics(before[1])}
+
+
+def _merge_worker_stats(stats: Dict) -> None:
+    merge_backend_stats(stats.get("backends", {}))
+    merge_metrics(stats.get("metrics", {}))
+
+
+def _load_batch(paths: List[Path], max_pages: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+    """
+    Worker entry point: load one chunk of files.
+    Returns the records and the stats collected meanwhile (see _worker_stats).
+    """
+    before = get_backend_stats(), get_metrics_snapshot()
+    records = [load_document(path, max_pages=max_pages) for path in paths]
+    return records, _worker_stats(before)
+
+
+def _complete_record(record: Dict) -> Tuple[Dict, Dict]:
+    """
+    Worker entry point: read the remaining pages of one record.
+    """
+    before = get_backend_stats(), get_metrics_snapshot()
+    record = complete_document(record)
+    return record, _worker_stats(before)
+
+
+def _failed_batch(paths: List[Path], error: Exception) -> List[Dict]:
+    """
+    Records for a chunk whose worker died before returning results.
+    """
+    return [
+        {"file_name": path.name, "text": "", "readable": False, "path": str(path), "error": str(error)}
+        for path in paths
+    ]
+
+
+def _job_limit(files: int, chunksize: int) -> Optional[float]:
+    """
+    Wall-clock seconds a job of files may run before its worker counts as stuck.
+    A job is marked running once queued for a worker, so it may first wait
+    for one more chunk to finish.
+    """
+    if PDF_FILE_TIMEOUT is None:
+        return None
+    return PDF_FILE_TIMEOUT * (files + chunksize) + PDF_KILL_GRACE
+
+
+class WorkerTimeout(Exception):
+    """
+    A job ran past its wall-clock limit and its worker was killed.
+    """
+
+
+class _Job:
+    """
+    A call submitted to the pool, kept so it can be resubmitted after a restart.
+    """
+
+    def __init__(self, fn: Callable, args: tuple, limit: Optional[float] = None):
+        self.fn = fn
+        self.args = args
+        self.limit = limit
+        self.future = None
+        self.started = None
+        self.attempts = 0
+        self.failed = False  # future replaced by the pool's verdict after a restart
+
+
+def _failed_future(error: Exception) -> Future:
+    future = Future()
+    future.set_exception(error)
+    return future
+
+
+class _WatchedPool:
+    """
+    Process pool that kills its workers when a job overruns its limit (e.g. a
+    parser stuck in native code, out of reach of pdf_reader's time budgets)
+    or a worker crashes, and restarts them for the remaining jobs. The job
+    that hung fails with WorkerTimeout; jobs that were running when a worker
+    crashed fail with BrokenProcessPool (which of them crashed is unknown).
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.restarts = 0
+        self._pool = None
+
+    def submit(self, job: _Job) -> _Job:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        job.started = None
+        job.failed = False
+        job.future = self._pool.submit(job.fn, *job.args)
+        return job
+
+    def wait(self, jobs: List[_Job], ordered: bool) -> _Job:
+        """
+        Wait for the first of jobs (ordered) or any of them to finish.
+        """
+        while True:
+            watched = jobs[:1] if ordered else jobs
+            done, _ = wait([job.future for job in watched], timeout=_WATCHDOG_INTERVAL, return_when=FIRST_COMPLETED)
+            if done:
+                job = next(job for job in watched if job.future in done)
+                if isinstance(job.future.exception(), BrokenProcessPool):
+                    self._restart(jobs, [j for j in jobs if self._broken_or_running(j)], crashed=True)
+                return job
+
+            now = time.monotonic()
+            stuck = []
+            for job in jobs:
+                if job.future.done():
+                    continue
+                if job.started is None:
+                    if job.future.running():
+                        job.started = now
+                elif job.limit is not None and now - job.started > job.limit:
+                    stuck.append(job)
+            if stuck:
+                self._restart(jobs, stuck, crashed=False)
+
+    @staticmethod
+    def _broken_or_running(job: _Job) -> bool:
+        if job.future.done():
+            return isinstance(job.future.exception(), BrokenProcessPool)
+        return job.future.running()
+
+    def _restart(self, jobs: List[_Job], suspects: List[_Job], crashed: bool) -> None:
+        """
+        Kill the workers, fail the suspects and resubmit the other unfinished jobs.
+        """
+        unfinished = [
+            job for job in jobs
+            if not job.failed and (not job.future.done() or isinstance(job.future.exception(), BrokenProcessPool))
+        ]
+        self.kill()
+        self.restarts += 1
+        for job in unfinished:
+            if job in suspects:
+                job.failed = True
+                if crashed:
+                    job.future = _failed_future(BrokenProcessPool("A worker process terminated abruptly"))
+                else:
+                    job.future = _failed_future(WorkerTimeout(f"Timed out: worker killed after {job.limit:.0f}s"))
+            else:
+                self.submit(job)
+
+    def kill(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False)
+
+    def close(self, jobs: List[_Job]) -> None:
+        if any(not job.future.done() for job in jobs):
+            self.kill()  # consumer stopped early: don't wait on (possibly stuck) workers
+        elif self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def iter_documents(
+    paths: Sequence[Path],
+    workers: Optional[int] = INGESTION_WORKERS,
+    chunksize: int = INGESTION_CHUNKSIZE,
+    ordered: bool = True,
+    max_inflight: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    Read documents in parallel and yield one record per file.
+
+    Records have the same shape as ``load_document``: ``file_name``, ``text``,
+    ``readable`` and, for failed reads, ``error``.
+
+    A worker that hangs on a file (past PDF_FILE_TIMEOUT per file plus
+    PDF_KILL_GRACE) or crashes is killed and the pool restarted; the files of
+    the affected chunk are retried one by one, so only the bad file fails.
+
+    Args:
+        paths: Document paths, e.g. from ``list_documents``
+        workers: Number of worker processes (None = one per CPU core, 1 = serial)
+        chunksize: Number of files submitted to a worker at a time
+        ordered: If True, yield records in input order; otherwise as they complete
+        max_inflight: Maximum number of chunks submitted but not yet consumed
+            (None = 2 per worker), which bounds memory when the consumer is slower
+        max_pages: Only read the first max_pages pages of PDFs (see ``complete_documents``)
+
+    Yields:
+        Document record dicts
+    """
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    chunksize = max(1, chunksize)
+
+    if workers <= 1:
+        for path in paths:
+            yield load_document(path, max_pages=max_pages)
+        return
+
+    batches = iter([paths[i:i + chunksize] for i in range(0, len(paths), chunksize)])
+    max_inflight = max(1, max_inflight or 2 * workers)
+    pool = _WatchedPool(workers)
+    inflight = []
+
+    def batch_job(batch: List[Path]) -> _Job:
+        return _Job(_load_batch, (batch, max_pages), _job_limit(len(batch), chunksize))
+
+    def submit_next() -> bool:
+        batch = next(batches, None)
+        if batch is None:
+            return False
+        inflight.append(pool.submit(batch_job(batch)))
+        return True
+
+    try:
+        while len(inflight) < max_inflight and submit_next():
+            pass
+
+        while inflight:
+            job = pool.wait(inflight, ordered)
+            position = inflight.index(job)
+            batch = job.args[0]
+            try:
+                records, stats = job.future.result()
+            except (WorkerTimeout, BrokenProcessPool) as e:
+                if len(batch) > 1:
+                    # Retry the files one by one so only the one that hangs or crashes fails
+                    inflight[position:position + 1] = [pool.submit(batch_job([path])) for path in batch]
+                    continue
+                if isinstance(e, BrokenProcessPool) and job.attempts == 0:
+                    # May have been killed along with the worker that crashed: retry once
+                    job.attempts += 1
+                    pool.submit(job)
+                    continue
+                records, stats = _failed_batch(batch, e), {}
+            except Exception as e:
+                records, stats = _failed_batch(batch, e), {}
+
+            del inflight[position]
+            _merge_worker_stats(stats)
+            submit_next()
+            yield from records
+    finally:
+        pool.close(inflight)
+
+
+def complete_documents(
+    items: Iterable[Tuple[Dict, bool]],
+    workers: Optional[int] = INGESTION_WORKERS,
+    max_inflight: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    Read the remaining pages of partially loaded records, in parallel.
+
+    Args:
+        items: (record, needed) pairs; records are completed only where needed
+            is True and they were loaded with max_pages. Others pass through.
+        workers: Number of worker processes (None = one per CPU core, 1 = serial)
+        max_inflight: Maximum number of records waiting to be yielded (None = 2 per worker)
+
+    Yields:
+        Records in input order
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    max_inflight = max(1, max_inflight or 2 * workers)
+    pool = _WatchedPool(workers)
+    inflight = []
+
+    def take() -> Dict:
+        job = pool.wait(inflight, ordered=True)
+        record = job.args[0]
+        try:
+            result, stats = job.future.result()
+        except BrokenProcessPool:
+            if job.attempts == 0:
+                job.attempts += 1
+                pool.submit(job)
+                return None
+            result, stats = {**record, "complete": True, "error": "A worker process terminated abruptly"}, {}
+        except Exception as e:
+            # Keep the pages already read; extraction works on what is available
+            result, stats = {**record, "complete": True, "error": str(e)}, {}
+        inflight.pop(0)
+        _merge_worker_stats(stats)
+        return result
+
+    try:
+        for record, needed in items:
+            job = _Job(_complete_record, (record,), _job_limit(1, 1))
+            if not needed or record.get("complete", True):
+                job.future = Future()
+                job.future.set_result((record, {}))
+            elif workers <= 1:
+                job.future = Future()
+                job.future.set_result((complete_document(record), {}))
+            else:
+                # Pool only started once a document actually needs its remaining pages
+                pool.submit(job)
+            inflight.append(job)
+
+            while len(inflight) > max_inflight or (inflight and inflight[0].future.done()):
+                result = take()
+                if result is not None:
+                    yield result
+
+        while inflight:
+            result = take()
+            if result is not None:
+                yield result
+    finally:
+        pool.close(inflight)
+
+
+def read_documents(
+    paths: Sequence[Path],
+    workers: Optional[int] = INGESTION_WORKERS,
+    chunksize: int = INGESTION_CHUNKSIZE,
+    ordered: bool = True
+) -> List[Dict]:
+    """
+    Read documents in parallel and return all records as a list.
+    See ``iter_documents`` for arguments.
+    """
+    return list(iter_documents(paths, workers=workers, chunksize=chunksize, ordered=ordered))
@@ -1,21 +1,344 @@
-import pdfplumber
+"""
+PDF text extraction through a chain of backends (PyPDF2, then pdfplumber).
 
+Backends are tried in order until one yields text. Parsing is bounded by a
+per-page and a per-file time budget: in a process's main thread (including
+ingestion workers) an interval timer interrupts a page that runs over, in
+other threads the budget is checked between pages. Time and page counts are
+recorded per backend, so the faster backend for a corpus can be measured:
 
-def extract_text_from_pdf(file_path: str) -> str:
+    python -m src.ingestion.pdf_reader [files or directories]
+"""
+
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from src.config import (
+    PDF_BACKENDS, PDF_PAGE_TIMEOUT, PDF_FILE_TIMEOUT,
+    PDF_BACKEND_AUTO_ORDER, PDF_BACKEND_MIN_PAGES
+)
+
+
+class PDFTimeoutError(TimeoutError):
+    """
+    A page or file went over its parse time budget.
+    """
+
+
+class PDFExtractionError(Exception):
+    """
+    Every backend failed on a file.
+    """
+
+
+def _pypdf2_pages(file_path: Path, start_page: int = 0) -> Iterator[str]:
+    import PyPDF2
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        for page_number in range(start_page, len(reader.pages)):
+            yield reader.pages[page_number].extract_text() or ""
+
+
+def _pdfplumber_pages(file_path: Path, start_page: int = 0) -> Iterator[str]:
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[start_page:]:
+            yield page.extract_text() or ""
+            page.close()  # drop the page's parsed layout objects
+
+
+def _pypdf2_count(file_path: Path) -> int:
+    import PyPDF2
+    with open(file_path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def _pdfplumber_count(file_path: Path) -> int:
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+# Backend name -> (page iterator, page counter)
+BACKENDS = {
+    "pypdf2": (_pypdf2_pages, _pypdf2_count),
+    "pdfplumber": (_pdfplumber_pages, _pdfplumber_count)
+}
+
+_STAT_KEYS = ("files", "succeeded", "empty", "failed", "timeouts", "pages", "seconds")
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _stats_for(backend: str) -> Dict[str, float]:
+    return _stats.setdefault(backend, dict.fromkeys(_STAT_KEYS, 0))
+
+
+def get_backend_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Per-backend counters of this process (plus any merged from workers).
+
+    Returns:
+        Dict mapping backend name to files tried, succeeded (text found), empty,
+        failed, timeouts, pages parsed, seconds spent and seconds_per_page
+    """
+    report = {}
+    for backend, stats in _stats.items():
+        report[backend] = dict(stats)
+        report[backend]["seconds_per_page"] = stats["seconds"] / stats["pages"] if stats["pages"] else None
+    return report
+
+
+def merge_backend_stats(stats: Dict[str, Dict[str, float]]) -> None:
+    """
+    Add counters collected elsewhere (e.g. returned by a worker process).
+    """
+    for backend, counters in stats.items():
+        own = _stats_for(backend)
+        for key in _STAT_KEYS:
+            own[key] += counters.get(key, 0)
+
+
+def diff_backend_stats(before: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
     """
-    Extracts text from a PDF file using pdfplumber.
+    Counters accumulated since the get_backend_stats() snapshot before.
     """
-    text = []
+    delta = {}
+    for backend, stats in _stats.items():
+        base = before.get(backend, {})
+        delta[backend] = {key: stats[key] - base.get(key, 0) for key in _STAT_KEYS}
+    return delta
+
+
+def reset_backend_stats() -> None:
+    _stats.clear()
 
+
+def backend_order(backends: Sequence[str] = PDF_BACKENDS, auto_order: bool = PDF_BACKEND_AUTO_ORDER) -> List[str]:
+    """
+    Backends in the order they are tried. With auto_order, backends that have
+    parsed at least PDF_BACKEND_MIN_PAGES pages come first, fastest first.
+    """
+    backends = list(backends)
+    if not auto_order:
+        return backends
+
+    def speed(backend: str) -> float:
+        stats = _stats.get(backend)
+        if not stats or stats["pages"] < PDF_BACKEND_MIN_PAGES:
+            return float("inf")
+        return stats["seconds"] / stats["pages"]
+
+    return sorted(backends, key=speed)  # stable: unmeasured backends keep their order
+
+
+@contextmanager
+def _time_budget(seconds: Optional[float]):
+    """
+    Raise PDFTimeoutError in the block once seconds have passed. Only possible
+    in the main thread; elsewhere the block runs unbounded and callers check
+    the elapsed time afterwards.
+    """
+    if not seconds or seconds <= 0 or threading.current_thread() is not threading.main_thread() \
+            or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise PDFTimeoutError(f"parse time budget of {seconds:.0f}s exceeded")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text.append(page_text)
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _read_pages(
+    backend: str,
+    file_path: Path,
+    max_pages: Optional[int],
+    start_page: int,
+    page_timeout: Optional[float],
+    deadline: Optional[float]
+) -> str:
+    """
+    Text of one backend's pages, each page bounded by page_timeout and the
+    file's deadline (a time.monotonic() value).
+    """
+    stats = _stats_for(backend)
+    pages = BACKENDS[backend][0](file_path, start_page)
+    text = ""
+    try:
+        page_number = 0
+        while max_pages is None or page_number < max_pages:
+            budget = page_timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PDFTimeoutError("file parse time budget exceeded")
+                budget = remaining if budget is None else min(budget, remaining)
+
+            start = time.monotonic()
+            with _time_budget(budget):
+                extracted = next(pages, None)
+            elapsed = time.monotonic() - start
+            if extracted is None:
+                break
+            if budget is not None and elapsed > budget:
+                raise PDFTimeoutError(f"page {start_page + page_number} took {elapsed:.1f}s")
+
+            stats["pages"] += 1
+            if extracted:
+                text += extracted + "\n"
+            page_number += 1
+    finally:
+        pages.close()
+    return text
+
+
+def extract_pdf_text(
+    file_path: Path,
+    max_pages: Optional[int] = None,
+    start_page: int = 0,
+    backends: Optional[Sequence[str]] = None,
+    page_timeout: Optional[float] = PDF_PAGE_TIMEOUT,
+    file_timeout: Optional[float] = PDF_FILE_TIMEOUT
+) -> str:
+    """
+    Extract the text of a PDF, trying each backend until one yields text
+    (see extract_pdf_text_with_backend).
+    """
+    return extract_pdf_text_with_backend(file_path, max_pages, start_page, backends, page_timeout, file_timeout)[0]
+
+
+def extract_pdf_text_with_backend(
+    file_path: Path,
+    max_pages: Optional[int] = None,
+    start_page: int = 0,
+    backends: Optional[Sequence[str]] = None,
+    page_timeout: Optional[float] = PDF_PAGE_TIMEOUT,
+    file_timeout: Optional[float] = PDF_FILE_TIMEOUT
+) -> Tuple[str, Optional[str]]:
+    """
+    Extract the text of a PDF, trying each backend until one yields text.
+
+    Args:
+        file_path: PDF file
+        max_pages: Read at most this many pages (None = all)
+        start_page: First page to read
+        backends: Backend names to try (None = backend_order())
+        page_timeout: Seconds allowed per page (None = unlimited)
+        file_timeout: Seconds allowed for the file, across backends (None = unlimited)
+
+    Returns:
+        (extracted text, name of the backend that produced it); ("", None)
+        if the backends worked but found no text (e.g. scans)
+
+    Raises:
+        PDFTimeoutError: The file's time budget ran out
+        PDFExtractionError: Every backend failed
+    """
+    backends = list(backends or backend_order())
+    deadline = time.monotonic() + file_timeout if file_timeout else None
+    errors = []
+    for backend in backends:
+        stats = _stats_for(backend)
+        stats["files"] += 1
+        start = time.perf_counter()
+        try:
+            text = _read_pages(backend, Path(file_path), max_pages, start_page, page_timeout, deadline)
+        except PDFTimeoutError as e:
+            stats["timeouts"] += 1
+            errors.append(f"{backend}: timed out ({e})")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise PDFTimeoutError("; ".join(errors)) from None
+            continue
+        except Exception as e:
+            stats["failed"] += 1
+            errors.append(f"{backend}: {e}")
+            continue
+        finally:
+            stats["seconds"] += time.perf_counter() - start
+
+        if text.strip():
+            stats["succeeded"] += 1
+            return text, backend
+        stats["empty"] += 1
 
-    except Exception as e:
+    if len(errors) == len(backends):
+        raise PDFExtractionError("; ".join(errors))
+    return "", None
+
+
+def count_pdf_pages(file_path: Path, backends: Optional[Sequence[str]] = None) -> Optional[int]:
+    """
+    Number of pages according to the first backend that can open the file
+    (None if none can).
+    """
+    for backend in (backends or backend_order()):
+        try:
+            return BACKENDS[backend][1](Path(file_path))
+        except Exception:
+            continue
+    return None
+
+
+def extract_text_from_pdf(file_path: str) -> str:
+    """
+    Extracts text from a PDF file ("" if it cannot be read).
+    """
+    try:
+        return extract_pdf_text(Path(file_path))
+    except Exception:
         # Fail gracefully
         return ""
 
-    return "\n".join(text)
+
+def benchmark_backends(paths: Sequence[Path], backends: Sequence[str] = tuple(BACKENDS)) -> Dict[str, Dict[str, float]]:
+    """
+    Run every backend over every PDF (no fallback) and report get_backend_stats().
+    """
+    reset_backend_stats()
+    for path in paths:
+        for backend in backends:
+            try:
+                extract_pdf_text(path, backends=[backend])
+            except Exception:
+                pass
+    return get_backend_stats()
+
+
+def main():
+    import argparse
+    import json
+    from src.config import INPUT_DOCS_DIR
+
+    parser = argparse.ArgumentParser(description="Compare PDF text extraction backends")
+    parser.add_argument("paths", nargs="*", type=Path, help="PDF files or directories (default: INPUT_DOCS_DIR)")
+    parser.add_argument("--output", type=str, default=None, help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths or [INPUT_DOCS_DIR]:
+        paths.extend(sorted(path.rglob("*.pdf")) if path.is_dir() else [path])
+
+    report = benchmark_backends(paths)
+    print(f"{len(paths)} PDFs")
+    print(f"{'backend':<12} {'ok':>5} {'empty':>6} {'failed':>7} {'timeouts':>9} {'pages':>7} {'ms/page':>8}")
+    for backend, r in sorted(report.items(), key=lambda item: item[1]["seconds_per_page"] or float("inf")):
+        ms_per_page = r["seconds_per_page"] * 1000 if r["seconds_per_page"] is not None else float("nan")
+        print(f"{backend:<12} {r['succeeded']:>5} {r['empty']:>6} {r['failed']:>7} {r['timeouts']:>9} "
+              f"{r['pages']:>7} {ms_per_page:>8.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Text cache module: Persistent cache of extracted document text.
+
+Parsing PDFs (and DOCX files) is the most expensive step of a run, so the
+extracted text is stored under PROCESSED_TEXT_DIR and reused by later runs,
+re-classification experiments and index rebuilds. Entries are content
+addressed: the key is the SHA-256 of the file's bytes plus the extractor
+version (TEXT_EXTRACTOR_VERSION and the PDF backend chain), so renamed or
+copied files still hit and a change in extraction misses every old entry.
+Entries are gzip-compressed and written atomically, so ingestion workers can
+share the cache.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+from src.config import PROCESSED_TEXT_DIR, TEXT_CACHE_ENABLED, TEXT_EXTRACTOR_VERSION, PDF_BACKENDS
+from src.ingestion.manifest import file_hash
+
+# File types worth caching; plain text is as cheap to read as a cache entry
+CACHED_SUFFIXES = (".pdf", ".docx")
+
+
+class TextCache:
+    """
+    Extracted text per (file content hash, extractor version), one gzip file per entry.
+    """
+
+    def __init__(self, directory: Path = PROCESSED_TEXT_DIR, version: Optional[str] = None, compresslevel: int = 6):
+        """
+        Args:
+            directory: Cache directory (entries go in 2-character subdirectories)
+            version: Extractor version tag (default: TEXT_EXTRACTOR_VERSION plus PDF_BACKENDS)
+            compresslevel: gzip level for new entries
+        """
+        self.directory = Path(directory)
+        self.version = version or f"v{TEXT_EXTRACTOR_VERSION}-{'+'.join(PDF_BACKENDS)}"
+        self.compresslevel = compresslevel
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, file_path: Path) -> str:
+        """
+        Cache key of a file: the SHA-256 of its contents.
+        """
+        return file_hash(file_path)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.{self.version}.txt.gz"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Cached text for a key, or None on a miss (unreadable entries count as misses).
+        """
+        path = self._entry_path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8", errors="surrogatepass") as f:
+                text = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, zlib.error, UnicodeDecodeError):
+            # Truncated or corrupt entry: drop it so it gets rewritten
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """
+        Store text for a key. The entry is written to a temporary file and
+        renamed into place, so readers never see a partial entry.
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=self.compresslevel, mtime=0) as f:
+                f.write(text.encode("utf-8", errors="surrogatepass"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def get_stats(self) -> Dict:
+        """
+        Get statistics about the cache (hit/miss counts are for this process).
+
+        Returns:
+            Dict with hit/miss counts, hit rate, number of entries and bytes on disk
+        """
+        entries = list(self.directory.glob(f"*/*.{self.version}.txt.gz")) if self.directory.exists() else []
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(path.stat().st_size for path in entries),
+            "cache_dir": str(self.directory),
+            "version": self.version
+        }
+
+    def clear(self) -> None:
+        """
+        Remove every cached entry (of all versions) and reset the counters.
+        """
+        if self.directory.exists():
+            for subdir in self.directory.iterdir():
+                if subdir.is_dir() and len(subdir.name) == 2:
+                    shutil.rmtree(subdir, ignore_errors=True)
+        self.hits = 0
+        self.misses = 0
+
+
+_default_cache: Optional[TextCache] = None
+
+
+def get_text_cache() -> Optional[TextCache]:
+    """
+    Process-wide text cache. Returns None when caching is disabled in config.
+    """
+    global _default_cache
+    if not TEXT_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        _default_cache = TextCache()
+    return _default_cache
+
+
+def set_text_cache(cache: Optional[TextCache]) -> Optional[TextCache]:
+    """
+    Replace the process-wide text cache (e.g. with an empty one to time cold
+    parsing); worker processes forked afterwards inherit it. Returns the
+    previous cache.
+    """
+    global _default_cache
+    previous = _default_cache
+    _default_cache = cache
+    return previous
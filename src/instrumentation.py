@@ -0,0 +1,486 @@
+"""
+Instrumentation: per-stage timers and counters, and opt-in stage profiling.
+
+Pipeline code wraps its stages in ``timed(stage, ...)``, which records the
+number of calls, items (e.g. documents or chunks per batch), total and
+maximum time per (stage, labels) pair. Per-document stages also keep the
+SLOW_DOCUMENTS slowest documents. Worker processes ship their numbers back
+with the same snapshot/diff/merge calls used for the PDF backend stats.
+
+Results can be printed (format_summary), written as JSON or in the
+Prometheus text format (write_metrics). Stages listed in PROFILE_STAGES (or
+passed to enable_profiling) are additionally profiled, with cProfile or a
+sampling profiler that records collapsed stacks (flamegraph input). Each
+process writes its own files to PROFILE_DIR: <stage>.<pid>.prof or
+<stage>.<pid>.folded.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from src.config import (
+    INSTRUMENTATION_ENABLED,
+    SLOW_DOCUMENTS,
+    PROFILE_STAGES,
+    PROFILER,
+    PROFILE_SAMPLE_INTERVAL,
+    PROFILE_DIR
+)
+
+PROFILERS = ("cprofile", "sampling")
+
+# (name, sorted label pairs)
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Optional[Dict]) -> _Key:
+    return name, tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+class Metrics:
+    """
+    Thread-safe registry of stage timers, counters and slowest documents.
+    """
+
+    def __init__(self, slow_documents: int = SLOW_DOCUMENTS):
+        """
+        Args:
+            slow_documents: Slowest documents kept per stage (0 disables tracking)
+        """
+        self.slow_documents = slow_documents
+        self._lock = threading.Lock()
+        self.timers: Dict[_Key, List[float]] = {}  # key -> [calls, items, total seconds, max seconds]
+        self.counters: Dict[_Key, float] = {}
+        self.slowest: Dict[str, Dict[str, float]] = {}  # stage -> {document: seconds}
+
+    def observe(self, stage: str, seconds: float, labels: Optional[Dict] = None, items: int = 1, document: Optional[str] = None) -> None:
+        """
+        Record one timed call of a stage covering items items.
+        """
+        key = _key(stage, labels)
+        with self._lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                self.timers[key] = [1, items, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += items
+                timer[2] += seconds
+                timer[3] = max(timer[3], seconds)
+            if document is not None and self.slow_documents:
+                self._note_document(stage, document, seconds)
+
+    def _note_document(self, stage: str, document: str, seconds: float) -> None:
+        documents = self.slowest.setdefault(stage, {})
+        if seconds <= documents.get(document, -1.0):
+            return
+        documents[document] = seconds
+        # Prune to the slowest N once twice as many are held
+        if len(documents) > 2 * self.slow_documents:
+            for name, _ in sorted(documents.items(), key=lambda item: item[1])[:len(documents) - self.slow_documents]:
+                del documents[name]
+
+    def increment(self, name: str, value: float = 1, labels: Optional[Dict] = None) -> None:
+        """
+        Add value to a counter.
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict:
+        """
+        Copy of all numbers (picklable, e.g. to send from a worker process).
+        """
+        with self._lock:
+            return {
+                "timers": {key: list(timer) for key, timer in self.timers.items()},
+                "counters": dict(self.counters),
+                "slowest": {stage: dict(documents) for stage, documents in self.slowest.items()}
+            }
+
+    def diff(self, before: Dict) -> Dict:
+        """
+        Numbers accumulated since the snapshot before. Maximums and slowest
+        documents are not subtractable and are returned as they are; merging
+        them again is harmless.
+        """
+        now = self.snapshot()
+        timers = {}
+        for key, (calls, items, total, longest) in now["timers"].items():
+            old = before["timers"].get(key, [0, 0, 0.0, 0.0])
+            if calls > old[0]:
+                timers[key] = [calls - old[0], items - old[1], total - old[2], longest]
+        counters = {key: value - before["counters"].get(key, 0) for key, value in now["counters"].items()}
+        return {
+            "timers": timers,
+            "counters": {key: value for key, value in counters.items() if value},
+            "slowest": now["slowest"]
+        }
+
+    def merge(self, snapshot: Dict) -> None:
+        """
+        Add numbers from a snapshot or diff (e.g. from a worker process).
+        """
+        if not snapshot:
+            return
+        with self._lock:
+            for key, (calls, items, total, longest) in snapshot.get("timers", {}).items():
+                timer = self.timers.setdefault(key, [0, 0, 0.0, 0.0])
+                timer[0] += calls
+                timer[1] += items
+                timer[2] += total
+                timer[3] = max(timer[3], longest)
+            for key, value in snapshot.get("counters", {}).items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            if self.slow_documents:
+                for stage, documents in snapshot.get("slowest", {}).items():
+                    for document, seconds in documents.items():
+                        self._note_document(stage, document, seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.slowest.clear()
+
+    def summary(self) -> Dict:
+        """
+        JSON-serializable summary.
+
+        Returns:
+            Dict with "stages" (per stage and labels: calls, items, total_seconds,
+            ms_per_item, max_ms; slowest stages first), "counters" and
+            "slowest_documents" (per stage, slowest first)
+        """
+        snapshot = self.snapshot()
+        stages = [
+            {
+                "stage": name,
+                "labels": dict(labels),
+                "calls": int(calls),
+                "items": int(items),
+                "total_seconds": total,
+                "ms_per_item": total * 1000 / items if items else 0.0,
+                "max_ms": longest * 1000
+            }
+            for (name, labels), (calls, items, total, longest) in snapshot["timers"].items()
+        ]
+        stages.sort(key=lambda stage: stage["total_seconds"], reverse=True)
+        return {
+            "stages": stages,
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(snapshot["counters"].items())
+            ],
+            "slowest_documents": {
+                stage: [
+                    {"document": document, "seconds": seconds}
+                    for document, seconds in sorted(documents.items(), key=lambda item: item[1], reverse=True)[:self.slow_documents]
+                ]
+                for stage, documents in snapshot["slowest"].items()
+            }
+        }
+
+    def to_prometheus(self, prefix: str = "docsys") -> str:
+        """
+        Metrics in the Prometheus text exposition format.
+        """
+        def labels_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+            if not labels:
+                return ""
+            escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+            return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent in each pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds summary"
+        ]
+        for (name, labels), (calls, _, total, _) in sorted(snapshot["timers"].items()):
+            text = labels_text((("stage", name),) + labels)
+            lines.append(f"{prefix}_stage_seconds_sum{text} {total:.6f}")
+            lines.append(f"{prefix}_stage_seconds_count{text} {int(calls)}")
+        lines += [f"# HELP {prefix}_stage_items_total Items (documents, chunks, queries) processed per stage.",
+                  f"# TYPE {prefix}_stage_items_total counter"]
+        for (name, labels), (_, items, _, _) in sorted(snapshot["timers"].items()):
+            lines.append(f"{prefix}_stage_items_total{labels_text((('stage', name),) + labels)} {int(items)}")
+        lines += [f"# HELP {prefix}_stage_max_seconds Longest single call per stage.",
+                  f"# TYPE {prefix}_stage_max_seconds gauge"]
+        for (name, labels), (_, _, _, longest) in sorted(snapshot["timers"].items()):
+            lines.append(f"{prefix}_stage_max_seconds{labels_text((('stage', name),) + labels)} {longest:.6f}")
+        # One HELP/TYPE header per counter family, followed by all of its label sets
+        family = None
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            if name != family:
+                family = name
+                lines += [f"# HELP {prefix}_{name}_total Counter {name}.",
+                          f"# TYPE {prefix}_{name}_total counter"]
+            lines.append(f"{prefix}_{name}_total{labels_text(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """
+    Process-wide metrics registry.
+    """
+    return _metrics
+
+
+def get_metrics_snapshot() -> Dict:
+    return _metrics.snapshot()
+
+
+def diff_metrics(before: Dict) -> Dict:
+    """
+    Numbers accumulated since the get_metrics_snapshot() snapshot before.
+    """
+    return _metrics.diff(before)
+
+
+def merge_metrics(snapshot: Dict) -> None:
+    """
+    Add numbers collected in another process (see diff_metrics).
+    """
+    _metrics.merge(snapshot)
+
+
+def reset_metrics() -> None:
+    _metrics.reset()
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """
+    Add value to the counter name (with labels).
+    """
+    if INSTRUMENTATION_ENABLED:
+        _metrics.increment(name, value, labels)
+
+
+@contextmanager
+def timed(stage: str, document: Optional[str] = None, items: int = 1, **labels) -> Iterator[None]:
+    """
+    Time the enclosed block as one call of stage.
+
+    Args:
+        stage: Stage name, e.g. "extract"
+        document: File name, to track the slowest documents of the stage
+        items: Documents / chunks / queries handled by the block
+        labels: Extra labels, e.g. path="heuristic"
+    """
+    if not INSTRUMENTATION_ENABLED:
+        yield
+        return
+    token = _profiler.start(stage) if stage in _profiler.stages else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if token is not None:
+            _profiler.stop(token)
+        _metrics.observe(stage, seconds, labels, items, document)
+
+
+class _StageProfiler:
+    """
+    Opt-in profiling of selected stages, with cProfile or stack sampling.
+    """
+
+    def __init__(self):
+        self.stages = frozenset()
+        self.mode = PROFILER
+        self.directory = Path(PROFILE_DIR)
+        self.interval = PROFILE_SAMPLE_INTERVAL
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles: Dict[Tuple[str, int], cProfile.Profile] = {}
+        self._active: Dict[int, List[str]] = {}  # thread id -> stages being sampled
+        self._samples: Dict[str, Counter] = {}
+        self._sampler_pid: Optional[int] = None
+
+    def configure(self, stages: Iterable[str], mode: str, directory: Path, interval: float) -> None:
+        if mode not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {mode} (expected one of {PROFILERS})")
+        self.stages = frozenset(stages)
+        self.mode = mode
+        self.directory = Path(directory)
+        self.interval = interval
+
+    def start(self, stage: str):
+        if self.mode == "cprofile":
+            # One profiler per thread; nested profiled stages count towards the outer one
+            if getattr(self._local, "profiling", False) or sys.getprofile() is not None:
+                return None
+            with self._lock:
+                profile = self._profiles.setdefault((stage, threading.get_ident()), cProfile.Profile())
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is active (Python 3.12+ allows one per process)
+                return None
+            self._local.profiling = True
+            return profile
+
+        self._ensure_sampler()
+        with self._lock:
+            self._active.setdefault(threading.get_ident(), []).append(stage)
+        return stage
+
+    def stop(self, token) -> None:
+        if isinstance(token, cProfile.Profile):
+            token.disable()
+            self._local.profiling = False
+            return
+        with self._lock:
+            stages = self._active.get(threading.get_ident())
+            if stages:
+                stages.pop()
+
+    def _ensure_sampler(self) -> None:
+        # Per process: a worker forked from a profiled parent starts its own sampler
+        if self._sampler_pid == os.getpid():
+            return
+        with self._lock:
+            if self._sampler_pid == os.getpid():
+                return
+            self._sampler_pid = os.getpid()
+            self._active = {}
+            threading.Thread(target=self._sample_loop, name="stage-sampler", daemon=True).start()
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                active = [(thread, stages[-1]) for thread, stages in self._active.items() if stages and thread != own]
+            for thread, stage in active:
+                frame = frames.get(thread)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                with self._lock:
+                    self._samples.setdefault(stage, Counter())[";".join(reversed(stack))] += 1
+
+    def dump(self, directory: Optional[Path] = None) -> List[Path]:
+        directory = Path(directory or self.directory)
+        written = []
+        pid = os.getpid()
+        with self._lock:
+            profiles = dict(self._profiles)
+            samples = {stage: Counter(counts) for stage, counts in self._samples.items()}
+        if profiles or samples:
+            directory.mkdir(parents=True, exist_ok=True)
+
+        by_stage: Dict[str, List[cProfile.Profile]] = {}
+        for (stage, _), profile in profiles.items():
+            by_stage.setdefault(stage, []).append(profile)
+        for stage, stage_profiles in by_stage.items():
+            try:
+                stats = pstats.Stats(stage_profiles[0])
+                for profile in stage_profiles[1:]:
+                    stats.add(profile)
+            except TypeError:
+                # Profiler enabled but nothing recorded yet
+                continue
+            path = directory / f"{stage}.{pid}.prof"
+            stats.dump_stats(str(path))
+            written.append(path)
+
+        for stage, counts in samples.items():
+            path = directory / f"{stage}.{pid}.folded"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, n in counts.most_common():
+                    f.write(f"{stack} {n}\n")
+            written.append(path)
+        return written
+
+
+_profiler = _StageProfiler()
+if PROFILE_STAGES:
+    _profiler.configure(PROFILE_STAGES, PROFILER, PROFILE_DIR, PROFILE_SAMPLE_INTERVAL)
+
+
+def enable_profiling(
+    stages: Iterable[str],
+    profiler: str = PROFILER,
+    directory: Path = PROFILE_DIR,
+    interval: float = PROFILE_SAMPLE_INTERVAL
+) -> None:
+    """
+    Profile the given stages from now on (worker processes started later inherit this).
+
+    Args:
+        stages: Stage names passed to timed(), e.g. ["read", "extract"]
+        profiler: "cprofile" (deterministic, per-function times) or "sampling"
+            (low overhead, collapsed stacks for flamegraph tools)
+        directory: Where dump_profiles() writes its files
+        interval: Seconds between stack samples (sampling profiler)
+    """
+    _profiler.configure(stages, profiler, directory, interval)
+
+
+def profiling_enabled() -> bool:
+    return bool(_profiler.stages)
+
+
+def dump_profiles(directory: Optional[Path] = None) -> List[Path]:
+    """
+    Write the profiles collected in this process so far (cumulative; rewrites
+    this process's files). cProfile output loads with pstats or snakeviz;
+    .folded files are "stack count" lines for flamegraph.pl or speedscope.
+
+    Returns:
+        Paths written
+    """
+    return _profiler.dump(directory)
+
+
+def write_metrics(path: Path) -> None:
+    """
+    Write the metrics as JSON (.json) or in the Prometheus text format (anything else).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_metrics.summary(), f, indent=2)
+    else:
+        path.write_text(_metrics.to_prometheus(), encoding="utf-8")
+
+
+def format_summary(top: int = 3) -> str:
+    """
+    Human-readable table of stage timings plus the slowest documents per stage.
+    """
+    summary = _metrics.summary()
+    if not summary["stages"]:
+        return ""
+    names = []
+    for stage in summary["stages"]:
+        labels = ",".join(f"{k}={v}" for k, v in stage["labels"].items())
+        names.append(f"{stage['stage']}[{labels}]" if labels else stage["stage"])
+    width = max(len(name) for name in names + ["stage"])
+    lines = [f"{'stage':<{width}} {'calls':>7} {'items':>7} {'total s':>9} {'ms/item':>9} {'max ms':>9}"]
+    for name, stage in zip(names, summary["stages"]):
+        lines.append(f"{name:<{width}} {stage['calls']:>7} {stage['items']:>7} {stage['total_seconds']:>9.2f} "
+                     f"{stage['ms_per_item']:>9.1f} {stage['max_ms']:>9.1f}")
+    for stage, documents in summary["slowest_documents"].items():
+        slowest = ", ".join(f"{doc['document']} ({doc['seconds'] * 1000:.0f} ms)" for doc in documents[:top])
+        lines.append(f"Slowest {stage}: {slowest}")
+    return "\n".join(lines)
@@ -1,71 +1,384 @@
+"""
+Command-line entry point.
+
+`python -m src.main` runs the full pipeline over INPUT_DOCS_DIR. Subcommands
+run single steps on given files or directories: ingest, classify, extract,
+index and search. Heavy libraries (torch, sentence_transformers, faiss) are
+imported only by the steps that use them, so model-free runs such as
+`classify --heuristic-only` or `extract --doc-class Invoice` start quickly.
+"""
+
+import argparse
 import json
-from src.ingestion.loader import list_documents, read_document
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from src.config import CLASSIFY_MAX_PAGES, DOC_LABELS, INCREMENTAL, OUTPUT_JSONL_FILE, PROFILE_STAGES, PROFILER, TOP_K_RESULTS
+from src.ingestion.loader import list_documents
+from src.ingestion.manifest import DocumentManifest
+from src.ingestion.parallel import complete_documents, iter_documents
+from src.ingestion.pdf_reader import get_backend_stats
 from src.classification.classifier import DocumentClassifier
-from src.extraction.dispatcher import extract_fields
-
-# Step 1: Load documents
-docs = list_documents()  # returns list of file paths from INPUT_DOCS_DIR
-documents = []
-print(f"Found {len(docs)} documents to process...")
-
-for path in docs:
-    try:
-        text = read_document(path)
-        documents.append({
-            "file_name": path.name, 
-            "text": text,
-            "readable": bool(text and text.strip())
-        })
-    except Exception as e:
-        print(f"Error reading {path.name}: {e}")
-        # Still add it but mark as not readable
-        documents.append({
-            "file_name": path.name,
-            "text": "",
-            "readable": False,
-            "error": str(e)
-        })
-
-print(f"Successfully loaded {len(documents)} documents.\n")
-
-# Step 2: Initialize classifier
-classifier = DocumentClassifier()
-
-# Step 3: Classify + extract
-final_output = {}
-
-for doc in documents:
-    try:
-        # If document couldn't be read, mark as Unclassifiable
+from src.embeddings.model_registry import get_startup_report
+from src.instrumentation import dump_profiles, enable_profiling, format_summary, profiling_enabled, write_metrics
+from src.pipeline import (
+    run_streaming, classify_stage, unreadable_result, classified_result, error_result, index_record, needs_full_text
+)
+
+
+def print_result(file_name: str, result: dict) -> None:
+    if result["class"] == "Unclassifiable":
+        print(f"✗ {file_name}: Unclassifiable ({result.get('reason', 'Unknown error')})")
+    else:
+        print(f"✓ {file_name}: {result['class']} ({result['confidence']:.2%})")
+
+
+def resolve_paths(paths: Sequence[str]) -> List[Path]:
+    """
+    Documents named on the command line, with directories expanded to their
+    supported files. No paths means every document in INPUT_DOCS_DIR.
+    """
+    if not paths:
+        return list_documents()
+    resolved = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            resolved.extend(sorted(list_documents(path)))
+        elif path.exists():
+            resolved.append(path)
+        else:
+            raise FileNotFoundError(f"Document not found: {path}")
+    return resolved
+
+
+def report_metrics(metrics_path: Optional[str] = None) -> None:
+    """
+    Print the stage timings, then write the metrics and profiles if requested.
+    """
+    summary = format_summary()
+    if summary:
+        print(f"\n{summary}")
+    if metrics_path:
+        write_metrics(metrics_path)
+        print(f"Metrics written to {metrics_path}")
+    if profiling_enabled():
+        for path in dump_profiles():
+            print(f"Profile written to {path}")
+
+
+def main(incremental: bool = INCREMENTAL, stream: bool = False, index: bool = False,
+         metrics_path: str = None, profile_stages=PROFILE_STAGES, profiler: str = PROFILER):
+    # Profiling is configured before any worker process is started, so workers inherit it
+    if profile_stages:
+        enable_profiling(profile_stages, profiler)
+
+    # Step 1: Load documents (parsed in parallel worker processes)
+    all_docs = list_documents()  # returns list of file paths from INPUT_DOCS_DIR
+    docs = all_docs
+    print(f"Found {len(all_docs)} documents...")
+
+    # In incremental mode only new or modified files are processed
+    manifest = None
+    if incremental:
+        manifest = DocumentManifest()
+        manifest.load()
+        removed = manifest.prune(all_docs)
+        docs = manifest.changed_files(all_docs)
+        print(f"Incremental run: {len(docs)} new or modified, {len(all_docs) - len(docs)} unchanged, {len(removed)} removed")
+
+    print(f"Processing {len(docs)} documents...")
+    final_output = {}
+    classifier = None
+
+    # A full run rebuilds the index from scratch; an incremental run replaces
+    # the chunks of new or modified documents and drops those of removed files
+    engine = None
+    if index:
+        from src.retrieval.search import SemanticSearchEngine
+        engine = SemanticSearchEngine(rebuild_index=not incremental)
+        if incremental:
+            current_names = {path.name for path in all_docs}
+            for name in {Path(key).name for key in removed} - current_names:
+                engine.remove_document(name, save=False)
+        else:
+            engine.vector_store.reset()
+        engine.rebuild_index = False
+
+    if stream:
+        # Streaming mode: documents flow through ingest -> classify -> extract
+        # (-> index) a batch at a time and results are appended as JSON Lines
+        def on_result(file_name: str, result: dict) -> None:
+            print_result(file_name, result)
+            if manifest is not None:
+                final_output[file_name] = result
+
+        if docs:
+            classifier = DocumentClassifier()
+            count = run_streaming(docs, classifier=classifier, index=index, on_result=on_result,
+                                  engine=engine, reset_index=False)
+            print(f"\nStreamed {count} results to {OUTPUT_JSONL_FILE}")
+    else:
+        # PDFs are read only up to CLASSIFY_MAX_PAGES pages here; the rest is
+        # read after classification, for documents that need their full text
+        documents = []
+        for doc in iter_documents(docs, max_pages=CLASSIFY_MAX_PAGES):
+            if "error" in doc:
+                print(f"Error reading {doc['file_name']}: {doc['error']}")
+            documents.append(doc)
+
+        cached = sum(1 for doc in documents if doc.get("cached"))
+        if cached:
+            print(f"Text of {cached} documents served from the text cache")
+        print(f"Successfully loaded {len(documents)} documents.\n")
+
+        # Step 2: Initialize classifier (skipped when there is nothing to classify)
+        readable_docs = [doc for doc in documents if doc["readable"]]
+        classifier = DocumentClassifier() if readable_docs else None
+
+        # Step 3: Classify (one batched pass over all readable documents)
+        cls_results = []
+        if readable_docs:
+            try:
+                cls_results = classifier.classify_batch([doc["text"] for doc in readable_docs])
+            except Exception as e:
+                print(f"Batch classification failed ({e}), classifying documents one by one")
+                cls_results = []
+                for doc in readable_docs:
+                    try:
+                        cls_results.append(classifier.classify(doc["text"]))
+                    except Exception as doc_error:
+                        cls_results.append(doc_error)
+        batch_results = {doc["file_name"]: cls_result for doc, cls_result in zip(readable_docs, cls_results)}
+
+        # Step 4: Read the remaining pages where extraction or indexing needs them
+        documents = list(complete_documents(
+            (doc, needs_full_text(batch_results.get(doc["file_name"]), index)) for doc in documents
+        ))
+        readable_docs = [doc for doc in documents if doc["readable"]]
+
+        # Step 5: Extract
+        for doc in documents:
+            try:
+                # If document couldn't be read, mark as Unclassifiable
+                if not doc["readable"]:
+                    final_output[doc["file_name"]] = unreadable_result(doc)
+                else:
+                    cls_result = batch_results[doc["file_name"]]
+                    if isinstance(cls_result, Exception):
+                        raise cls_result
+                    final_output[doc["file_name"]] = classified_result(doc, cls_result)
+            except Exception as e:
+                final_output[doc["file_name"]] = error_result(e)
+            print_result(doc["file_name"], final_output[doc["file_name"]])
+
+        if index and readable_docs:
+            engine.index_documents(
+                [index_record(doc, final_output[doc["file_name"]]) for doc in readable_docs],
+                save=False
+            )
+
+    # The streaming index stage saves the index itself once its stream is done
+    if engine is not None and not (stream and docs):
+        engine.vector_store.save()
+
+    # Merge with results of unchanged files and update the manifest
+    if manifest is not None:
+        paths_by_name = {path.name: path for path in docs}
+        for file_name, result in final_output.items():
+            manifest.record(paths_by_name[file_name], result)
+        manifest.save()
+        final_output = {
+            path.name: final_output[path.name] if path.name in final_output else manifest.get_result(path)
+            for path in all_docs
+        }
+
+    # Step 6: Save output.json (in streaming mode only when a manifest holds the full result set)
+    if not stream or manifest is not None:
+        with open("output.json", "w", encoding="utf-8") as f:
+            json.dump(final_output, f, indent=2)
+        print(f"\nResults for {len(final_output)} documents saved to output.json")
+
+    for model_name, times in get_startup_report().items():
+        print(f"\nModel {model_name} loaded in {times['load_seconds']:.2f}s")
+
+    if classifier is not None and classifier.embedding_cache is not None:
+        cache_stats = classifier.embedding_cache.get_stats()
+        print(f"\nEmbedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.1%} hit rate)")
+
+    for backend, stats in get_backend_stats().items():
+        if stats["files"]:
+            ms_per_page = f"{stats['seconds_per_page'] * 1000:.1f} ms/page" if stats["pages"] else "no pages"
+            print(f"PDF backend {backend}: {stats['succeeded']}/{stats['files']} files with text, "
+                  f"{stats['failed']} failed, {stats['timeouts']} timed out, {ms_per_page}")
+
+    report_metrics(metrics_path)
+
+    print(f"\nExtraction complete! {len(docs)} documents processed.")
+
+
+def run_ingest(paths: Sequence[str] = (), max_pages: Optional[int] = None) -> None:
+    """
+    Read documents (storing PDF/DOCX text in the text cache) without classifying them.
+    """
+    docs = resolve_paths(paths)
+    print(f"Reading {len(docs)} documents...")
+    readable = cached = 0
+    for doc in iter_documents(docs, max_pages=max_pages):
         if not doc["readable"]:
-            final_output[doc["file_name"]] = {
-                "class": "Unclassifiable",
-                "confidence": 0.0,
-                "reason": doc.get("error", "Unable to read file")
-            }
-            print(f"✗ {doc['file_name']}: Unclassifiable (unreadable - {doc.get('error', 'Unknown error')})")
+            print(f"✗ {doc['file_name']}: {doc.get('error', 'Unable to read file')}")
             continue
-        
-        cls_result = classifier.classify(doc["text"])
-        extracted = extract_fields(cls_result["label"], doc["text"])
-        
-        final_output[doc["file_name"]] = {
-            "class": cls_result["label"],
-            "confidence": cls_result["confidence"],
-            **extracted
-        }
-        print(f"✓ {doc['file_name']}: {cls_result['label']} ({cls_result['confidence']:.2%})")
-    except Exception as e:
-        print(f"✗ {doc['file_name']}: Error during classification - {e}")
-        final_output[doc["file_name"]] = {
-            "class": "Unclassifiable",
-            "confidence": 0.0,
-            "reason": f"Classification error: {str(e)}"
-        }
-        continue
+        readable += 1
+        cached += bool(doc.get("cached"))
+        print(f"✓ {doc['file_name']}: {len(doc['text'])} characters{' (cached)' if doc.get('cached') else ''}")
+    print(f"\n{readable}/{len(docs)} documents readable, {cached} served from the text cache")
+
+
+def run_classify(paths: Sequence[str] = (), heuristic_only: bool = False, output_path: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Classify documents without extracting fields. With heuristic_only no model
+    is loaded and documents the keyword heuristics can't place are labelled Other.
+    """
+    docs = resolve_paths(paths)
+    classifier = DocumentClassifier(use_model=not heuristic_only)
+    results = {}
+    for doc, cls_result in classify_stage(iter_documents(docs, max_pages=CLASSIFY_MAX_PAGES), classifier):
+        if cls_result is None:
+            result = unreadable_result(doc)
+        elif isinstance(cls_result, Exception):
+            result = error_result(cls_result)
+        else:
+            result = {"class": cls_result["label"], "confidence": cls_result["confidence"]}
+        results[doc["file_name"]] = result
+        print_result(doc["file_name"], result)
+
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults for {len(results)} documents saved to {output_path}")
+    return results
+
+
+def run_extract(
+    paths: Sequence[str] = (),
+    doc_class: Optional[str] = None,
+    heuristic_only: bool = False,
+    output_path: Path = OUTPUT_JSONL_FILE
+) -> int:
+    """
+    Classify documents (unless doc_class is given) and extract their fields,
+    writing one JSON line per document.
+    """
+    docs = resolve_paths(paths)
+    classifier = None if doc_class else DocumentClassifier(use_model=not heuristic_only)
+    count = run_streaming(docs, output_path, classifier=classifier, on_result=print_result, doc_class=doc_class)
+    print(f"\nStreamed {count} results to {output_path}")
+    return count
+
+
+def run_index(paths: Sequence[str] = (), output_path: Path = OUTPUT_JSONL_FILE) -> int:
+    """
+    Classify, extract and index documents, rebuilding the search index from them.
+    """
+    docs = resolve_paths(paths)
+    count = run_streaming(docs, output_path, index=True, on_result=print_result)
+    print(f"\nIndexed {count} documents; results streamed to {output_path}")
+    return count
+
+
+def run_search(query: str, k: int = TOP_K_RESULTS, doc_class: Optional[str] = None, as_json: bool = False) -> List[dict]:
+    """
+    Search the saved index and print the top k chunks.
+    """
+    from src.retrieval.search import SemanticSearchEngine
+    engine = SemanticSearchEngine()
+    results = engine.search(query, k=k, filters={"class": doc_class} if doc_class else None)
+    if as_json:
+        print(json.dumps(results, indent=2, default=str))
+        return results
+    if not results:
+        print("No results")
+    for rank, result in enumerate(results, 1):
+        print(f"{rank}. {result['file_name']} [{result.get('class', '?')}] score {result['similarity_score']:.3f}")
+        if result.get("text"):
+            snippet = " ".join(result["text"].split())
+            print(f"   {snippet[:160]}{'...' if len(snippet) > 160 else ''}")
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Classify and extract fields from documents. Without a command, runs the full pipeline over INPUT_DOCS_DIR"
+    )
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL,
+                        help="only process new or modified files, reusing results from the manifest (full run only)")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream documents through the pipeline and write results to output.jsonl as they finish (full run only)")
+    parser.add_argument("--index", action="store_true",
+                        help="also build the semantic search index (full run only)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write stage timings and counters to PATH (.json, otherwise Prometheus text format)")
+    parser.add_argument("--profile", metavar="STAGES", default=",".join(PROFILE_STAGES),
+                        help="comma-separated stages to profile, e.g. read,extract (written to PROFILE_DIR)")
+    parser.add_argument("--profiler", choices=("cprofile", "sampling"), default=PROFILER,
+                        help="profiler used for --profile stages")
+
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    paths_help = "documents or directories (default: INPUT_DOCS_DIR)"
+
+    ingest = commands.add_parser("ingest", help="read documents into the text cache")
+    ingest.add_argument("paths", nargs="*", help=paths_help)
+    ingest.add_argument("--max-pages", type=int, help="read at most this many pages per PDF")
+
+    classify = commands.add_parser("classify", help="classify documents")
+    classify.add_argument("paths", nargs="*", help=paths_help)
+    classify.add_argument("--heuristic-only", action="store_true",
+                          help="don't load the model; documents the keyword heuristics can't place are labelled Other")
+    classify.add_argument("--output", metavar="PATH", help="also write the results to PATH as JSON")
+
+    extract = commands.add_parser("extract", help="classify documents and extract their fields")
+    extract.add_argument("paths", nargs="*", help=paths_help)
+    extract.add_argument("--doc-class", choices=list(DOC_LABELS),
+                         help="class of every document: skip classification (no model is loaded)")
+    extract.add_argument("--heuristic-only", action="store_true",
+                         help="classify with the keyword heuristics only (no model)")
+    extract.add_argument("--output", metavar="PATH", default=OUTPUT_JSONL_FILE, help="JSON Lines output file")
+
+    index = commands.add_parser("index", help="classify, extract and index documents (rebuilds the index)")
+    index.add_argument("paths", nargs="*", help=paths_help)
+    index.add_argument("--output", metavar="PATH", default=OUTPUT_JSONL_FILE, help="JSON Lines output file")
+
+    search = commands.add_parser("search", help="search the index")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=TOP_K_RESULTS, help="number of results")
+    search.add_argument("--class", dest="doc_class", choices=list(DOC_LABELS), help="only return chunks of this class")
+    search.add_argument("--json", action="store_true", help="print the results as JSON")
+    return parser
+
+
+def cli(argv: Optional[Sequence[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    profile_stages = [stage for stage in args.profile.split(",") if stage]
+
+    if args.command is None:
+        main(incremental=args.incremental, stream=args.stream, index=args.index, metrics_path=args.metrics,
+             profile_stages=profile_stages, profiler=args.profiler)
+        return
+
+    # Configured before any worker process is started, so workers inherit it
+    if profile_stages:
+        enable_profiling(profile_stages, args.profiler)
+    if args.command == "ingest":
+        run_ingest(args.paths, max_pages=args.max_pages)
+    elif args.command == "classify":
+        run_classify(args.paths, heuristic_only=args.heuristic_only, output_path=args.output)
+    elif args.command == "extract":
+        run_extract(args.paths, doc_class=args.doc_class, heuristic_only=args.heuristic_only, output_path=args.output)
+    elif args.command == "index":
+        run_index(args.paths, output_path=args.output)
+    elif args.command == "search":
+        run_search(args.query, k=args.k, doc_class=args.doc_class, as_json=args.json)
+    report_metrics(args.metrics)
 
-# Step 4: Save output.json
-with open("output.json", "w", encoding="utf-8") as f:
-    json.dump(final_output, f, indent=2)
 
-print(f"\nExtraction complete! {len(final_output)} documents processed. Results saved to output.json")
+# Guarded so worker processes spawned for ingestion don't re-run the pipeline
+if __name__ == "__main__":
+    cli()
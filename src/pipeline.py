@@ -0,0 +1,321 @@
+"""
+Streaming pipeline: ingest -> classify -> complete -> clean -> extract -> (optionally) index.
+
+Stages are generators connected by bounded queues, each running in its own
+thread, so only a few batches of documents are held in memory at any time.
+Results are written as JSON Lines as soon as each document is done.
+
+PDFs are ingested only up to CLASSIFY_MAX_PAGES pages; the complete stage
+reads the rest for documents that need their full text (extraction or indexing).
+"""
+
+import json
+import queue
+import threading
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from src.config import CLASSIFY_MAX_PAGES, EMBED_FLUSH_CHARS, OUTPUT_JSONL_FILE, STREAM_BATCH_SIZE, STREAM_QUEUE_SIZE
+from src.ingestion.parallel import complete_documents, iter_documents
+from src.preprocessing.cleaner import clean_text
+from src.extraction.dispatcher import extract_fields, has_extractor
+
+_DONE = object()
+
+
+class _StageError:
+    """
+    Carries an exception raised in a producer thread over to the consumer.
+    """
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def buffered(iterable: Iterable, maxsize: int = STREAM_QUEUE_SIZE) -> Iterator:
+    """
+    Run an iterable in a background thread, handing items over through a
+    bounded queue. The producer blocks once maxsize items are waiting, which
+    keeps memory flat when a later stage is slower.
+    """
+    q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_StageError(e))
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        # Consumer finished or gave up early: release the producer
+        stop.set()
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """
+    Group an iterable into lists of at most size items.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def unreadable_result(doc: Dict) -> Dict:
+    """
+    Result for a document whose text could not be read. A read that failed
+    (rather than finding no text) is flagged with "error", so incremental
+    runs retry the document.
+    """
+    result = {
+        "class": "Unclassifiable",
+        "confidence": 0.0,
+        "reason": doc.get("error", "Unable to read file")
+    }
+    if "error" in doc:
+        result["error"] = True
+    return result
+
+
+def classified_result(doc: Dict, cls_result: Dict) -> Dict:
+    """
+    Result for a classified document, including extracted fields.
+    """
+    extracted = extract_fields(cls_result["label"], doc["text"], document=doc["file_name"])
+    return {
+        "class": cls_result["label"],
+        "confidence": cls_result["confidence"],
+        **extracted
+    }
+
+
+def error_result(error: Exception) -> Dict:
+    """
+    Result for a document that failed during classification or extraction
+    (flagged with "error", so incremental runs retry the document).
+    """
+    return {
+        "class": "Unclassifiable",
+        "confidence": 0.0,
+        "reason": f"Classification error: {str(error)}",
+        "error": True
+    }
+
+
+def needs_full_text(cls_result, index: bool = False) -> bool:
+    """
+    Whether a classified document's remaining pages have to be read: its
+    class has fields to extract, or it is going to be indexed.
+    """
+    if cls_result is None or isinstance(cls_result, Exception):
+        return False
+    return index or has_extractor(cls_result["label"])
+
+
+def index_record(doc: Dict, result: Dict) -> Dict:
+    """
+    Document dict for SemanticSearchEngine.index_documents: the cleaned text
+    (see clean_stage; both the batch and the streaming path index this text),
+    class and extracted fields (so searches can filter on them).
+    """
+    fields = {k: v for k, v in result.items() if k not in ("class", "confidence", "reason", "error")}
+    text = doc["clean_text"] if "clean_text" in doc else clean_text(doc["text"])
+    return {**fields, "file_name": doc["file_name"], "text": text, "class": result["class"]}
+
+
+def clean_stage(items: Iterable[Tuple[Dict, Optional[Dict]]]) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+    """
+    Add normalized text (used for indexing) to readable documents.
+    Classification and extraction keep working on the original text.
+    """
+    for doc, cls_result in items:
+        if doc["readable"]:
+            doc["clean_text"] = clean_text(doc["text"])
+        yield doc, cls_result
+
+
+def classify_stage(docs: Iterable[Dict], classifier, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+    """
+    Classify documents in micro-batches.
+    Yields (doc, classification) pairs; classification is None for unreadable
+    documents and an Exception for documents that failed.
+    """
+    for batch in batched(docs, batch_size):
+        readable_docs = [doc for doc in batch if doc["readable"]]
+        try:
+            cls_results = classifier.classify_batch([doc["text"] for doc in readable_docs])
+        except Exception:
+            cls_results = []
+            for doc in readable_docs:
+                try:
+                    cls_results.append(classifier.classify(doc["text"]))
+                except Exception as e:
+                    cls_results.append(e)
+
+        results = iter(cls_results)
+        for doc in batch:
+            yield doc, (next(results) if doc["readable"] else None)
+
+
+def known_class_stage(docs: Iterable[Dict], doc_class: str) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+    """
+    Pair documents of a known class with that class instead of classifying
+    them (no model needed). Unreadable documents get None, as in classify_stage.
+    """
+    for doc in docs:
+        yield doc, ({"label": doc_class, "confidence": 1.0} if doc["readable"] else None)
+
+
+def complete_stage(items: Iterable[Tuple[Dict, Optional[Dict]]], index: bool = False) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+    """
+    Read the remaining pages of partially loaded documents that need their
+    full text, passing (doc, classification) pairs through in order.
+    """
+    pending = deque()
+
+    def requests():
+        for doc, cls_result in items:
+            pending.append(cls_result)
+            yield doc, needs_full_text(cls_result, index)
+
+    for doc in complete_documents(requests()):
+        yield doc, pending.popleft()
+
+
+def extract_stage(items: Iterable[Tuple[Dict, Optional[Dict]]]) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    Turn (doc, classification) pairs into (doc, result) pairs with extracted fields.
+    """
+    for doc, cls_result in items:
+        if cls_result is None:
+            yield doc, unreadable_result(doc)
+            continue
+        try:
+            if isinstance(cls_result, Exception):
+                raise cls_result
+            yield doc, classified_result(doc, cls_result)
+        except Exception as e:
+            yield doc, error_result(e)
+
+
+def index_stage(items: Iterable[Tuple[Dict, Dict]], engine, flush_chars: int = EMBED_FLUSH_CHARS) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    Index classified documents in batches, passing (doc, result) pairs through.
+    Documents are embedded together once flush_chars of text are pending, so
+    the embedding scheduler sees enough chunks to fill its batches.
+    The index is saved once the stream is exhausted.
+    """
+    pending = []
+    pending_chars = 0
+    for doc, result in items:
+        if doc["readable"]:
+            record = index_record(doc, result)
+            pending.append(record)
+            pending_chars += len(record["text"])
+        if pending_chars >= flush_chars:
+            engine.index_documents(pending, save=False)
+            pending = []
+            pending_chars = 0
+        yield doc, result
+
+    if pending:
+        engine.index_documents(pending, save=False)
+    engine.vector_store.save()
+
+
+def run_streaming(
+    paths: Sequence[Path],
+    output_path: Path = OUTPUT_JSONL_FILE,
+    classifier=None,
+    index: bool = False,
+    batch_size: int = STREAM_BATCH_SIZE,
+    queue_size: int = STREAM_QUEUE_SIZE,
+    on_result: Optional[Callable[[str, Dict], None]] = None,
+    max_pages: Optional[int] = CLASSIFY_MAX_PAGES,
+    doc_class: Optional[str] = None,
+    engine=None,
+    reset_index: bool = True
+) -> int:
+    """
+    Run the full pipeline over paths, writing one JSON line per document.
+
+    Args:
+        paths: Document paths, e.g. from ``list_documents``
+        output_path: JSON Lines file to write ({"file_name": ..., **result} per line)
+        classifier: DocumentClassifier to use (created if not given)
+        index: If True, also chunk, embed and add documents to the vector store
+        batch_size: Documents per classification batch (indexing batches by EMBED_FLUSH_CHARS)
+        queue_size: Maximum items waiting between two stages
+        on_result: Optional callback called with (file_name, result) per document
+        max_pages: PDF pages read before classification (None = whole documents)
+        doc_class: Class of every document, if known: classification is skipped
+            and documents are read whole
+        engine: SemanticSearchEngine to index into (created if not given)
+        reset_index: If True, the index is emptied first and ends up holding just
+            these documents; otherwise they replace their own earlier chunks
+            and the rest of the index is kept (incremental runs)
+
+    Returns:
+        Number of documents written
+    """
+    if doc_class is not None:
+        stream = buffered(iter_documents(paths, ordered=False), queue_size)
+        stream = known_class_stage(stream, doc_class)
+    else:
+        if classifier is None:
+            from src.classification.classifier import DocumentClassifier
+            classifier = DocumentClassifier()
+
+        stream = buffered(iter_documents(paths, ordered=False, max_pages=max_pages), queue_size)
+        stream = buffered(classify_stage(stream, classifier, batch_size), queue_size)
+        stream = buffered(complete_stage(stream, index), queue_size)
+    stream = clean_stage(stream)
+    stream = extract_stage(stream)
+
+    if index:
+        if engine is None:
+            from src.retrieval.search import SemanticSearchEngine
+            engine = SemanticSearchEngine()
+        if reset_index:
+            # Start from an empty store once, then append every batch to it
+            engine.vector_store.reset()
+        engine.rebuild_index = False
+        stream = index_stage(stream, engine)
+
+    count = 0
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        for doc, result in stream:
+            f.write(json.dumps({"file_name": doc["file_name"], **result}) + "\n")
+            f.flush()
+            count += 1
+            if on_result is not None:
+                on_result(doc["file_name"], result)
+    return count
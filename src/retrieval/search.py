@@ -2,10 +2,14 @@
 Semantic search module: Query interface for retrieving relevant documents.
 """
 
-from typing import List, Dict
+import json
+from typing import List, Dict, Optional
+from src.embeddings.cache import LRUCache
 from src.embeddings.embedder import DocumentEmbedder, TextChunker
 from src.embeddings.vector_store import VectorStore
-from src.config import TOP_K_RESULTS
+from src.embeddings.chunker import DocumentChunks
+from src.instrumentation import count, timed
+from src.config import TOP_K_RESULTS, SEARCH_RESULT_CACHE_SIZE, CHUNK_MODE
 
 
 class SemanticSearchEngine:
@@ -13,28 +17,64 @@ class SemanticSearchEngine:
     Semantic search engine for querying documents by meaning.
     """
     
-    def __init__(self, rebuild_index: bool = False):
+    def __init__(
+        self,
+        rebuild_index: bool = False,
+        embedder: Optional[DocumentEmbedder] = None,
+        result_cache_size: int = SEARCH_RESULT_CACHE_SIZE
+    ):
         """
         Initialize search engine.
         
         Args:
             rebuild_index: If True, will rebuild index from scratch on index() call
+            embedder: Existing embedder to reuse (the model itself is always
+                shared through the model registry)
+            result_cache_size: Entries in the query -> results LRU cache (0 disables it);
+                cached results are dropped whenever the index changes
         """
-        self.embedder = DocumentEmbedder()
-        self.chunker = TextChunker()
+        self.embedder = embedder if embedder is not None else DocumentEmbedder()
+        self.chunker = TextChunker.for_model(self.embedder.model) if CHUNK_MODE == "tokens" else TextChunker()
         self.vector_store = VectorStore()
         self.rebuild_index = rebuild_index
+        self.result_cache = LRUCache(result_cache_size)
+        self._result_cache_version = None
         
         # Try to load existing index
         if not rebuild_index:
             self.vector_store.load()
     
-    def index_documents(self, documents: List[Dict]) -> None:
+    def _chunk(self, doc: Dict) -> DocumentChunks:
+        """
+        Chunk one document (embeddings are computed separately, as one array).
+        """
+        file_name = doc.get("file_name", "unknown")
+        text = doc.get("text", "")
+        doc_class = doc.get("class", "Unknown")
+        
+        # Chunk the document
+        metadata = {
+            "file_name": file_name,
+            "class": doc_class
+        }
+        return self.chunker.chunk(text, metadata=metadata)
+    
+    @staticmethod
+    def _document_fields(doc: Dict) -> Dict:
+        """
+        Extra keys of a document (e.g. extracted fields) usable as search filters.
+        """
+        return {k: v for k, v in doc.items() if k not in ("file_name", "text", "class")}
+    
+    def index_documents(self, documents: List[Dict], save: bool = True) -> None:
         """
         Index a list of documents by chunking and embedding them.
+        Documents already in the index are replaced rather than duplicated.
         
         Args:
-            documents: List of dicts with 'file_name', 'text', and optionally 'class'
+            documents: List of dicts with 'file_name', 'text', optionally 'class',
+                and any extracted fields to filter on (e.g. 'date', 'company')
+            save: If True, write the index to disk afterwards
         """
         if self.rebuild_index:
             self.vector_store.reset()
@@ -43,45 +83,164 @@ class SemanticSearchEngine:
         
         for doc in documents:
             file_name = doc.get("file_name", "unknown")
-            text = doc.get("text", "")
-            doc_class = doc.get("class", "Unknown")
-            
-            # Chunk the document
-            metadata = {
-                "file_name": file_name,
-                "class": doc_class
-            }
-            chunks = self.chunker.chunk_text(text, metadata=metadata)
-            
-            # Embed the chunks
-            chunks = self.embedder.embed_chunks(chunks)
-            all_chunks.extend(chunks)
+            self.vector_store.remove_document(file_name)
+            self.vector_store.set_document_fields(file_name, self._document_fields(doc))
+            all_chunks.append(self._chunk(doc))
         
-        # Add all chunks to vector store
-        self.vector_store.add_chunks(all_chunks)
-        self.vector_store.save()
+        # Embed all chunks in one pass and hand the float32 array straight to the store
+        embeddings = self.embedder.embed_array([text for chunks in all_chunks for text in chunks.texts()])
+        self.vector_store.add_chunks(all_chunks, embeddings=embeddings)
+        if save:
+            self.vector_store.save()
+    
+    def upsert_document(self, doc: Dict, save: bool = True) -> None:
+        """
+        Re-index a single (new or changed) document without touching the rest of the index.
+        
+        Args:
+            doc: Dict with 'file_name', 'text', optionally 'class' and extracted fields
+            save: If True, write the index to disk afterwards
+        """
+        chunks = self._chunk(doc)
+        self.vector_store.upsert_document(
+            doc.get("file_name", "unknown"),
+            chunks,
+            fields=self._document_fields(doc),
+            embeddings=self.embedder.embed_array(chunks.texts())
+        )
+        if save:
+            self.vector_store.save()
+    
+    def remove_document(self, file_name: str, save: bool = True) -> int:
+        """
+        Remove a document from the index.
+        
+        Args:
+            file_name: Document to remove
+            save: If True, write the index to disk afterwards
+            
+        Returns:
+            Number of chunks removed
+        """
+        removed = self.vector_store.remove_document(file_name)
+        if removed and save:
+            self.vector_store.save()
+        return removed
     
-    def search(self, query: str, k: int = TOP_K_RESULTS) -> List[Dict]:
+    def search(
+        self,
+        query: str,
+        k: int = TOP_K_RESULTS,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
         """
         Search for documents matching the query.
         
         Args:
             query: Natural language query string
             k: Number of top results to return
+            nprobe: IVF cells to visit (approximate indexes only)
+            ef_search: HNSW candidate list size (approximate indexes only)
+            filters: Optional metadata filters applied before ranking, e.g.
+                {"class": "Invoice", "file_name": [...], "date": {"gte": "2025-01-01", "lte": "2025-03-31"}}
             
         Returns:
             List of result dicts with file_name, class, chunk_id, and similarity_score
         """
+        return self.search_many([query], k=k, nprobe=nprobe, ef_search=ef_search, filters=filters)[0]
+    
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = TOP_K_RESULTS,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict] = None
+    ) -> List[List[Dict]]:
+        """
+        Search for several queries at once: uncached queries are embedded in
+        one batch and looked up with a single FAISS search over the query matrix
+        (see search_batch()).
+        
+        Args:
+            queries: Natural language query strings
+            k: Number of top results per query
+            nprobe: IVF cells to visit (approximate indexes only)
+            ef_search: HNSW candidate list size (approximate indexes only)
+            filters: Optional metadata filters applied to every query (see search())
+            
+        Returns:
+            One result list per query, in query order
+        """
+        return self.search_batch([
+            {"query": query, "k": k, "nprobe": nprobe, "ef_search": ef_search, "filters": filters}
+            for query in queries
+        ])
+    
+    def search_batch(self, requests: List[Dict]) -> List[List[Dict]]:
+        """
+        Answer several independent search requests at once (e.g. concurrent
+        clients of the search server). Uncached queries of all requests are
+        embedded in one batch; requests with the same filters and search
+        parameters share one FAISS search at their largest k, and each gets
+        its own top k from it.
+        
+        Args:
+            requests: Dicts with 'query' and optionally 'k', 'nprobe',
+                'ef_search' and 'filters' (see search())
+            
+        Returns:
+            One result list per request, in request order
+        """
         if self.vector_store.index.ntotal == 0:
-            return []
+            return [[] for _ in requests]
+        
+        # Results cached against an older index are no longer valid
+        if self._result_cache_version != self.vector_store.version:
+            self.result_cache.clear()
+            self._result_cache_version = self.vector_store.version
         
-        # Embed the query
-        query_embedding = self.embedder.embed_texts([query])[0]
+        keys = []
+        filters_by_key = {}
+        for request in requests:
+            filters = request.get("filters")
+            filters_key = json.dumps(filters, sort_keys=True, default=str) if filters else None
+            filters_by_key[filters_key] = filters
+            keys.append((request["query"], request.get("k", TOP_K_RESULTS), request.get("nprobe"), request.get("ef_search"), filters_key))
+        results = [self.result_cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, r in zip(keys, results) if r is None))
+        count("search_requests", len(requests))
+        count("search_result_cache_hits", sum(r is not None for r in results))
         
-        # Search
-        results = self.vector_store.search(query_embedding, k=k)
+        if missing:
+            with timed("search", items=len(missing)):
+                queries = list(dict.fromkeys(key[0] for key in missing))
+                rows = {query: i for i, query in enumerate(queries)}
+                query_embeddings = self.embedder.embed_queries(queries)
+                
+                # One FAISS search per (nprobe, ef_search, filters) group
+                groups: Dict[tuple, List[tuple]] = {}
+                for key in missing:
+                    groups.setdefault(key[2:], []).append(key)
+                found = {}
+                for (nprobe, ef_search, filters_key), group in groups.items():
+                    hits = self.vector_store.search_many(
+                        query_embeddings[[rows[key[0]] for key in group]],
+                        k=max(key[1] for key in group),
+                        nprobe=nprobe,
+                        ef_search=ef_search,
+                        filters=filters_by_key[filters_key]
+                    )
+                    for key, hit in zip(group, hits):
+                        # Results are sorted by distance, so the first k are the top k
+                        found[key] = hit[:key[1]]
+                        self.result_cache.put(key, found[key])
+            results = [r if r is not None else found[key] for key, r in zip(keys, results)]
         
-        return results
+        # Copies, so callers can't modify cached results
+        return [[dict(result) for result in request_results] for request_results in results]
     
     def search_by_class(self, query: str, doc_class: str, k: int = TOP_K_RESULTS) -> List[Dict]:
         """
@@ -93,14 +252,9 @@ class SemanticSearchEngine:
             k: Number of top results to return
             
         Returns:
-            Filtered list of results
+            Up to k results, all of class doc_class (exactly k if that many chunks exist)
         """
-        all_results = self.search(query, k=k * 2)  # Get extra results for filtering
-        
-        # Filter by class
-        filtered = [r for r in all_results if r.get("class") == doc_class]
-        
-        return filtered[:k]
+        return self.search(query, k=k, filters={"class": doc_class})
     
     def get_stats(self) -> Dict:
         """
@@ -111,6 +265,12 @@ class SemanticSearchEngine:
         """
         stats = self.vector_store.get_stats()
         stats["embedder_model"] = self.embedder.model_name
+        stats["embedder_backend"] = self.embedder.backend
+        if self.embedder.embedding_cache is not None:
+            stats["embedding_cache"] = self.embedder.embedding_cache.get_stats()
+        stats["query_cache"] = self.embedder.query_cache.get_stats()
+        stats["result_cache"] = self.result_cache.get_stats()
+        stats["embedding_scheduler"] = self.embedder.scheduler.get_stats()
         stats["chunk_size"] = self.chunker.chunk_size
         stats["chunk_overlap"] = self.chunker.overlap
         return stats
@@ -0,0 +1,556 @@
+"""
+Search server module: Long-running asyncio query server with request micro-batching.
+
+Loads the embedding model and vector store once and answers search requests
+over HTTP (TCP or a Unix socket; stdlib only). Requests arriving within a
+few milliseconds of each other are coalesced: the batch is answered with
+one query encode and one FAISS search per filter group
+(SemanticSearchEngine.search_batch), and the results are fanned back out.
+Searches run on one worker thread, so the event loop keeps accepting (and
+queueing) requests while a batch is computed.
+
+Endpoints:
+    POST /search           {"query": ..., "k": 5, "filters": {...}, "doc_class": "Invoice"}
+    POST /search_by_class  {"query": ..., "doc_class": "Invoice", "k": 5}
+    GET  /stats            latency percentiles, queue depth, batch sizes, index stats
+    GET  /health
+
+Usage:
+    python -m src.retrieval.server                          # serve on SEARCH_SERVER_HOST:SEARCH_SERVER_PORT
+    python -m src.retrieval.server --unix /tmp/search.sock
+    python -m src.retrieval.server --load-test 2000 --concurrency 32   # against a running server
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import random
+import socket
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.config import (
+    TOP_K_RESULTS,
+    SEARCH_SERVER_HOST,
+    SEARCH_SERVER_PORT,
+    SEARCH_BATCH_WINDOW_MS,
+    SEARCH_MAX_BATCH,
+    SEARCH_LATENCY_WINDOW
+)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+_MAX_BODY = 1 << 20
+
+
+def _json_default(value):
+    # NumPy scalars in result metadata
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _percentiles(values: Sequence[float]) -> Dict:
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    array = np.asarray(values, dtype=np.float64)
+    p50, p90, p99 = np.percentile(array, [50, 90, 99])
+    return {"p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(array.max()), "mean": float(array.mean())}
+
+
+def parse_search_request(payload: Dict) -> Dict:
+    """
+    Validate a /search body and turn it into a search_batch() request.
+    doc_class is shorthand for filters={"class": doc_class}.
+
+    Raises:
+        ValueError: If the body is not a valid search request
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("query"), str) or not payload["query"].strip():
+        raise ValueError("'query' must be a non-empty string")
+    k = payload.get("k", TOP_K_RESULTS)
+    if isinstance(k, bool) or not isinstance(k, int) or k < 1:
+        raise ValueError("'k' must be a positive integer")
+    filters = payload.get("filters") or {}
+    if not isinstance(filters, dict):
+        raise ValueError("'filters' must be an object")
+    if payload.get("doc_class"):
+        filters = {**filters, "class": payload["doc_class"]}
+    # class and file_name are looked up in string tables: a value or a list of values
+    for key in ("class", "file_name"):
+        if key in filters:
+            values = filters[key] if isinstance(filters[key], list) else [filters[key]]
+            if not all(isinstance(value, str) for value in values):
+                raise ValueError(f"'{key}' filter must be a string or a list of strings")
+    request = {"query": payload["query"], "k": k, "filters": filters or None}
+    for param in ("nprobe", "ef_search"):
+        if payload.get(param) is not None:
+            if isinstance(payload[param], bool) or not isinstance(payload[param], int) or payload[param] < 1:
+                raise ValueError(f"'{param}' must be a positive integer")
+            request[param] = payload[param]
+    return request
+
+
+class MicroBatcher:
+    """
+    Queues search requests and answers them in batches on one worker thread.
+    """
+
+    def __init__(
+        self,
+        engine,
+        window_ms: float = SEARCH_BATCH_WINDOW_MS,
+        max_batch: int = SEARCH_MAX_BATCH,
+        latency_window: int = SEARCH_LATENCY_WINDOW
+    ):
+        """
+        Args:
+            engine: SemanticSearchEngine (anything with search_batch())
+            window_ms: How long the first queued request waits for others to join its batch
+            max_batch: Maximum requests per batch
+            latency_window: Number of recent requests latency percentiles are computed over
+        """
+        self.engine = engine
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.latencies = deque(maxlen=latency_window)
+        self.batch_sizes = deque(maxlen=latency_window)
+        self.queue_depths = deque(maxlen=latency_window)
+
+    def start(self) -> None:
+        """
+        Start the batching loop (call from the event loop that will submit requests).
+        """
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the batching loop and the worker thread.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+
+    async def submit(self, request: Dict) -> List[Dict]:
+        """
+        Queue one search request and wait for its results.
+
+        Args:
+            request: search_batch() request dict
+
+        Returns:
+            Result list of the request
+        """
+        arrived = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((request, future))
+        depth = self._queue.qsize()
+        self.queue_depths.append(depth)
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        try:
+            return await future
+        finally:
+            self.requests += 1
+            self.latencies.append((time.perf_counter() - arrived) * 1000)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent requests the window to join, unless a full batch is already waiting
+            if self._queue.qsize() + 1 < self.max_batch and self.window > 0:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Requests whose client went away don't need answering
+            batch = [(request, future) for request, future in batch if not future.done()]
+            if not batch:
+                continue
+            self.batches += 1
+            self.batch_sizes.append(len(batch))
+            try:
+                results = await loop.run_in_executor(self.executor, self.engine.search_batch, [request for request, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    self._fail(batch[0][1], e)
+                    continue
+                # Retry one by one, so only the request that caused the failure gets the error
+                for request, future in batch:
+                    try:
+                        result = (await loop.run_in_executor(self.executor, self.engine.search_batch, [request]))[0]
+                    except Exception as request_error:
+                        self._fail(future, request_error)
+                        continue
+                    if not future.done():
+                        future.set_result(result)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _fail(self, future: asyncio.Future, error: Exception) -> None:
+        self.errors += 1
+        if not future.done():
+            future.set_exception(error)
+
+    async def run_in_worker(self, fn, *args):
+        """
+        Run fn on the search thread (between batches), e.g. to read engine stats safely.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def get_stats(self) -> Dict:
+        """
+        Get serving statistics.
+
+        Returns:
+            Dict with request/batch/error counts, latency percentiles in ms and
+            queue depth (seen by arriving requests) over the recent window, and
+            batch sizes
+        """
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "latency_ms": _percentiles(self.latencies),
+            "queue_depth": {
+                "current": self._queue.qsize() if self._queue is not None else 0,
+                "max": self.max_queue_depth,
+                **{name: value for name, value in _percentiles(self.queue_depths).items() if name in ("mean", "p99")}
+            },
+            "batch_size": {
+                "mean": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+                "max": max(self.batch_sizes, default=0)
+            },
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch
+        }
+
+
+class SearchServer:
+    """
+    Minimal HTTP/1.1 (keep-alive) JSON server in front of a MicroBatcher.
+    """
+
+    def __init__(
+        self,
+        engine,
+        host: str = SEARCH_SERVER_HOST,
+        port: int = SEARCH_SERVER_PORT,
+        unix_socket: Optional[str] = None,
+        window_ms: float = SEARCH_BATCH_WINDOW_MS,
+        max_batch: int = SEARCH_MAX_BATCH
+    ):
+        """
+        Args:
+            engine: Loaded SemanticSearchEngine
+            host: Interface to listen on (TCP)
+            port: Port to listen on (TCP)
+            unix_socket: Listen on this Unix socket path instead of TCP
+            window_ms: Micro-batching window (see MicroBatcher)
+            max_batch: Maximum requests per batch
+        """
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.batcher = MicroBatcher(engine, window_ms=window_ms, max_batch=max_batch)
+        self.started = time.time()
+
+    async def serve_forever(self) -> None:
+        """
+        Listen and serve until cancelled.
+        """
+        self.batcher.start()
+        if self.unix_socket:
+            server = await asyncio.start_unix_server(self._handle, path=self.unix_socket)
+            print(f"Search server listening on {self.unix_socket}")
+        else:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+            print(f"Search server listening on http://{self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > _MAX_BODY:
+            raise OverflowError(length)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if path in ("/search", "/search_by_class"):
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            try:
+                payload = json.loads(body or b"null")
+                if path == "/search_by_class" and not (isinstance(payload, dict) and payload.get("doc_class")):
+                    raise ValueError("'doc_class' is required")
+                request = parse_search_request(payload)
+            except ValueError as e:
+                return 400, {"error": str(e)}
+            results = await self.batcher.submit(request)
+            return 200, {"query": request["query"], "results": results}
+        if path == "/stats":
+            stats = self.batcher.get_stats()
+            stats["uptime_seconds"] = time.time() - self.started
+            stats["engine"] = await self.batcher.run_in_worker(self.engine.get_stats)
+            return 200, stats
+        if path == "/health":
+            return 200, {"status": "ok"}
+        return 404, {"error": f"no route {path}"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except OverflowError:
+                    await self._respond(writer, 413, {"error": f"body over {_MAX_BODY} bytes"}, close=True)
+                    break
+                except (ValueError, asyncio.IncompleteReadError):
+                    await self._respond(writer, 400, {"error": "malformed request"}, close=True)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                close = headers.get("connection", "").lower() == "close"
+                await self._respond(writer, status, payload, close=close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Dict, close: bool = False) -> None:
+        body = json.dumps(payload, default=_json_default).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class SearchClient:
+    """
+    Blocking client for the search server; keeps one connection open.
+    """
+
+    def __init__(
+        self,
+        host: str = SEARCH_SERVER_HOST,
+        port: int = SEARCH_SERVER_PORT,
+        unix_socket: Optional[str] = None,
+        timeout: float = 30.0
+    ):
+        if unix_socket:
+            self.connection = _UnixHTTPConnection(unix_socket, timeout)
+        else:
+            self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _call(self, method: str, path: str, payload: Optional[Dict] = None) -> Dict:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        data = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(f"Search server returned {response.status}: {data.get('error')}")
+        return data
+
+    def search(self, query: str, k: int = TOP_K_RESULTS, filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Same as SemanticSearchEngine.search (without nprobe/ef_search).
+        """
+        return self._call("POST", "/search", {"query": query, "k": k, "filters": filters})["results"]
+
+    def search_by_class(self, query: str, doc_class: str, k: int = TOP_K_RESULTS) -> List[Dict]:
+        """
+        Same as SemanticSearchEngine.search_by_class.
+        """
+        return self._call("POST", "/search_by_class", {"query": query, "doc_class": doc_class, "k": k})["results"]
+
+    def get_stats(self) -> Dict:
+        """
+        Server statistics (see MicroBatcher.get_stats), plus index stats under "engine".
+        """
+        return self._call("GET", "/stats")
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+async def load_test(
+    queries: List[str],
+    requests: int = 1000,
+    concurrency: int = 32,
+    host: str = SEARCH_SERVER_HOST,
+    port: int = SEARCH_SERVER_PORT,
+    unix_socket: Optional[str] = None,
+    doc_classes: Sequence[Optional[str]] = (None,),
+    seed: int = 0
+) -> Dict:
+    """
+    Drive a running server with concurrent keep-alive clients.
+
+    Args:
+        queries: Query strings (sampled with replacement)
+        requests: Total requests to send
+        concurrency: Number of concurrent clients
+        host, port, unix_socket: Server address
+        doc_classes: Class filters sampled per request (None = unfiltered)
+        seed: Sampling seed
+
+    Returns:
+        Dict with client-side latency percentiles in ms, throughput, errors
+        and the server's stats afterwards
+    """
+    rng = random.Random(seed)
+    plan = [(rng.choice(queries), rng.choice(list(doc_classes))) for _ in range(requests)]
+    latencies = []
+    errors = 0
+
+    async def client(share: List[Tuple[str, Optional[str]]]):
+        nonlocal errors
+        if unix_socket:
+            reader, writer = await asyncio.open_unix_connection(unix_socket)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for query, doc_class in share:
+                body = json.dumps({"query": query, "doc_class": doc_class}).encode("utf-8")
+                start = time.perf_counter()
+                writer.write(
+                    f"POST /search HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                status_line = await reader.readline()
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if b" 200 " not in status_line:
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(plan[i::concurrency]) for i in range(concurrency)))
+    seconds = time.perf_counter() - start
+
+    stats_client = SearchClient(host, port, unix_socket)
+    try:
+        server_stats = await asyncio.get_running_loop().run_in_executor(None, stats_client.get_stats)
+    finally:
+        stats_client.close()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": seconds,
+        "requests_per_sec": requests / seconds if seconds else float("inf"),
+        "latency_ms": _percentiles(latencies),
+        "server": {name: server_stats[name] for name in ("latency_ms", "queue_depth", "batch_size", "batches")}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve semantic search over HTTP with request micro-batching")
+    parser.add_argument("--host", type=str, default=SEARCH_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SEARCH_SERVER_PORT)
+    parser.add_argument("--unix", type=str, default=None, help="listen on (or connect to) a Unix socket instead of TCP")
+    parser.add_argument("--window-ms", type=float, default=SEARCH_BATCH_WINDOW_MS, help="micro-batching window")
+    parser.add_argument("--max-batch", type=int, default=SEARCH_MAX_BATCH)
+    parser.add_argument("--load-test", type=int, default=None, metavar="N", help="send N requests to a running server instead of serving")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", type=str, default=None, help="write the load test report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.load_test:
+        from src.config import DOC_LABELS
+        queries = [f"{label} {term}" for label in DOC_LABELS for term in ("total amount", "due date", "contact details", "summary")]
+        report = asyncio.run(load_test(
+            queries, requests=args.load_test, concurrency=args.concurrency,
+            host=args.host, port=args.port, unix_socket=args.unix, doc_classes=(None, *DOC_LABELS)
+        ))
+        latency = report["latency_ms"]
+        print(f"{report['requests']} requests, concurrency {report['concurrency']}: "
+              f"{report['requests_per_sec']:.0f} req/s, {report['errors']} errors")
+        print(f"Latency ms: p50 {latency['p50']:.1f}  p90 {latency['p90']:.1f}  p99 {latency['p99']:.1f}  max {latency['max']:.1f}")
+        print(f"Server: mean batch {report['server']['batch_size']['mean']:.1f}, "
+              f"max queue depth {report['server']['queue_depth']['max']}")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        return
+
+    from src.embeddings.model_registry import warmup
+    from src.retrieval.search import SemanticSearchEngine
+    warmup()
+    engine = SemanticSearchEngine()
+    print(f"Loaded index with {engine.vector_store.index.ntotal} vectors")
+    server = SearchServer(
+        engine, host=args.host, port=args.port, unix_socket=args.unix,
+        window_ms=args.window_ms, max_batch=args.max_batch
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()